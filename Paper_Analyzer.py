@@ -380,6 +380,11 @@ def render_sidebar():
         n_selected = len(selected_agents)
         st.caption(f"{n_selected} of 8 agents selected")
 
+        st.session_state.use_llm_cache = st.checkbox(
+            "Reuse cached LLM responses", value=True, key="use_llm_cache_toggle",
+            help="Re-analyzing the same PDF reuses earlier model answers instead of paying for them again. Untick for a fresh run."
+        )
+
         st.markdown("---")
         st.markdown("""
         ### Supported paper types
@@ -682,6 +687,16 @@ def render_plagiarism_tab(plagiarism):
                 st.markdown(f'> "{s.get("text", "N/A")[:200]}..."')
                 st.markdown(f"**Recommendation:** {s.get('recommendation', 'N/A')}")
 
+    # Verbatim overlap from the local fingerprint index
+    corpus_matches = plagiarism.get('corpus_matches', [])
+    if corpus_matches:
+        st.markdown(f"#### Local Corpus Matches ({len(corpus_matches)})")
+        for m in corpus_matches:
+            with st.expander(f"{m.get('coverage', 0):.0%} overlap: {m.get('title') or m.get('source') or 'indexed document'}"):
+                st.markdown(f'> "{m.get("matched_text", "")[:300]}"')
+                if m.get('source'):
+                    st.caption(m['source'])
+
     # Recommendations
     recs = plagiarism.get('recommendations', [])
     if recs:
@@ -1185,115 +1200,53 @@ def render_funding_tab(funding):
         st.info(strategy)
 
 
-def run_analysis(pdf_path, selected_agents):
-    """Run the analysis workflow with parallel agent execution."""
+def run_analysis(pdf_path, selected_agents, use_cache=True):
+    """Run the analysis workflow, executing the agent graph concurrently."""
     from workflow import PaperAnalyzerWorkflow
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-
-    workflow = PaperAnalyzerWorkflow()
-
-    # Step 1: Extract text
-    full_text = workflow.extract_text_from_pdf(pdf_path)
-    yield {"step": "pdf_extracted", "chars": len(full_text)}
-
-    # Step 2: Extract sections
-    sections, paper_type = workflow.extract_sections(full_text)
-    is_review = paper_type in ("review", "meta_analysis")
-    yield {"step": "sections_extracted", "paper_type": paper_type, "sections": sections}
-
-    # --- Define agent tasks as callables ---
-    def run_results():
-        if "results" not in selected_agents:
-            return _skipped_data("results")
-        if sections.get('results'):
-            return workflow.results_synthesizer.analyze(sections['results'])
-        elif sections.get('discussion'):
-            return workflow.results_synthesizer.analyze(sections['discussion'])
-        return workflow._empty_results_analysis()
-
-    def run_writing():
-        if "writing" not in selected_agents:
-            return _skipped_data("writing")
-        return workflow.writing_coach.analyze(sections, paper_type)
-
-    def run_methodology():
-        if "methodology" not in selected_agents:
-            return _skipped_data("methodology")
-        if is_review:
-            return workflow._review_methods_analysis()
-        elif sections.get('methods'):
-            return workflow.methodology_critic.analyze(
-                sections['methods'],
-                abstract=sections.get('abstract', ''),
-                results_text=sections.get('results', '')
-            )
-        return workflow._empty_methods_analysis()
-
-    def run_dataviz():
-        if "visualization" not in selected_agents:
-            return _skipped_data("visualization")
-        return workflow.visualization_critic.analyze(
-            pdf_path, full_text, sections.get('results', '')
-        )
-
-    def run_citations():
-        if "citations" not in selected_agents:
-            return _skipped_data("citations")
-        return workflow.citation_hunter.analyze(
-            sections.get('title', 'Unknown Title'),
-            sections.get('abstract', '')
-        )
-
-    def run_plagiarism():
-        if "plagiarism" not in selected_agents:
-            return _skipped_data("plagiarism")
-        return workflow.plagiarism_detector.analyze(full_text, paper_type)
-
-    def run_funding():
-        if "funding" not in selected_agents:
-            return _skipped_data("funding")
-        return workflow.funding_advisor.analyze(
-            sections.get('title', 'Unknown Title'),
-            sections.get('abstract', ''),
-            paper_type=paper_type
-        )
+    from core.document import PaperDocument
+    from core.scheduler import AgentScheduler
 
-    # --- Phase 1: Run 7 independent agents in parallel ---
-    yield {"step": "parallel_start"}
-
-    parallel_tasks = {
-        "results": run_results,
-        "writing": run_writing,
-        "methodology": run_methodology,
-        "visualization": run_dataviz,
-        "citations": run_citations,
-        "plagiarism": run_plagiarism,
-        "funding": run_funding,
-    }
-
-    step_names = {
-        "results": "agent2_done",
-        "writing": "agent8_done",
-        "methodology": "agent1_done",
-        "visualization": "agent7_done",
-        "citations": "agent3_done",
-        "plagiarism": "agent4_done",
-        "funding": "agent6_done",
-    }
+    workflow = PaperAnalyzerWorkflow(use_cache=use_cache)
 
-    agent_results = {}
-    with ThreadPoolExecutor(max_workers=7) as executor:
-        future_to_agent = {
-            executor.submit(fn): name for name, fn in parallel_tasks.items()
+    # One opened PDF serves text and figure extraction
+    document = PaperDocument(pdf_path)
+    try:
+        # Step 1: Extract text
+        full_text = workflow.extract_text_from_pdf(document)
+        yield {"step": "pdf_extracted", "chars": len(full_text)}
+
+        # Step 2: Extract sections
+        sections, paper_type = workflow.extract_sections(full_text, document)
+        yield {"step": "sections_extracted", "paper_type": paper_type, "sections": sections}
+
+        # --- Run the agent graph: every agent starts immediately, journal ranking
+        # waits only on methodology + results ---
+        yield {"step": "parallel_start"}
+
+        step_names = {
+            "results": "agent2_done",
+            "writing": "agent8_done",
+            "methodology": "agent1_done",
+            "visualization": "agent7_done",
+            "citations": "agent3_done",
+            "plagiarism": "agent4_done",
+            "journals": "agent5_done",
+            "funding": "agent6_done",
         }
-        for future in as_completed(future_to_agent):
-            agent_name = future_to_agent[future]
-            try:
-                agent_results[agent_name] = future.result()
-            except Exception as e:
-                print(f"Agent {agent_name} failed: {e}")
-                agent_results[agent_name] = _skipped_data(agent_name)
-            yield {"step": step_names[agent_name], "data": agent_results[agent_name]}
+
+        nodes = workflow.build_agent_graph(
+            document, full_text, sections, paper_type,
+            selected_agents=selected_agents,
+            on_skip=_skipped_data,
+            on_error=lambda agent_key, e: _skipped_data(agent_key)
+        )
+        agent_results = {}
+        for agent_name, data in AgentScheduler(nodes).iter_completed():
+            agent_results[agent_name] = data
+            if agent_name in step_names:
+                yield {"step": step_names[agent_name], "data": data}
+    finally:
+        document.close()
 
     results_analysis = agent_results["results"]
     writing_analysis = agent_results["writing"]
@@ -1301,22 +1254,21 @@ def run_analysis(pdf_path, selected_agents):
     visualization_analysis = agent_results["visualization"]
     citation_analysis = agent_results["citations"]
     plagiarism_analysis = agent_results["plagiarism"]
+    journal_recommendations = agent_results["journals"]
     funding_recommendations = agent_results["funding"]
 
-    # --- Phase 2: Journals (depends on methodology + results) ---
-    if "journals" in selected_agents:
-        methods_quality_score = methods_analysis.get('overall_quality')
-        evidence_strength_val = results_analysis.get('strength_of_evidence', '')
-        journal_recommendations = workflow.journal_recommender.analyze(
-            sections.get('title', 'Unknown Title'),
-            sections.get('abstract', ''),
-            paper_type=paper_type,
-            methods_quality=methods_quality_score if methods_quality_score != "N/A" else None,
-            evidence_strength=evidence_strength_val if evidence_strength_val != "unknown" else None
-        )
-    else:
-        journal_recommendations = _skipped_data("journals")
-    yield {"step": "agent5_done", "data": journal_recommendations}
+    cache_stats = workflow.cache_stats()
+    if cache_stats["enabled"]:
+        print(f"LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+    limits = workflow.rate_limit_stats()
+    print(f"LLM rate limiter: avg wait {limits['avg_wait_seconds']}s, max wait {limits['max_wait_seconds']}s, "
+          f"max queue {limits['max_queue_depth']}, {limits['rate_limited_responses']}x 429")
+    openalex = workflow.openalex_cache_stats()
+    print(f"OpenAlex cache: {openalex['hits']} hits, {openalex['revalidated']} revalidated, {openalex['misses']} misses; "
+          f"{openalex['requests']} requests, {openalex['rate_limited_responses']}x 429")
+    scholar = workflow.semantic_scholar_stats()
+    print(f"Semantic Scholar: {scholar['hits']} cache hits, {scholar['misses']} misses; "
+          f"{scholar['requests']} requests (avg {scholar['avg_latency_seconds']}s), {scholar['rate_limited_responses']}x 429")
 
     # Generate markdown report
     report = workflow.generate_report(
@@ -1338,7 +1290,8 @@ def run_analysis(pdf_path, selected_agents):
         "plagiarism": plagiarism_analysis,
         "journals": journal_recommendations,
         "funding": funding_recommendations,
-        "selected_agents": selected_agents
+        "selected_agents": selected_agents,
+        "section_extraction": workflow.section_extraction
     }
 
 
@@ -1545,17 +1498,15 @@ if uploaded_file is not None and st.session_state.analysis_result is None:
                         ("journals", "agent5_done", "Journal Recommender", "📚"),
                         ("funding", "agent6_done", "Funding Advisor", "💰"),
                     ]
-                    # Parallel agents get a single progress step
-                    active_parallel = [a for a in agent_steps if a[0] in selected_agents and a[0] != "journals"]
+                    # All agents share a single progress step (journals finishes once
+                    # methodology + results are in)
+                    active_parallel = [a for a in agent_steps if a[0] in selected_agents]
                     steps.append(("Running agents in parallel...", "⚡"))
                     step_map["parallel_start"] = len(steps) - 1
                     parallel_done_count = 0
                     parallel_total = len(active_parallel)
                     for agent_key, step_name, label, icon in active_parallel:
                         step_map[step_name] = len(steps) - 1  # all map to same parallel step
-                    if "journals" in selected_agents:
-                        steps.append(("Journal Recommender: Recommending journals...", "📚"))
-                        step_map["agent5_done"] = len(steps) - 1
 
                     steps.append(("Generating report...", "📝"))
                     total_steps = len(steps)
@@ -1589,7 +1540,8 @@ if uploaded_file is not None and st.session_state.analysis_result is None:
 
                     try:
                         final_result = None
-                        for update in run_analysis(tmp_path, selected_agents):
+                        for update in run_analysis(tmp_path, selected_agents,
+                                                   use_cache=st.session_state.get("use_llm_cache", True)):
                             step_name = update["step"]
 
                             if step_name == "complete":
@@ -1601,7 +1553,7 @@ if uploaded_file is not None and st.session_state.analysis_result is None:
                                 current_step = idx
                                 status_text.markdown(f"**⚡ Running {parallel_total} agents in parallel...**")
                                 progress_bar.progress(idx / total_steps, text=f"Running {parallel_total} agents in parallel...")
-                            elif step_name in step_map and step_name.startswith("agent") and step_name != "agent5_done":
+                            elif step_name in step_map and step_name.startswith("agent"):
                                 parallel_done_count += 1
                                 agent_label = next((l for k, s, l, i in agent_steps if s == step_name), step_name)
                                 status_text.markdown(f"**⚡ {agent_label} done ({parallel_done_count}/{parallel_total})**")
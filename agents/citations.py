@@ -1,24 +1,48 @@
-from openai import AzureOpenAI
+from core.llm_client import create_llm_client
+from core.semantic_scholar import DETAIL_FIELDS, SEARCH_FIELDS, get_semantic_scholar_client
+from core.stopwords import STOPWORDS
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
 from dotenv import load_dotenv
+import math
 import os
 import json
-import requests
-import time
+import re
 
 load_dotenv()
 
+# Frequent in abstracts but useless as search terms
+GENERIC_TERMS = {'study', 'studies', 'results', 'result', 'showed', 'show', 'shows', 'found',
+                 'using', 'used', 'based', 'paper', 'approach', 'significant', 'significantly',
+                 'effect', 'effects', 'analysis', 'data', 'compared', 'findings', 'present',
+                 'propose', 'proposed', 'however', 'further', 'well', 'high', 'higher', 'new',
+                 'examined', 'investigated', 'week', 'weeks', 'year', 'years'}
+
+# Multi-word method terms first so "randomized controlled trial" wins over "trial"
+METHOD_TERMS = (
+    'randomized controlled trial', 'systematic review', 'meta-analysis', 'cohort study',
+    'case-control', 'cross-sectional', 'longitudinal', 'qualitative', 'mixed methods',
+    'survey', 'interviews', 'regression', 'structural equation modeling', 'machine learning',
+    'deep learning', 'neural network', 'transformer', 'simulation', 'monte carlo',
+    'finite element', 'bayesian', 'experiment', 'field study', 'case study', 'ethnography',
+    'difference-in-differences', 'instrumental variable', 'panel data', 'genome-wide',
+    'sequencing', 'spectroscopy', 'mass spectrometry', 'microscopy', 'fmri', 'eeg'
+)
+
 
 class CitationHunter:
     """Agent 3: Finds related papers and analyzes citation context"""
 
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION")
-        )
+    MAX_QUERIES = 3
+    RESULTS_PER_QUERY = 20
+    CONCEPT_TERMS = 5
+    # Reranked papers sent to the LLM
+    TOP_PAPERS = 10
+
+    def __init__(self, client=None):
+        self.client = client or create_llm_client()
         self.model = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        self.semantic_scholar_api = "https://api.semanticscholar.org/graph/v1"
+        self.scholar = get_semantic_scholar_client()
         
         self.system_prompt = """You are a citation and literature analysis expert.
 
@@ -78,50 +102,99 @@ Return JSON:
 """
     
     def search_papers(self, query, limit=10):
-        """Search Semantic Scholar for related papers with retry on rate limit"""
-
-        url = f"{self.semantic_scholar_api}/paper/search"
-        params = {
-            "query": query,
-            "limit": limit,
-            "fields": "title,abstract,year,citationCount,authors"
-        }
-
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(url, params=params, timeout=10)
-
-                if response.status_code == 429:
-                    wait_time = 2 ** (attempt + 1)  # 2s, 4s, 8s
-                    print(f"⚠️  Rate limited by Semantic Scholar, retrying in {wait_time}s... ({attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
+        """Search Semantic Scholar for related papers (pooled, cached, retry on rate limit)"""
+        return self.scholar.search(query, limit=limit, fields=SEARCH_FIELDS)
+
+    @staticmethod
+    def _terms(text):
+        return [w for w in re.findall(r"[a-z][a-z\-]+", (text or "").lower())
+                if len(w) > 3 and w not in STOPWORDS and w not in GENERIC_TERMS]
+
+    def build_queries(self, title, abstract):
+        """Search queries without an LLM call: the title, key abstract concepts, method terms"""
+        queries = [title]
+
+        text = f"{title} {abstract}".lower()
+        methods = [m for m in METHOD_TERMS if re.search(r"\b" + re.escape(m) + r"\b", text)]
+        method_words = {w for m in methods for w in self._terms(m)}
+
+        # Abstract terms by frequency; title words count double, method words are left to the method query
+        counts = Counter(self._terms(abstract)) + Counter(self._terms(title)) + Counter(self._terms(title))
+        concepts = [w for w, _ in counts.most_common() if w not in method_words]
+        if concepts:
+            queries.append(" ".join(concepts[:self.CONCEPT_TERMS]))
+        if methods:
+            queries.append(" ".join(methods[:2] + concepts[:3]))
+
+        return [q for q in dict.fromkeys(q.strip() for q in queries) if q][:self.MAX_QUERIES]
+
+    def search_many(self, queries):
+        """Run all queries concurrently; merged papers deduplicated by paperId (or title).
+
+        Cache hits return at once; misses still share SEMANTIC_SCHOLAR_RPS, so at the
+        default 1/s three uncached queries take about 3 s however they are scheduled.
+        """
+        if len(queries) > 1:
+            with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+                result_lists = list(pool.map(lambda q: self.search_papers(q, limit=self.RESULTS_PER_QUERY), queries))
+        else:
+            result_lists = [self.search_papers(q, limit=self.RESULTS_PER_QUERY) for q in queries]
+
+        merged = {}
+        for papers in result_lists:
+            for paper in papers:
+                if not paper.get("title"):
                     continue
+                key = paper.get("paperId") or re.sub(r"\W+", " ", paper["title"].lower()).strip()
+                if key in merged:
+                    merged[key]["query_hits"] += 1
+                else:
+                    merged[key] = dict(paper, query_hits=1)
+        return list(merged.values())
+
+    def rerank(self, papers, title, abstract):
+        """Order by term overlap with the paper, then citation count and how many queries found it"""
+        paper_terms = set(self._terms(f"{title} {abstract}"))
+        max_citations = max((p.get("citationCount") or 0 for p in papers), default=0)
+
+        def score(paper):
+            terms = set(self._terms(f"{paper.get('title', '')} {paper.get('abstract') or ''}"))
+            overlap = len(terms & paper_terms) / len(paper_terms) if paper_terms else 0.0
+            citations = math.log1p(paper.get("citationCount") or 0) / math.log1p(max_citations) if max_citations else 0.0
+            return 0.6 * overlap + 0.3 * citations + 0.1 * min(paper["query_hits"] - 1, 2) / 2
+
+        return sorted(papers, key=score, reverse=True)
+
+    def enrich(self, papers):
+        """Venue and TLDR for the top papers in one POST /paper/batch; papers without an ID are kept as-is"""
+        ids = [p["paperId"] for p in papers if p.get("paperId")]
+        details = self.scholar.get_papers(ids, fields=DETAIL_FIELDS) if ids else {}
+        enriched = []
+        for paper in papers:
+            detail = details.get(paper.get("paperId"))
+            if detail:
+                paper = dict(paper, **{k: v for k, v in detail.items() if v is not None})
+            enriched.append(paper)
+        return enriched
+
+    @staticmethod
+    def _summary(paper):
+        """Abstract if Semantic Scholar has one, else its TLDR"""
+        if paper.get("abstract"):
+            return paper["abstract"]
+        tldr = paper.get("tldr")
+        return (tldr.get("text") if isinstance(tldr, dict) else None) or "Not available"
 
-                response.raise_for_status()
-                data = response.json()
-                return data.get("data", [])
-            except requests.exceptions.HTTPError as e:
-                if "429" not in str(e):
-                    print(f"⚠️  Semantic Scholar API error: {e}")
-                    return []
-            except Exception as e:
-                print(f"⚠️  Semantic Scholar API error: {e}")
-                return []
-
-        print("⚠️  Semantic Scholar API: rate limit exceeded after retries")
-        return []
-    
     def analyze(self, paper_title, paper_abstract, search_query=None):
         """Analyze citations and related work"""
         
         print("🔗 Agent 3 (Citation Hunter) searching literature...\n")
         
-        # Search for related papers
-        if search_query is None:
-            search_query = paper_title
-        
-        related_papers = self.search_papers(search_query)
+        # Search for related papers: several queries in parallel, merged and reranked locally
+        queries = [search_query] if search_query else self.build_queries(paper_title, paper_abstract)
+        print(f"   Queries: {queries}")
+        candidates = self.search_many(queries)
+        related_papers = self.enrich(self.rerank(candidates, paper_title, paper_abstract)[:self.TOP_PAPERS])
         
         if not related_papers:
             print("⚠️  No related papers found\n")
@@ -134,15 +207,16 @@ Return JSON:
                 "citation_context": "Could not retrieve related literature"
             }
         
-        print(f"✅ Found {len(related_papers)} related papers\n")
+        print(f"✅ Found {len(candidates)} related papers, top {len(related_papers)} after reranking\n")
         
         # Format related papers for LLM
         related_text = "\n\n".join([
             f"Title: {p['title']}\n"
             f"Year: {p.get('year', 'N/A')}\n"
+            f"Venue: {p.get('venue') or 'N/A'}\n"
             f"Citations: {p.get('citationCount', 0)}\n"
-            f"Abstract: {(p.get('abstract') or 'Not available')[:300]}..."
-            for p in related_papers[:8]  # Top 8
+            f"Abstract: {self._summary(p)[:300]}..."
+            for p in related_papers
         ])
         
         # LLM analyzes relationships
@@ -1,9 +1,10 @@
-from openai import AzureOpenAI
+from core.llm_client import create_llm_client
+from core.openalex_cache import get_openalex_cache
+from core.openalex_client import openalex_get, openalex_map, openalex_request
+from agents.similar_works import SimilarWorksFinder
 from dotenv import load_dotenv
 import os
 import json
-import requests
-import time
 
 load_dotenv()
 
@@ -11,15 +12,9 @@ load_dotenv()
 class FundingAdvisor:
     """Agent 6: Identifies funding sources for research using OpenAlex data"""
 
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION")
-        )
+    def __init__(self, client=None):
+        self.client = client or create_llm_client()
         self.model = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        self.openalex_base = "https://api.openalex.org"
-        self.openalex_email = os.getenv("OPENALEX_EMAIL", "")
 
         self.system_prompt = """You are an academic funding advisor who helps researchers identify
 suitable grants, funding programs, and sponsors for their research.
@@ -68,72 +63,23 @@ IMPORTANT:
     # --- OpenAlex API Methods ---
 
     def _openalex_request(self, endpoint, params=None):
-        """Make OpenAlex API request with retry on 429"""
-        url = f"{self.openalex_base}{endpoint}"
-        if params is None:
-            params = {}
-        if self.openalex_email:
-            params["mailto"] = self.openalex_email
-
-        for attempt in range(3):
-            try:
-                response = requests.get(url, params=params, timeout=15)
-                if response.status_code == 200:
-                    return response.json()
-                elif response.status_code == 429:
-                    wait = 2 ** (attempt + 1)
-                    print(f"   ⚠️  Rate limited, waiting {wait}s...")
-                    time.sleep(wait)
-                else:
-                    return None
-            except requests.exceptions.RequestException:
-                time.sleep(1)
-        return None
-
-    def _search_works_for_funders(self, query, per_page=50):
-        """Search OpenAlex works and extract funder information"""
-        data = self._openalex_request("/works", params={
-            "search": query,
-            "per_page": per_page,
-            "select": "id,display_name,funders,publication_year"
-        })
-
-        if not data or "results" not in data:
-            return {}, 0, 0
-
-        funder_counts = {}
-        total_works = len(data["results"])
-        funded_works = 0
-
-        for work in data["results"]:
-            funders = work.get("funders", [])
-            if funders:
-                funded_works += 1
-                for funder in funders:
-                    fid = funder.get("id")
-                    if fid:
-                        if fid not in funder_counts:
-                            funder_counts[fid] = {
-                                "id": fid,
-                                "name": funder.get("display_name", "Unknown"),
-                                "count": 0
-                            }
-                        funder_counts[fid]["count"] += 1
-
-        return funder_counts, total_works, funded_works
-
-    def _get_funder_details(self, funder_id):
-        """Get detailed funder information from OpenAlex"""
-        # Extract the ID part (F-prefixed)
-        if "openalex.org/" in funder_id:
-            short_id = funder_id.split("/")[-1]
-        else:
-            short_id = funder_id
-
-        data = self._openalex_request(f"/funders/{short_id}")
-        if not data:
-            return None
-
+        """OpenAlex JSON for endpoint + params, served from the shared disk cache when fresh"""
+        return openalex_request(endpoint, params)
+
+    def _get_funders_details(self, funder_ids):
+        """Funder details for many funders at once (bulk openalex_id filter, cache-aware).
+
+        Returns {funder_id: details} for the funders OpenAlex returned.
+        """
+        entities = get_openalex_cache().get_many("funders", funder_ids, {}, openalex_get)
+        details = {}
+        for funder_id in funder_ids:
+            data = entities.get(funder_id.split("/")[-1])
+            if data:
+                details[funder_id] = self._parse_funder(data)
+        return details
+
+    def _parse_funder(self, data):
         summary = data.get("summary_stats", {})
 
         return {
@@ -184,39 +130,6 @@ IMPORTANT:
         total = data.get("meta", {}).get("count", 0)
         return awards, total
 
-    def _extract_search_queries(self, title, abstract):
-        """Use LLM to generate search queries for finding similar funded research"""
-        prompt = f"""Paper Title: {title}
-
-Abstract: {abstract[:2000]}
-
-Generate exactly 3 search queries to find similar research papers in OpenAlex.
-Each query should capture a different angle:
-1. Core research topic
-2. Methodology or approach
-3. Specific application or niche
-
-Return JSON:
-{{
-    "queries": ["query1", "query2", "query3"]
-}}"""
-
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "Generate concise academic search queries. Each query should be 3-6 words."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3
-            )
-            result = json.loads(response.choices[0].message.content)
-            return result.get("queries", [title.split()[:5]])[:3]
-        except Exception as e:
-            print(f"   ⚠️  Query extraction failed: {e}")
-            return [" ".join(title.split()[:5])]
-
     def _rank_funders(self, title, abstract, paper_type, funder_details, stats):
         """Use LLM to rank and enrich funder recommendations"""
         funders_text = json.dumps(funder_details, indent=2, ensure_ascii=False)
@@ -267,35 +180,22 @@ Be honest: if the funding data coverage is low, say so."""
 
     # --- Main Method ---
 
-    def analyze(self, paper_title, paper_abstract, paper_type="original_research"):
-        """Analyze funding landscape for a research paper"""
-
-        print("💰 Agent 6 (Funding Advisor) searching funding sources...\n")
+    def analyze(self, paper_title, paper_abstract, paper_type="original_research", similar_works=None):
+        """Analyze funding landscape for a research paper.
 
-        # Step 1: Extract search queries
-        print("   Generating search queries...")
-        queries = self._extract_search_queries(paper_title, paper_abstract)
-        print(f"   Queries: {queries}\n")
+        similar_works is the SimilarWorksFinder result shared with the Journal
+        Recommender (searched here if None).
+        """
 
-        # Step 2: Search OpenAlex for similar works → extract funders
-        print("   Searching OpenAlex for similar funded papers...")
-        all_funders = {}
-        total_works = 0
-        total_funded = 0
-
-        for i, query in enumerate(queries):
-            print(f"   [{i+1}/3] Searching: '{query}'")
-            funder_counts, works, funded = self._search_works_for_funders(query, per_page=50)
-
-            total_works += works
-            total_funded += funded
+        print("💰 Agent 6 (Funding Advisor) searching funding sources...\n")
 
-            for fid, info in funder_counts.items():
-                if fid in all_funders:
-                    all_funders[fid]["count"] += info["count"]
-                else:
-                    all_funders[fid] = info.copy()
-            time.sleep(0.2)
+        # Step 1 + 2: Similar works in OpenAlex → funders
+        if similar_works is None:
+            similar_works = SimilarWorksFinder(self.client).search(paper_title, paper_abstract)
+        queries = similar_works["queries"]
+        all_funders = {fid: info.copy() for fid, info in similar_works["funder_counts"].items()}
+        total_works = similar_works["total_works"]
+        total_funded = similar_works["funded_works"]
 
         funding_rate = total_funded / total_works if total_works > 0 else 0
         print(f"\n   Found {len(all_funders)} unique funders across {total_funded}/{total_works} funded papers ({funding_rate:.0%})\n")
@@ -316,21 +216,19 @@ Be honest: if the funding data coverage is low, say so."""
 
         # Step 4: Fetch detailed funder info
         print(f"\n   Fetching details for top {len(top_funders)} funders...")
-        funder_details = []
-
-        for funder in top_funders:
-            details = self._get_funder_details(funder["id"])
-            if details:
-                details["similar_papers_funded"] = funder["count"]
+        details_by_id = self._get_funders_details([f["id"] for f in top_funders])
+        found = [(funder, details_by_id[funder["id"]]) for funder in top_funders if funder["id"] in details_by_id]
 
-                # Try to get sample awards with amounts
-                awards, awards_total = self._get_sample_awards(funder["id"], max_results=3)
-                if awards:
-                    details["sample_awards"] = awards
-                    details["total_awards_with_amount"] = awards_total
+        # Sample awards with amounts, fetched concurrently within the shared OpenAlex budget
+        award_lookups = openalex_map(lambda pair: self._get_sample_awards(pair[0]["id"], max_results=3), found)
 
-                funder_details.append(details)
-            time.sleep(0.15)
+        funder_details = []
+        for (funder, details), (awards, awards_total) in zip(found, award_lookups):
+            details["similar_papers_funded"] = funder["count"]
+            if awards:
+                details["sample_awards"] = awards
+                details["total_awards_with_amount"] = awards_total
+            funder_details.append(details)
 
         print(f"   Retrieved details for {len(funder_details)} funders\n")
 
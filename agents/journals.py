@@ -1,9 +1,10 @@
-from openai import AzureOpenAI
+from core.llm_client import create_llm_client
+from core.openalex_cache import SOURCE_SELECT, get_openalex_cache
+from core.openalex_client import openalex_get, openalex_map, openalex_request
+from agents.similar_works import SimilarWorksFinder
 from dotenv import load_dotenv
 import os
 import json
-import requests
-import time
 
 load_dotenv()
 
@@ -11,30 +12,9 @@ load_dotenv()
 class JournalRecommender:
     """Agent 5: Recommends journals for paper submission using OpenAlex data"""
 
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION")
-        )
+    def __init__(self, client=None):
+        self.client = client or create_llm_client()
         self.model = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-        self.openalex_base = "https://api.openalex.org"
-        self.openalex_email = os.getenv("OPENALEX_EMAIL", "")
-
-        self.query_extraction_prompt = """You are an expert at identifying search queries for academic literature databases.
-
-Given a paper's title and abstract, generate exactly 3 search queries that would find similar papers published in the same types of journals. Each query should capture a different angle:
-
-1. **Topic query**: The core subject/domain (e.g., "mindfulness meditation anxiety treatment")
-2. **Method query**: The methodology or approach used (e.g., "randomized controlled trial depression intervention")
-3. **Niche query**: A specific, narrow aspect unique to this paper (e.g., "8-week MBSR program clinical outcomes")
-
-Each query should be 3-6 words. Do NOT use boolean operators. Keep them suitable for the OpenAlex works search API.
-
-Return JSON:
-{
-    "queries": ["query1", "query2", "query3"]
-}"""
 
         self.system_prompt = """You are a journal selection advisor for academic researchers.
 
@@ -94,86 +74,25 @@ Return JSON:
     # --- OpenAlex API Methods ---
 
     def _openalex_request(self, endpoint, params=None):
-        """Make a request to OpenAlex API with retry on rate limit"""
-        url = f"{self.openalex_base}{endpoint}"
-
-        if params is None:
-            params = {}
-
-        if self.openalex_email:
-            params["mailto"] = self.openalex_email
-
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = requests.get(url, params=params, timeout=15)
-
-                if response.status_code == 429:
-                    wait_time = 2 ** (attempt + 1)
-                    print(f"   ⚠️  Rate limited by OpenAlex, retrying in {wait_time}s... ({attempt + 1}/{max_retries})")
-                    time.sleep(wait_time)
-                    continue
-
-                response.raise_for_status()
-                return response.json()
-
-            except requests.exceptions.HTTPError as e:
-                if "429" not in str(e):
-                    print(f"   ⚠️  OpenAlex API error: {e}")
-                    return None
-            except Exception as e:
-                print(f"   ⚠️  OpenAlex API error: {e}")
-                return None
-
-        print("   ⚠️  OpenAlex API: rate limit exceeded after retries")
-        return None
-
-    def _search_works(self, query, per_page=50):
-        """Search OpenAlex for works matching query, return source IDs with counts"""
-        data = self._openalex_request("/works", params={
-            "search": query,
-            "per_page": per_page,
-            "select": "id,display_name,primary_location"
-        })
+        """OpenAlex JSON for endpoint + params, served from the shared disk cache when fresh"""
+        return openalex_request(endpoint, params)
 
-        if not data or "results" not in data:
-            return {}
-
-        source_counts = {}
-        for work in data["results"]:
-            primary_loc = work.get("primary_location")
-            if not primary_loc:
-                continue
-            source = primary_loc.get("source")
-            if not source or not source.get("id"):
-                continue
-
-            source_id = source["id"]
-            source_name = source.get("display_name", "Unknown")
-
-            if source_id not in source_counts:
-                source_counts[source_id] = {
-                    "id": source_id,
-                    "name": source_name,
-                    "count": 0
-                }
-            source_counts[source_id]["count"] += 1
-
-        return source_counts
-
-    def _get_source_details(self, source_id):
-        """Fetch detailed journal/source info from OpenAlex"""
-        short_id = source_id.split("/")[-1]
-
-        data = self._openalex_request(f"/sources/{short_id}", params={
-            "select": "id,display_name,host_organization_name,issn,is_oa,"
-                      "apc_usd,homepage_url,summary_stats,works_count,"
-                      "cited_by_count,type"
-        })
-
-        if not data:
-            return None
+    def _get_sources_details(self, source_ids):
+        """Journal details for many sources at once (bulk openalex_id filter, cache-aware).
 
+        Returns {source_id: details} for the sources OpenAlex returned.
+        """
+        entities = get_openalex_cache().get_many(
+            "sources", source_ids, {"select": SOURCE_SELECT}, openalex_get
+        )
+        details = {}
+        for source_id in source_ids:
+            data = entities.get(source_id.split("/")[-1])
+            if data:
+                details[source_id] = self._parse_source(data)
+        return details
+
+    def _parse_source(self, data):
         summary = data.get("summary_stats", {})
 
         return {
@@ -195,9 +114,7 @@ Return JSON:
         data = self._openalex_request("/sources", params={
             "search": journal_name,
             "per_page": 3,
-            "select": "id,display_name,host_organization_name,issn,is_oa,"
-                      "apc_usd,homepage_url,summary_stats,works_count,"
-                      "cited_by_count,type"
+            "select": SOURCE_SELECT
         })
 
         if not data or "results" not in data or not data["results"]:
@@ -267,30 +184,6 @@ Return JSON:
 
     # --- Core Methods ---
 
-    def _extract_search_queries(self, title, abstract):
-        """Use LLM to extract 3 search queries from paper title + abstract"""
-        prompt = f"""Paper Title: {title}
-
-Abstract: {abstract[:2000]}
-
-Generate 3 search queries to find similar papers in academic databases."""
-
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": self.query_extraction_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.4
-            )
-            result = json.loads(response.choices[0].message.content)
-            return result.get("queries", [title])[:3]
-        except Exception as e:
-            print(f"   ⚠️  Query extraction failed: {e}")
-            return [" ".join(title.split()[:5])]
-
     def _rank_journals(self, title, abstract, paper_type, methods_quality,
                        evidence_strength, journal_details):
         """Use LLM to rank and recommend journals based on collected data"""
@@ -400,31 +293,25 @@ Provide your ranked recommendations."""
             "recommendation_confidence": "low"
         }
 
-    # --- Main Method ---
+    # --- Main Methods ---
 
-    def analyze(self, paper_title, paper_abstract, paper_type="original_research",
-                methods_quality=None, evidence_strength=None):
-        """Recommend journals for paper submission"""
+    def gather_candidates(self, paper_title, paper_abstract, similar_works=None):
+        """Collect candidate journals from OpenAlex + LLM suggestions.
+
+        Needs only title and abstract, so it can run alongside the other agents;
+        only recommend() has to wait for methodology/results. similar_works is the
+        SimilarWorksFinder result shared with the Funding Advisor (searched here if None).
+        """
 
         print("📚 Agent 5 (Journal Recommender) searching journals...\n")
 
-        # Step 1: Extract search queries via LLM
-        print("   Generating search queries...")
-        queries = self._extract_search_queries(paper_title, paper_abstract)
-        print(f"   Queries: {queries}\n")
-
-        # Step 2a: Search OpenAlex for similar works (frequency-based)
-        print("   Searching OpenAlex for similar papers...")
-        all_sources = {}
-        for i, query in enumerate(queries):
-            print(f"   [{i+1}/3] Searching: '{query}'")
-            source_counts = self._search_works(query, per_page=50)
-            for sid, info in source_counts.items():
-                if sid in all_sources:
-                    all_sources[sid]["count"] += info["count"]
-                else:
-                    all_sources[sid] = info.copy()
-            time.sleep(0.2)
+        # Step 1 + 2a: Similar works in OpenAlex (frequency-based)
+        if similar_works is None:
+            similar_works = SimilarWorksFinder(self.client).search(paper_title, paper_abstract)
+        queries = similar_works["queries"]
+        all_sources = {sid: info.copy() for sid, info in similar_works["source_counts"].items()}
+
+        candidates = {"queries": queries, "journal_details": []}
 
         # Step 2b: LLM suggests field-specific journals → verify in OpenAlex
         print("\n   Asking LLM for field-specific journal suggestions...")
@@ -432,8 +319,7 @@ Provide your ranked recommendations."""
         llm_journals = {}
         if suggested_names:
             print(f"   LLM suggested: {suggested_names}")
-            for name in suggested_names:
-                source = self._search_source_by_name(name)
+            for source in openalex_map(self._search_source_by_name, suggested_names):
                 if source and source.get("id"):
                     sid = source["id"]
                     if sid not in all_sources and sid not in llm_journals:
@@ -443,13 +329,11 @@ Provide your ranked recommendations."""
                             "count": 0,
                             "llm_suggested": True
                         }
-                time.sleep(0.15)
             print(f"   Verified {len(llm_journals)} new journals in OpenAlex\n")
 
         if not all_sources and not llm_journals:
-            print("   ⚠️  No journals found, falling back to LLM-only...\n")
-            return self._llm_only_fallback(paper_title, paper_abstract, paper_type,
-                                           methods_quality, evidence_strength)
+            print("   ⚠️  No journals found in OpenAlex\n")
+            return candidates
 
         # Step 3: Fetch details for top frequency-based + all LLM-suggested
         sorted_sources = sorted(all_sources.values(), key=lambda x: x["count"], reverse=True)
@@ -462,34 +346,45 @@ Provide your ranked recommendations."""
                 sources_to_fetch[sid] = info
         print(f"   Fetching details for {len(sources_to_fetch)} journals ({len(top_freq_sources)} frequency + {len(llm_journals)} LLM-suggested)...")
 
-        # Step 4: Fetch journal details + compute composite score
+        # Step 4: Fetch journal details in bulk + compute composite score
+        details_by_id = self._get_sources_details(list(sources_to_fetch))
         journal_details = []
         for source in sources_to_fetch.values():
-            details = self._get_source_details(source["id"])
+            details = details_by_id.get(source["id"])
             if details:
                 details["similar_papers_found"] = source.get("count", 0)
                 details["source"] = "llm_suggested" if source.get("llm_suggested") else "frequency"
                 details["relevance_score"] = self._compute_relevance_score(details)
                 journal_details.append(details)
-            time.sleep(0.15)
 
         if not journal_details:
-            print("   ⚠️  Could not fetch journal details, falling back to LLM-only...\n")
-            return self._llm_only_fallback(paper_title, paper_abstract, paper_type,
-                                           methods_quality, evidence_strength)
+            print("   ⚠️  Could not fetch journal details\n")
+            return candidates
 
         # Sort by composite relevance score (impact + h-index + frequency)
         journal_details.sort(key=lambda x: x["relevance_score"], reverse=True)
-        journal_details = journal_details[:20]  # Top 20 for LLM ranking
+        candidates["journal_details"] = journal_details[:20]  # Top 20 for LLM ranking
+
+        print(f"   Retrieved details for {len(candidates['journal_details'])} journals (sorted by relevance score)\n")
+        return candidates
+
+    def recommend(self, candidates, paper_title, paper_abstract, paper_type="original_research",
+                  methods_quality=None, evidence_strength=None):
+        """Rank gathered candidates using the paper's quality context"""
+
+        if not candidates or not candidates.get("journal_details"):
+            print("   ⚠️  No journal candidates available, falling back to LLM-only...\n")
+            return self._llm_only_fallback(paper_title, paper_abstract, paper_type,
+                                           methods_quality, evidence_strength)
 
-        print(f"   Retrieved details for {len(journal_details)} journals (sorted by relevance score)\n")
+        journal_details = candidates["journal_details"]
 
         # Step 5: LLM-powered personalized ranking
-        print("   Generating personalized recommendations...")
+        print("   Generating personalized journal recommendations...")
         result = self._rank_journals(paper_title, paper_abstract, paper_type,
                                      methods_quality, evidence_strength, journal_details)
 
-        result["search_queries_used"] = queries
+        result["search_queries_used"] = candidates.get("queries", [])
         result["journals_found"] = len(journal_details)
 
         print(f"\n✅ Primary recommendations: {len(result.get('primary_recommendations', []))}")
@@ -498,6 +393,13 @@ Provide your ranked recommendations."""
 
         return result
 
+    def analyze(self, paper_title, paper_abstract, paper_type="original_research",
+                methods_quality=None, evidence_strength=None):
+        """Recommend journals for paper submission"""
+        candidates = self.gather_candidates(paper_title, paper_abstract)
+        return self.recommend(candidates, paper_title, paper_abstract, paper_type,
+                              methods_quality, evidence_strength)
+
 
 # Test
 if __name__ == "__main__":
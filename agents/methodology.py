@@ -1,4 +1,5 @@
-from openai import AzureOpenAI
+from core.llm_client import create_llm_client
+from core.text_windows import truncate_text
 from dotenv import load_dotenv
 import os
 import json
@@ -9,12 +10,13 @@ load_dotenv()
 class MethodologyCritic:
     """Agent 1: Analyzes research methodology"""
 
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION")
-        )
+    # Sections are sliced from the full text, so on long papers one can run to
+    # hundreds of pages; these caps keep the prompt inside the context window
+    MAX_METHODS_CHARS = int(os.getenv("METHODOLOGY_MAX_METHODS_CHARS", "60000"))
+    MAX_CONTEXT_CHARS = int(os.getenv("METHODOLOGY_MAX_CONTEXT_CHARS", "20000"))
+
+    def __init__(self, client=None):
+        self.client = client or create_llm_client()
         self.model = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
         
         self.system_prompt = """You are a research methodology expert.
@@ -87,11 +89,15 @@ Return JSON:
 
         print("🔬 Agent 1 (Methodology Critic) analyzing...\n")
 
-        user_content = f"## Methods Section\n\n{methods_text}"
+        if len(methods_text) > self.MAX_METHODS_CHARS:
+            print(f"⚠️  Methods section has {len(methods_text)} chars, analyzing the first {self.MAX_METHODS_CHARS}")
+        user_content = f"## Methods Section\n\n{truncate_text(methods_text, self.MAX_METHODS_CHARS)}"
         if abstract:
-            user_content += f"\n\n## Abstract (additional context)\n\n{abstract}"
+            user_content += f"\n\n## Abstract (additional context)\n\n{truncate_text(abstract, self.MAX_CONTEXT_CHARS)}"
         if results_text:
-            user_content += f"\n\n## Results Section (additional context)\n\n{results_text}"
+            # Context only: sample sizes and designs are usually restated early in Results
+            user_content += (f"\n\n## Results Section (additional context)\n\n"
+                             f"{truncate_text(results_text, self.MAX_CONTEXT_CHARS)}")
 
         response = self.client.chat.completions.create(
             model=self.model,
@@ -1,5 +1,8 @@
-from openai import AzureOpenAI
+from core.llm_client import create_llm_client
+from core.text_windows import split_windows
+from core.fingerprint_index import get_fingerprint_index
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 import os
 import json
 import re
@@ -10,12 +13,20 @@ load_dotenv()
 class PlagiarismDetector:
     """Agent 4: Detects potential plagiarism and missing citations"""
 
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION")
-        )
+    # Papers longer than one window are analyzed window by window and merged
+    WINDOW_CHARS = int(os.getenv("PLAGIARISM_WINDOW_CHARS", "50000"))
+    WINDOW_OVERLAP = int(os.getenv("PLAGIARISM_WINDOW_OVERLAP", "2000"))
+    MAX_CONCURRENT_WINDOWS = int(os.getenv("PLAGIARISM_MAX_CONCURRENT_WINDOWS", "4"))
+    # Local fingerprint index of a reference corpus (core/fingerprint_index.py)
+    INDEX_ENABLED = os.getenv("PLAGIARISM_INDEX_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+    # Also index every analyzed paper, so later submissions are checked against it
+    INDEX_ADD_ANALYZED = os.getenv("PLAGIARISM_INDEX_ADD_ANALYZED", "0").lower() in ("1", "true", "yes", "on")
+    INDEX_MIN_COVERAGE = float(os.getenv("PLAGIARISM_INDEX_MIN_COVERAGE", "0.5"))
+    # Matches quoted in the prompt per window
+    MAX_PROMPT_MATCHES = 15
+
+    def __init__(self, client=None):
+        self.client = client or create_llm_client()
         self.model = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
 
         self.system_prompt_original = """You are a plagiarism detection expert.
@@ -119,8 +130,87 @@ Return JSON:
         sentences = re.split(r'[.!?]+', text)
         return [s.strip() for s in sentences if len(s.strip()) > 20]
 
-    def analyze(self, paper_text, paper_type="original_research"):
-        """Analyze for plagiarism indicators"""
+    def _corpus_matches(self, paper_text, title=None, source=None):
+        """Sentences overlapping the local fingerprint index ([] if disabled or unavailable)"""
+        if not self.INDEX_ENABLED:
+            return []
+        try:
+            return get_fingerprint_index().find_matches(paper_text, min_coverage=self.INDEX_MIN_COVERAGE,
+                                                        title=title, source=source)
+        except Exception as e:
+            print(f"⚠️  Fingerprint index lookup failed: {e}")
+            return []
+
+    def _add_to_index(self, paper_text, title, source):
+        if not (self.INDEX_ENABLED and self.INDEX_ADD_ANALYZED):
+            return
+        try:
+            get_fingerprint_index().add(paper_text, title=title, source=source)
+        except Exception as e:
+            print(f"⚠️  Could not add paper to fingerprint index: {e}")
+
+    def _matches_prompt(self, matches):
+        lines = [f'- "{m["matched_text"][:300]}" ({m["coverage"]:.0%} of the sentence) '
+                 f'matches: {m.get("title") or m.get("source") or "an indexed document"}'
+                 for m in matches[:self.MAX_PROMPT_MATCHES]]
+        return ("\n\nVERBATIM OVERLAP FOUND IN OUR LOCAL CORPUS (fingerprint search; the excerpts are "
+                "certain matches, judge whether they are quoted and cited):\n" + "\n".join(lines))
+
+    def _analyze_window(self, system_prompt, text, matches=()):
+        content = f"Analyze this text:\n\n{text}"
+        if matches:
+            content += self._matches_prompt(matches)
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": content}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.3
+        )
+        return json.loads(response.choices[0].message.content)
+
+    def _merge_window_results(self, window_results):
+        """Combine per-window results: the riskiest window sets score and level, findings are pooled"""
+        worst = max(window_results, key=lambda r: r.get("plagiarism_risk_score", 0))
+        merged = {
+            "plagiarism_risk_score": worst.get("plagiarism_risk_score", 0),
+            "risk_level": worst.get("risk_level", "low"),
+            "missing_citations": [],
+            "suspicious_sections": [],
+            "writing_quality_flags": [],
+            "overall_assessment": worst.get("overall_assessment", ""),
+            "recommendations": []
+        }
+
+        # Overlapping windows can report the same excerpt twice
+        for key, identity in (("missing_citations", "text"), ("suspicious_sections", "text"),
+                              ("writing_quality_flags", "issue")):
+            seen = set()
+            for result in window_results:
+                for item in result.get(key, []):
+                    marker = str(item.get(identity, "")).strip().lower() if isinstance(item, dict) else str(item)
+                    if marker not in seen:
+                        seen.add(marker)
+                        merged[key].append(item)
+
+        for result in window_results:
+            for rec in result.get("recommendations", []):
+                if rec not in merged["recommendations"]:
+                    merged["recommendations"].append(rec)
+
+        merged["overall_assessment"] += f" (Long paper analyzed in {len(window_results)} parts.)"
+        return merged
+
+    def analyze(self, paper_text, paper_type="original_research", title=None, source=None):
+        """Analyze for plagiarism indicators.
+
+        Sentences are first looked up in the local fingerprint index; matches go into
+        the prompt and into result["corpus_matches"]. Indexed documents with the same
+        title or source are skipped. With PLAGIARISM_INDEX_ADD_ANALYZED the paper is
+        then added to the index (title/source label it in later reports).
+        """
 
         print("🚨 Agent 4 (Plagiarism Detector) analyzing...\n")
 
@@ -128,6 +218,11 @@ Return JSON:
         sentences = self.split_sentences(paper_text)
         print(f"✅ Analyzing {len(sentences)} sentences\n")
 
+        matches = self._corpus_matches(paper_text, title, source)
+        if matches:
+            sources = {m["doc_id"] for m in matches}
+            print(f"   Local corpus: {len(matches)} sentences overlap {len(sources)} indexed documents")
+
         # Select prompt based on paper type
         if paper_type in ("review", "meta_analysis"):
             system_prompt = self.system_prompt_review
@@ -135,25 +230,34 @@ Return JSON:
         else:
             system_prompt = self.system_prompt_original
 
-        # Send up to 50k chars (GPT-4o has 128k context)
-        analysis_text = paper_text[:50000]
-
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Analyze this text:\n\n{analysis_text}"}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.3
-        )
+        # Up to 50k chars per request (GPT-4o has 128k context); longer papers are
+        # split into overlapping windows analyzed concurrently, then merged
+        windows = split_windows(paper_text, self.WINDOW_CHARS, self.WINDOW_OVERLAP)
+        if len(windows) == 1:
+            result = self._analyze_window(system_prompt, paper_text, matches)
+        else:
+            print(f"   Long paper: analyzing {len(windows)} overlapping windows "
+                  f"(up to {self.MAX_CONCURRENT_WINDOWS} at a time)")
+            with ThreadPoolExecutor(max_workers=min(len(windows), self.MAX_CONCURRENT_WINDOWS)) as executor:
+                window_results = list(executor.map(
+                    lambda window: self._analyze_window(
+                        system_prompt, window[1],
+                        [m for m in matches if window[0] <= m["start"] < window[0] + len(window[1])]
+                    ),
+                    windows
+                ))
+            result = self._merge_window_results(window_results)
 
-        result = json.loads(response.choices[0].message.content)
+        result["corpus_matches"] = [
+            {key: m[key] for key in ("matched_text", "coverage", "title", "source")} for m in matches
+        ]
+        self._add_to_index(paper_text, title, source)
 
         print(f"✅ Risk Score: {result['plagiarism_risk_score']}/100")
         print(f"✅ Risk Level: {result['risk_level']}")
         print(f"✅ Missing Citations: {len(result['missing_citations'])}")
-        print(f"✅ Suspicious Sections: {len(result['suspicious_sections'])}\n")
+        print(f"✅ Suspicious Sections: {len(result['suspicious_sections'])}")
+        print(f"✅ Local Corpus Matches: {len(result['corpus_matches'])}\n")
 
         return result
 
@@ -1,4 +1,5 @@
-from openai import AzureOpenAI
+from core.llm_client import create_llm_client
+from core.text_windows import truncate_text
 from dotenv import load_dotenv
 import os
 import json
@@ -9,12 +10,12 @@ load_dotenv()
 class ResultsSynthesizer:
     """Agent 2: Extracts and synthesizes key findings"""
 
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION")
-        )
+    # Sections are sliced from the full text, so on long papers Results can run on
+    # through supplements; the cap keeps the prompt inside the context window
+    MAX_RESULTS_CHARS = int(os.getenv("RESULTS_MAX_CHARS", "60000"))
+
+    def __init__(self, client=None):
+        self.client = client or create_llm_client()
         self.model = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
         
         self.system_prompt = """You are a results analyst expert.
@@ -83,6 +84,10 @@ Return JSON:
         """Analyze results section"""
         
         print("📊 Agent 2 (Results Synthesizer) analyzing...\n")
+
+        if len(results_text) > self.MAX_RESULTS_CHARS:
+            print(f"⚠️  Results section has {len(results_text)} chars, analyzing the first {self.MAX_RESULTS_CHARS}")
+        results_text = truncate_text(results_text, self.MAX_RESULTS_CHARS)
         
         response = self.client.chat.completions.create(
             model=self.model,
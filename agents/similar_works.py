@@ -0,0 +1,139 @@
+from core.llm_client import create_llm_client
+from core.openalex_client import openalex_map, openalex_request
+from dotenv import load_dotenv
+import os
+import json
+
+load_dotenv()
+
+
+class SimilarWorksFinder:
+    """Shared stage: finds works similar to the paper in OpenAlex.
+
+    One LLM query extraction and one set of /works searches selecting both
+    primary_location and funders; the Journal Recommender aggregates the sources,
+    the Funding Advisor the funders.
+    """
+
+    WORKS_PER_QUERY = 50
+
+    def __init__(self, client=None):
+        self.client = client or create_llm_client()
+        self.model = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+
+        self.query_extraction_prompt = """You are an expert at identifying search queries for academic literature databases.
+
+Given a paper's title and abstract, generate exactly 3 search queries that would find similar papers (published in the same types of journals, funded by the same kinds of sponsors). Each query should capture a different angle:
+
+1. **Topic query**: The core subject/domain (e.g., "mindfulness meditation anxiety treatment")
+2. **Method query**: The methodology or approach used (e.g., "randomized controlled trial depression intervention")
+3. **Niche query**: A specific, narrow aspect unique to this paper (e.g., "8-week MBSR program clinical outcomes")
+
+Each query should be 3-6 words. Do NOT use boolean operators. Keep them suitable for the OpenAlex works search API.
+
+Return JSON:
+{
+    "queries": ["query1", "query2", "query3"]
+}"""
+
+    @staticmethod
+    def empty_result(queries=None):
+        return {
+            "queries": queries or [],
+            "source_counts": {},
+            "funder_counts": {},
+            "total_works": 0,
+            "funded_works": 0
+        }
+
+    def _extract_search_queries(self, title, abstract):
+        """Use LLM to extract 3 search queries from paper title + abstract"""
+        prompt = f"""Paper Title: {title}
+
+Abstract: {abstract[:2000]}
+
+Generate 3 search queries to find similar papers in academic databases."""
+
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": self.query_extraction_prompt},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.4
+            )
+            result = json.loads(response.choices[0].message.content)
+            return result.get("queries", [title])[:3]
+        except Exception as e:
+            print(f"   ⚠️  Query extraction failed: {e}")
+            return [" ".join(title.split()[:5])]
+
+    def _search_works(self, query, per_page=50):
+        """Search OpenAlex for works matching query (venue and funders selected)"""
+        data = openalex_request("/works", params={
+            "search": query,
+            "per_page": per_page,
+            "select": "id,display_name,primary_location,funders,publication_year"
+        })
+
+        if not data or "results" not in data:
+            return []
+        return data["results"]
+
+    @staticmethod
+    def _add_source(source_counts, work):
+        primary_loc = work.get("primary_location")
+        if not primary_loc:
+            return
+        source = primary_loc.get("source")
+        if not source or not source.get("id"):
+            return
+
+        source_id = source["id"]
+        if source_id not in source_counts:
+            source_counts[source_id] = {
+                "id": source_id,
+                "name": source.get("display_name", "Unknown"),
+                "count": 0
+            }
+        source_counts[source_id]["count"] += 1
+
+    @staticmethod
+    def _add_funders(funder_counts, work):
+        """Returns True if the work lists any funder"""
+        funders = work.get("funders", [])
+        for funder in funders:
+            fid = funder.get("id")
+            if fid:
+                if fid not in funder_counts:
+                    funder_counts[fid] = {
+                        "id": fid,
+                        "name": funder.get("display_name", "Unknown"),
+                        "count": 0
+                    }
+                funder_counts[fid]["count"] += 1
+        return bool(funders)
+
+    def search(self, paper_title, paper_abstract):
+        """Queries, per-source and per-funder counts over the similar works found"""
+
+        print("🔎 Searching OpenAlex for similar works (shared by Journal Recommender + Funding Advisor)...\n")
+        queries = self._extract_search_queries(paper_title, paper_abstract)
+        print(f"   Queries: {queries}\n")
+
+        print(f"   Searching {len(queries)} queries concurrently...")
+        searches = openalex_map(lambda query: self._search_works(query, per_page=self.WORKS_PER_QUERY), queries)
+
+        result = self.empty_result(queries)
+        for works in searches:
+            result["total_works"] += len(works)
+            for work in works:
+                self._add_source(result["source_counts"], work)
+                if self._add_funders(result["funder_counts"], work):
+                    result["funded_works"] += 1
+
+        print(f"\n   Similar works: {result['total_works']} found, {len(result['source_counts'])} journals, "
+              f"{len(result['funder_counts'])} funders\n")
+        return result
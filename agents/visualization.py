@@ -1,11 +1,16 @@
-from openai import AzureOpenAI
+from core.llm_client import create_llm_client
+from core.rate_limiter import IMAGE_TOKENS, image_tokens
 from dotenv import load_dotenv
 import os
 import json
 import base64
 import io
-import fitz  # PyMuPDF
+from core.chart_classifier import chart_score
+from core.document import PaperDocument
+from core.figure_cache import get_figure_cache, hash_distance, perceptual_hash
+from core.vector_figures import iter_vector_figures
 from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
 
 load_dotenv()
 
@@ -16,13 +21,23 @@ class DataVisualizationCritic:
     MAX_IMAGE_DIMENSION = 1024
     MIN_IMAGE_DIMENSION = 50
     MAX_FIGURES = 5
-
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION")
-        )
+    MAX_CONCURRENT_FIGURES = int(os.getenv("DATAVIZ_MAX_CONCURRENT_FIGURES", "3"))
+    # Figures whose perceptual hashes differ in at most this many of 64 bits count as the same image
+    DUPLICATE_MAX_DISTANCE = int(os.getenv("DATAVIZ_DUPLICATE_MAX_DISTANCE", "6"))
+    FIGURE_CACHE_ENABLED = os.getenv("DATAVIZ_FIGURE_CACHE_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+    # Chart-likeness (core/chart_classifier.py) ranks candidates when there are more than MAX_FIGURES.
+    # Only images below this floor are skipped outright: photos, text and equations score 0, while
+    # styled charts (ggplot grey panels, plots without axes) can score anywhere from ~0.01 to 0.3
+    CHART_MIN_SCORE = float(os.getenv("DATAVIZ_CHART_MIN_SCORE", "0.01"))
+    # Pack several figures into one vision request (one prompt, one round trip) up to an image-token budget
+    BATCH_FIGURES = os.getenv("DATAVIZ_BATCH_FIGURES", "0").lower() in ("1", "true", "yes", "on")
+    BATCH_IMAGE_TOKENS = int(os.getenv("DATAVIZ_BATCH_IMAGE_TOKENS", str(4 * IMAGE_TOKENS)))
+    BATCH_MAX_FIGURES = int(os.getenv("DATAVIZ_BATCH_MAX_FIGURES", "4"))
+    # Render charts drawn as PDF paths (no embedded bitmap) as well
+    VECTOR_FIGURES_ENABLED = os.getenv("DATAVIZ_VECTOR_FIGURES", "1").lower() not in ("0", "false", "no", "off")
+
+    def __init__(self, client=None):
+        self.client = client or create_llm_client()
         self.model = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
 
         self.figure_prompt = """You are an expert data visualization critic specializing in scientific figures.
@@ -148,96 +163,179 @@ Return valid JSON:
     "visualization_strategy": "..."
 }"""
 
-    # --- Image Extraction ---
+        self.batch_instructions = """
 
-    def _extract_figures(self, pdf_path):
-        """Extract figure images from PDF using PyMuPDF"""
-        figures = []
-        seen_xrefs = set()
+BATCHED FIGURES:
+You will receive several figures in one message, each introduced by a line "Figure N (page P)".
+Analyze every figure independently with the criteria above and return valid JSON of the form
+{"figures": [{"figure_number": N, ...one analysis object exactly as specified above...}, ...]}
+with exactly one entry per figure, in the order the figures were given."""
 
-        try:
-            doc = fitz.open(pdf_path)
-        except Exception as e:
-            print(f"   ⚠️  Could not open PDF for image extraction: {e}")
-            return figures
+    # --- Image Extraction ---
 
-        for page_num in range(len(doc)):
-            page = doc[page_num]
+    def _extract_figures(self, document):
+        """Extract figure images from the shared PaperDocument (PyMuPDF).
+
+        Embedded bitmaps come first; if fewer than MAX_FIGURES chart-like ones
+        were found, charts drawn as vector paths are rendered too
+        (core/vector_figures.py), one at a time and only until MAX_FIGURES
+        candidates are held. Every candidate gets a local chart-likeness
+        score (core/chart_classifier.py): near-certain non-charts (photos,
+        equation snippets, banners, text) are skipped, and beyond that the score
+        only ranks, so the MAX_FIGURES most chart-like ones are held at any time. Images perceptually the same as an
+        earlier one are collapsed. Returns (figures, duplicates, non_charts) with
+        figures in page order, holding resized image bytes (base64 is only built
+        per request).
+        """
+        if document.open_error:
+            print("   ⚠️  PDF could not be opened with PyMuPDF, no figures to extract")
+            return [], 0, 0
+
+        candidates = []
+        seen_hashes = []
+        counts = {"duplicate": 0, "non_chart": 0, "dropped": 0}
+
+        self._collect_candidates(candidates, seen_hashes, counts, self._raster_images(document))
+        if self.VECTOR_FIGURES_ENABLED and len(candidates) < self.MAX_FIGURES:
+            self._collect_candidates(candidates, seen_hashes, counts, self._vector_images(document), fill_only=True)
+
+        if counts["dropped"]:
+            print(f"   ℹ️  {len(candidates) + counts['dropped']} chart-like images, "
+                  f"kept the {self.MAX_FIGURES} most chart-like")
+        candidates.sort(key=lambda c: c["page"])
+        figures = [self._prepare_figure(candidate) for candidate in candidates]
+        return figures, counts["duplicate"], counts["non_chart"]
+
+    def _plausible_size(self, width, height):
+        # Filter tiny images (icons, logos) and extreme aspect ratios (line separators)
+        if width < self.MIN_IMAGE_DIMENSION or height < self.MIN_IMAGE_DIMENSION:
+            return False
+        return max(width, height) / max(min(width, height), 1) <= 10
+
+    def _raster_images(self, document):
+        """Yield (page, image_bytes, ext, width, height, xref, source) per embedded bitmap, lazily.
+
+        Size and aspect ratio are checked on the get_images() metadata, so icons
+        and rules are never extracted, and one image's bytes are held at a time.
+        """
+        seen_xrefs = set()
+        for page_num in range(document.page_count):
             try:
-                images = page.get_images(full=True)
+                images = document.page_images(page_num)
             except Exception:
                 continue
 
             for img_info in images:
-                xref = img_info[0]
+                # (xref, smask, width, height, bpc, colorspace, ...)
+                xref, width, height = img_info[0], img_info[2], img_info[3]
 
                 # Deduplicate
                 if xref in seen_xrefs:
                     continue
                 seen_xrefs.add(xref)
 
+                if not self._plausible_size(width, height):
+                    continue
                 try:
-                    img_data = doc.extract_image(xref)
-                    if not img_data:
-                        continue
-
-                    width = img_data.get("width", 0)
-                    height = img_data.get("height", 0)
-                    ext = img_data.get("ext", "png")
-                    image_bytes = img_data.get("image")
-
-                    if not image_bytes:
-                        continue
-
-                    # Filter tiny images (icons, logos)
-                    if width < self.MIN_IMAGE_DIMENSION or height < self.MIN_IMAGE_DIMENSION:
-                        continue
-
-                    # Filter extreme aspect ratios (line separators)
-                    aspect = max(width, height) / max(min(width, height), 1)
-                    if aspect > 10:
-                        continue
-
-                    # Resize if needed
-                    image_bytes, ext = self._resize_if_needed(image_bytes, ext)
-
-                    # Convert to base64
-                    b64_data = base64.b64encode(image_bytes).decode("utf-8")
-                    mime_type = f"image/{'jpeg' if ext in ('jpg', 'jpeg') else 'png'}"
-
-                    figures.append({
-                        "page": page_num + 1,
-                        "xref": xref,
-                        "base64_data": b64_data,
-                        "mime_type": mime_type,
-                        "width": width,
-                        "height": height
-                    })
-
-                    if len(figures) >= self.MAX_FIGURES:
-                        print(f"   ℹ️  Reached max figure limit ({self.MAX_FIGURES}), stopping extraction")
-                        doc.close()
-                        return figures
-
+                    img_data = document.extract_image(xref)
                 except Exception as e:
                     print(f"   ⚠️  Failed to extract image xref={xref}: {e}")
                     continue
+                if not img_data or not img_data.get("image"):
+                    continue
+                yield page_num + 1, img_data["image"], img_data.get("ext", "png"), width, height, xref, "raster"
 
-        doc.close()
-        return figures
+    def _vector_images(self, document):
+        """Yield rendered vector-drawn figures in the same shape as _raster_images(), rendered one at a time"""
+        rendered = 0
+        try:
+            for vector in iter_vector_figures(document, self.MAX_IMAGE_DIMENSION):
+                rendered += 1
+                yield vector["page"], vector["image"], vector["ext"], vector["width"], vector["height"], None, "vector"
+        except Exception as e:
+            print(f"   ⚠️  Vector figure detection failed: {e}")
+        finally:
+            if rendered:
+                print(f"   Rendered {rendered} vector-drawn figure regions")
+
+    def _collect_candidates(self, candidates, seen_hashes, counts, images, fill_only=False):
+        """Score images into candidates; with fill_only, stop (and stop rendering) once MAX_FIGURES are held"""
+        for page, image_bytes, ext, width, height, xref, source in images:
+            try:
+                added = self._add_candidate(candidates, seen_hashes, page, image_bytes, ext, width, height,
+                                            xref=xref, source=source)
+            except Exception as e:
+                print(f"   ⚠️  Failed to process image on page {page}: {e}")
+                continue
+            if added in counts:
+                counts[added] += 1
+            if len(candidates) > self.MAX_FIGURES:
+                # Keep only the most chart-like ones; the dropped image's hash still dedups later copies
+                candidates.remove(min(candidates, key=lambda c: c["chart_score"]))
+                counts["dropped"] += 1
+            if fill_only and len(candidates) >= self.MAX_FIGURES:
+                images.close()
+                break
+
+    def _add_candidate(self, candidates, seen_hashes, page, image_bytes, ext, width, height, xref=None,
+                       source="raster"):
+        """Filter, score and dedup one image; returns 'added', 'duplicate', 'non_chart' or 'filtered'"""
+        if not self._plausible_size(width, height):
+            return "filtered"
+
+        # Skip photos, equation snippets, banners and text scans before they cost a vision call
+        score = chart_score(image_bytes)
+        if score < self.CHART_MIN_SCORE:
+            return "non_chart"
+
+        # Collapse near-duplicates of a figure already seen
+        image_hash = perceptual_hash(image_bytes)
+        if any(hash_distance(image_hash, seen) <= self.DUPLICATE_MAX_DISTANCE for seen in seen_hashes):
+            return "duplicate"
+        seen_hashes.append(image_hash)
+
+        candidates.append({
+            "page": page,
+            "xref": xref,
+            "source": source,
+            "phash": image_hash,
+            "chart_score": round(score, 2),
+            "image": image_bytes,
+            "ext": ext,
+            "width": width,
+            "height": height
+        })
+        return "added"
+
+    def _prepare_figure(self, candidate):
+        """Resize a selected candidate; the bytes are base64-encoded only when its request is built"""
+        image_bytes, ext = self._resize_if_needed(candidate["image"], candidate["ext"])
+        return {
+            "page": candidate["page"],
+            "xref": candidate["xref"],
+            "source": candidate["source"],
+            "phash": candidate["phash"],
+            "chart_score": candidate["chart_score"],
+            "image": image_bytes,
+            "mime_type": f"image/{'jpeg' if ext in ('jpg', 'jpeg') else 'png'}",
+            "width": candidate["width"],
+            "height": candidate["height"]
+        }
 
     def _resize_if_needed(self, image_bytes, ext):
         """Resize image if either dimension exceeds MAX_IMAGE_DIMENSION"""
         try:
-            img = Image.open(io.BytesIO(image_bytes))
-            w, h = img.size
-
-            if max(w, h) <= self.MAX_IMAGE_DIMENSION:
-                return image_bytes, ext
-
-            ratio = self.MAX_IMAGE_DIMENSION / max(w, h)
-            new_w, new_h = int(w * ratio), int(h * ratio)
-            img = img.resize((new_w, new_h), Image.LANCZOS)
+            with Image.open(io.BytesIO(image_bytes)) as img:
+                # Only the header is parsed so far
+                w, h = img.size
+                if max(w, h) <= self.MAX_IMAGE_DIMENSION:
+                    return image_bytes, ext
+
+                ratio = self.MAX_IMAGE_DIMENSION / max(w, h)
+                new_w, new_h = int(w * ratio), int(h * ratio)
+                # JPEGs decode directly at a reduced scale (1/2, 1/4, 1/8) no smaller than the target
+                img.draft(img.mode, (new_w, new_h))
+                img = img.resize((new_w, new_h), Image.LANCZOS)
 
             buffer = io.BytesIO()
             save_format = "JPEG" if ext in ("jpg", "jpeg") else "PNG"
@@ -248,6 +346,15 @@ Return valid JSON:
         except Exception:
             return image_bytes, ext
 
+    @staticmethod
+    def _image_part(figure_data):
+        """image_url content part; the base64 copy lives only as long as the request"""
+        encoded = base64.b64encode(figure_data["image"]).decode("ascii")
+        return {
+            "type": "image_url",
+            "image_url": {"url": f"data:{figure_data['mime_type']};base64,{encoded}", "detail": "high"}
+        }
+
     # --- Vision Analysis ---
 
     def _analyze_single_figure(self, figure_data, figure_number):
@@ -263,13 +370,7 @@ Return valid JSON:
                             "type": "text",
                             "text": f"Analyze this figure (Figure {figure_number}, found on page {figure_data['page']} of the paper). Evaluate it against data visualization best practices."
                         },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{figure_data['mime_type']};base64,{figure_data['base64_data']}",
-                                "detail": "high"
-                            }
-                        }
+                        self._image_part(figure_data)
                     ]
                 }
             ],
@@ -283,6 +384,142 @@ Return valid JSON:
         result["page"] = figure_data["page"]
         return result
 
+    def _figure_tokens(self, figure_data):
+        """Image tokens of a figure as sent (longer side capped at MAX_IMAGE_DIMENSION, high detail)"""
+        width, height = figure_data["width"], figure_data["height"]
+        ratio = min(1.0, self.MAX_IMAGE_DIMENSION / max(width, height, 1))
+        return image_tokens(int(width * ratio), int(height * ratio))
+
+    def _plan_batches(self, numbered_figures):
+        """Split [(figure_number, figure)] into consecutive batches within the image-token budget.
+
+        A figure that alone exceeds the budget gets a batch of its own.
+        """
+        batches = []
+        current, current_tokens = [], 0
+        for number, figure in numbered_figures:
+            tokens = self._figure_tokens(figure)
+            if current and (current_tokens + tokens > self.BATCH_IMAGE_TOKENS
+                            or len(current) >= self.BATCH_MAX_FIGURES):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((number, figure))
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _analyze_figure_batch(self, batch):
+        """Analyze several figures in one vision request; returns {figure_number: analysis} for those parsed"""
+        content = [{
+            "type": "text",
+            "text": f"Analyze these {len(batch)} figures from the paper. Evaluate each against data visualization best practices."
+        }]
+        for number, figure_data in batch:
+            content.append({"type": "text", "text": f"Figure {number} (page {figure_data['page']})"})
+            content.append(self._image_part(figure_data))
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": self.figure_prompt + self.batch_instructions},
+                {"role": "user", "content": content}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.3,
+            max_tokens=2000 * len(batch)
+        )
+
+        entries = json.loads(response.choices[0].message.content).get("figures")
+        if not isinstance(entries, list):
+            raise ValueError("response has no 'figures' array")
+        figures_by_number = dict(batch)
+        results = {}
+        for position, entry in enumerate(entries):
+            if not isinstance(entry, dict):
+                continue
+            number = entry.get("figure_number")
+            if number not in figures_by_number:
+                # Fall back to position when the model dropped or garbled the number
+                number = batch[position][0] if position < len(batch) and len(entries) == len(batch) else None
+            if number is None or number in results:
+                continue
+            entry["figure_number"] = number
+            entry["page"] = figures_by_number[number]["page"]
+            results[number] = entry
+        return results
+
+    def _analyze_batch_or_fallback(self, batch, total):
+        """Analyze a batch in one request; figures missing from an unparseable or partial reply go one by one"""
+        pending = []
+        analyses = {}
+        for number, figure_data in batch:
+            cached = self._cached_verdict(figure_data, number)
+            if cached is not None:
+                print(f"   [{number}/{total}] Figure on page {figure_data['page']}: cached verdict")
+                analyses[number] = cached
+            else:
+                pending.append((number, figure_data))
+
+        if len(pending) > 1:
+            numbers = ", ".join(str(number) for number, _ in pending)
+            print(f"   Analyzing figures {numbers} (of {total}) in one request...")
+            try:
+                parsed = self._analyze_figure_batch(pending)
+            except Exception as e:
+                print(f"   ⚠️  Batched analysis of figures {numbers} failed ({e}), analyzing them one by one")
+                parsed = {}
+            for number, figure_data in pending:
+                if number in parsed:
+                    analyses[number] = parsed[number]
+                    if self._use_figure_cache():
+                        get_figure_cache().set(figure_data["phash"], self.figure_prompt, self.model, parsed[number])
+
+        for number, figure_data in pending:
+            if number not in analyses:
+                analyses[number] = self._analyze_figure_or_fallback(figure_data, number, total)
+        self._release_images(figure_data for _, figure_data in batch)
+        return [analyses[number] for number, _ in batch]
+
+    def _analyze_and_release(self, figure_data, figure_number, total):
+        result = self._analyze_figure_or_fallback(figure_data, figure_number, total)
+        self._release_images([figure_data])
+        return result
+
+    @staticmethod
+    def _release_images(figures):
+        # Verdicts are in; drop the image bytes so a long run doesn't hold every figure until synthesis
+        for figure_data in figures:
+            figure_data.pop("image", None)
+
+    def _use_figure_cache(self):
+        # A run with the LLM cache switched off (--no-cache) wants fresh verdicts too
+        return self.FIGURE_CACHE_ENABLED and getattr(self.client, "enabled", True)
+
+    def _cached_verdict(self, figure_data, figure_number):
+        """Verdict stored for a perceptually identical figure (e.g. from an earlier revision), or None"""
+        if not self._use_figure_cache():
+            return None
+        verdict = get_figure_cache().get(figure_data["phash"], self.figure_prompt, self.model)
+        if verdict is not None:
+            verdict.update(figure_number=figure_number, page=figure_data["page"], from_cache=True)
+        return verdict
+
+    def _analyze_figure_or_fallback(self, figure_data, figure_number, total):
+        """Analyze one figure (or reuse its cached verdict), returning the failure skeleton instead of raising"""
+        cached = self._cached_verdict(figure_data, figure_number)
+        if cached is not None:
+            print(f"   [{figure_number}/{total}] Figure on page {figure_data['page']}: cached verdict")
+            return cached
+        print(f"   [{figure_number}/{total}] Analyzing figure on page {figure_data['page']}...")
+        try:
+            result = self._analyze_single_figure(figure_data, figure_number)
+        except Exception as e:
+            print(f"   ⚠️  Failed to analyze figure {figure_number}: {e}")
+            return self._failed_figure_analysis(figure_number, figure_data["page"], str(e))
+        if self._use_figure_cache():
+            get_figure_cache().set(figure_data["phash"], self.figure_prompt, self.model, result)
+        return result
+
     # --- Text Analysis ---
 
     def _analyze_captions(self, full_text, results_section):
@@ -466,15 +703,25 @@ Provide your holistic assessment."""
 
     # --- Main Method ---
 
-    def analyze(self, pdf_path, full_text, results_section=""):
-        """Analyze data visualizations in a research paper"""
+    def analyze(self, document, full_text, results_section=""):
+        """Analyze data visualizations in a research paper (document: core.document.PaperDocument)"""
 
         print("📈 Agent 7 (DataViz Critic) analyzing figures...\n")
 
         # Step 1: Extract figures from PDF
         print("   Extracting figures from PDF...")
-        figures = self._extract_figures(pdf_path)
-        print(f"   Found {len(figures)} figures\n")
+        try:
+            figures, duplicates, non_charts = self._extract_figures(document)
+        except Exception as e:
+            # Figures are optional; caption analysis below still runs
+            print(f"   ⚠️  Figure extraction failed: {e}")
+            figures, duplicates, non_charts = [], 0, 0
+        skipped = []
+        if duplicates:
+            skipped.append(f"{duplicates} duplicates collapsed")
+        if non_charts:
+            skipped.append(f"{non_charts} non-charts skipped")
+        print(f"   Found {len(figures)} figures" + (f" ({', '.join(skipped)})" if skipped else "") + "\n")
 
         if not figures:
             print("   ℹ️  No figures found in this paper\n")
@@ -483,22 +730,31 @@ Provide your holistic assessment."""
             result = self._empty_analysis()
             result["caption_analysis"]["references_found"] = caption_analysis.get("total_references", 0)
             result["caption_analysis"]["dangling_references"] = caption_analysis.get("dangling_references", [])
+            result["figure_dedup"] = {"duplicates_collapsed": duplicates, "non_charts_skipped": non_charts, "cache_hits": 0}
             return result
 
-        # Step 2: Analyze each figure with Vision API
-        figure_analyses = []
-        for i, fig in enumerate(figures):
-            print(f"   [{i+1}/{len(figures)}] Analyzing figure on page {fig['page']}...")
-            try:
-                analysis = self._analyze_single_figure(fig, i + 1)
-                figure_analyses.append(analysis)
-            except Exception as e:
-                print(f"   ⚠️  Failed to analyze figure {i+1}: {e}")
-                figure_analyses.append(self._failed_figure_analysis(i + 1, fig["page"], str(e)))
-
-        # Step 3: Text-based caption and reference analysis
-        print(f"\n   Analyzing figure captions and references in text...")
-        caption_analysis = self._analyze_captions(full_text, results_section)
+        # Step 2 + 3: Vision analysis per figure and caption analysis don't depend on
+        # each other, so they run concurrently (caption call gets its own worker)
+        print(f"   Analyzing {len(figures)} figures (up to {self.MAX_CONCURRENT_FIGURES} at a time) and captions...")
+        # Separate pools: the caption worker must not pick up figures once it is free,
+        # or MAX_CONCURRENT_FIGURES + 1 vision calls would run at once
+        with ThreadPoolExecutor(max_workers=1) as caption_executor, \
+                ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_FIGURES) as executor:
+            caption_future = caption_executor.submit(self._analyze_captions, full_text, results_section)
+            if self.BATCH_FIGURES:
+                batches = self._plan_batches(list(enumerate(figures, 1)))
+                batch_futures = [executor.submit(self._analyze_batch_or_fallback, batch, len(figures))
+                                 for batch in batches]
+                # Batches are consecutive runs of figures, so flattening keeps page order
+                figure_analyses = [analysis for future in batch_futures for analysis in future.result()]
+            else:
+                figure_futures = [
+                    executor.submit(self._analyze_and_release, fig, i + 1, len(figures))
+                    for i, fig in enumerate(figures)
+                ]
+                # Collected in submission order, so figure numbering follows page order
+                figure_analyses = [future.result() for future in figure_futures]
+            caption_analysis = caption_future.result()
 
         # Step 4: Merge caption data into figure analyses
         self._merge_caption_data(figure_analyses, caption_analysis)
@@ -506,6 +762,11 @@ Provide your holistic assessment."""
         # Step 5: Synthesize overall assessment
         print("   Generating overall assessment...")
         result = self._synthesize_results(figure_analyses, caption_analysis)
+        result["figure_dedup"] = {
+            "duplicates_collapsed": duplicates,
+            "non_charts_skipped": non_charts,
+            "cache_hits": sum(1 for fig in figure_analyses if fig.get("from_cache"))
+        }
 
         # Print summary
         quality = result.get("overall_quality", "N/A")
@@ -515,7 +776,8 @@ Provide your holistic assessment."""
         print(f"\n   ✅ Figures analyzed: {result['figures_analyzed']}")
         print(f"   ✅ Overall quality: {quality}/5")
         print(f"   ✅ Best practice violations: {violations}")
-        print(f"   ✅ Recommendations: {recs}\n")
+        print(f"   ✅ Recommendations: {recs}")
+        print(f"   ✅ Duplicates collapsed: {duplicates}, non-charts skipped: {non_charts}, cached verdicts reused: {result['figure_dedup']['cache_hits']}\n")
 
         return result
 
@@ -537,14 +799,8 @@ if __name__ == "__main__":
 
         critic = DataVisualizationCritic()
 
-        # Quick text extraction for caption analysis
-        from pypdf import PdfReader
-        reader = PdfReader(test_pdf)
-        full_text = ""
-        for page in reader.pages:
-            full_text += page.extract_text()
-
-        result = critic.analyze(test_pdf, full_text)
+        with PaperDocument(test_pdf) as document:
+            result = critic.analyze(document, document.text)
 
         print("\n" + "=" * 50)
         print("DATAVIZ ANALYSIS:")
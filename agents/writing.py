@@ -1,16 +1,45 @@
-from openai import AzureOpenAI
+from core.llm_client import create_llm_client
+from core.stopwords import STOPWORDS
 from dotenv import load_dotenv
 import os
 import json
 import re
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
 load_dotenv()
 
+BE_VERBS = ('is', 'are', 'was', 'were', 'been', 'being', 'be')
+
+
+def build_lexical_scanner(categories, passive_patterns):
+    """Compile one regex that tokenizes lowercase text in a single pass.
+
+    Each match is one of: a be-verb followed by a participle (passive voice, the
+    participle itself is left for the next match), a lexicon phrase (longest
+    first), or a plain word. Returns (scanner, phrase_info) where phrase_info maps
+    each phrase to (category, words in it, passive constructions inside it).
+    """
+    phrase_info = {}
+    for category, phrases in categories.items():
+        for phrase in phrases:
+            inner_passive = sum(len(re.findall(p, phrase)) for p in passive_patterns)
+            phrase_info[phrase] = (category, phrase.split(), inner_passive)
+
+    phrases = sorted(phrase_info, key=len, reverse=True)
+    scanner = re.compile(
+        r"(?P<be>\b(?:" + "|".join(BE_VERBS) + r")\b(?=\s+\w+(?:ed|en)\b))"
+        r"|\b(?P<phrase>" + "|".join(re.escape(p) for p in phrases) + r")\b"
+        r"|\b(?P<word>[a-z]+)\b"
+    )
+    return scanner, phrase_info
+
 
 class WritingQualityCoach:
     """Agent 8: Evaluates academic writing quality against style guide standards"""
 
+    MAX_CONCURRENT_SECTIONS = int(os.getenv("WRITING_MAX_CONCURRENT_SECTIONS", "4"))
+
     PASSIVE_PATTERNS = [
         r'\b(is|are|was|were|been|being|be)\s+\w+ed\b',
         r'\b(is|are|was|were|been|being|be)\s+\w+en\b',
@@ -40,6 +69,12 @@ class WritingQualityCoach:
         'accordingly', 'hence', 'thus', 'nonetheless'
     ]
 
+    # Hedge, filler and transition counts, passive voice and word tokens in one pass
+    LEXICAL_SCANNER, LEXICON = build_lexical_scanner(
+        {"hedge": HEDGE_WORDS, "filler": FILLER_WORDS, "transition": TRANSITION_WORDS},
+        PASSIVE_PATTERNS
+    )
+
     SECTION_STANDARDS = {
         "abstract": """ABSTRACT standards:
 - Must be self-contained: a reader should understand the study without reading the paper
@@ -96,12 +131,8 @@ class WritingQualityCoach:
 """
     }
 
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION")
-        )
+    def __init__(self, client=None):
+        self.client = client or create_llm_client()
         self.model = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
 
         self.section_prompt = """You are an expert academic writing coach who evaluates scientific paper sections
@@ -185,81 +216,76 @@ Return valid JSON:
 
     def _compute_metrics(self, text):
         """Compute quantitative text metrics without LLM"""
+        return self._metrics_from_counts(self._scan_text(text))
+
+    def _scan_text(self, text):
+        """Raw, additive counts for one text; combine with _merge_counts, finish with _metrics_from_counts"""
+        counts = {"sentence_lengths": [], "paragraph_lengths": [], "words": Counter(),
+                  "passive": 0, "hedge": 0, "filler": 0, "transition": 0}
         if not text or len(text.strip()) < 50:
+            return counts
+
+        # Split into sentences (handle abbreviations like "et al.", "Fig.", "e.g.")
+        cleaned = re.sub(r'\b(et al|Fig|fig|Eq|eq|vs|Dr|Mr|Mrs|Ms|Prof|Inc|Ltd|Jr|Sr)\.',
+                         r'\1DOTPLACEHOLDER', text)
+        cleaned = re.sub(r'(\d)\.(\d)', r'\1DOTPLACEHOLDER\2', cleaned)
+        counts["sentence_lengths"] = [len(s.split()) for s in re.split(r'[.!?]+', cleaned) if len(s.strip()) > 5]
+
+        counts["paragraph_lengths"] = [len(p.split()) for p in text.split('\n\n') if len(p.strip()) > 20]
+
+        words = counts["words"]
+        for match in self.LEXICAL_SCANNER.finditer(text.lower()):
+            kind = match.lastgroup
+            token = match.group(kind)
+            if kind == "phrase":
+                category, phrase_words, inner_passive = self.LEXICON[token]
+                counts[category] += 1
+                counts["passive"] += inner_passive
+                words.update(phrase_words)
+            else:
+                if kind == "be":
+                    counts["passive"] += 1
+                words[token] += 1
+        return counts
+
+    @staticmethod
+    def _merge_counts(all_counts):
+        merged = {"sentence_lengths": [], "paragraph_lengths": [], "words": Counter(),
+                  "passive": 0, "hedge": 0, "filler": 0, "transition": 0}
+        for counts in all_counts:
+            merged["sentence_lengths"].extend(counts["sentence_lengths"])
+            merged["paragraph_lengths"].extend(counts["paragraph_lengths"])
+            merged["words"].update(counts["words"])
+            for key in ("passive", "hedge", "filler", "transition"):
+                merged[key] += counts[key]
+        return merged
+
+    def _metrics_from_counts(self, counts):
+        sentence_lengths = counts["sentence_lengths"]
+        if not sentence_lengths:
             return self._empty_metrics()
 
         try:
-            # Split into sentences (handle abbreviations like "et al.", "Fig.", "e.g.")
-            cleaned = re.sub(r'\b(et al|Fig|fig|Eq|eq|vs|Dr|Mr|Mrs|Ms|Prof|Inc|Ltd|Jr|Sr)\.',
-                             r'\1DOTPLACEHOLDER', text)
-            cleaned = re.sub(r'(\d)\.(\d)', r'\1DOTPLACEHOLDER\2', cleaned)
-            sentences = [s.strip() for s in re.split(r'[.!?]+', cleaned) if len(s.strip()) > 5]
-
-            if not sentences:
-                return self._empty_metrics()
-
-            # Sentence lengths
-            sentence_lengths = [len(s.split()) for s in sentences]
-            avg_sentence_length = sum(sentence_lengths) / len(sentence_lengths)
-            max_sentence_length = max(sentence_lengths)
-            sentences_over_40 = sum(1 for l in sentence_lengths if l > 40)
-
-            # Paragraphs
-            paragraphs = [p.strip() for p in text.split('\n\n') if len(p.strip()) > 20]
-            avg_paragraph_length = (sum(len(p.split()) for p in paragraphs) / len(paragraphs)) if paragraphs else 0
-
-            # Words
-            words = re.findall(r'\b[a-zA-Z]+\b', text.lower())
-            total_words = len(words) if words else 1
-            unique_words = set(words)
-            unique_word_ratio = len(unique_words) / total_words
+            paragraph_lengths = counts["paragraph_lengths"]
+            words = counts["words"]
+            total_words = sum(words.values()) or 1
 
             # Word repetitions (top non-stopword repeats)
-            stopwords = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-                         'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'been',
-                         'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-                         'could', 'should', 'may', 'might', 'can', 'shall', 'that', 'this',
-                         'these', 'those', 'it', 'its', 'as', 'not', 'no', 'if', 'than',
-                         'which', 'who', 'whom', 'what', 'when', 'where', 'how', 'all',
-                         'each', 'both', 'more', 'most', 'other', 'some', 'such', 'only',
-                         'also', 'into', 'over', 'after', 'before', 'between', 'through',
-                         'during', 'about', 'their', 'our', 'we', 'they', 'them', 'there'}
-            content_words = [w for w in words if w not in stopwords and len(w) > 3]
-            word_counts = Counter(content_words)
-            top_repeats = word_counts.most_common(10)
-
-            # Passive voice
-            text_lower = text.lower()
-            passive_count = 0
-            for pattern in self.PASSIVE_PATTERNS:
-                passive_count += len(re.findall(pattern, text_lower))
-            passive_ratio = passive_count / len(sentences) if sentences else 0
-
-            # Hedge words
-            hedge_count = sum(len(re.findall(r'\b' + re.escape(h) + r'\b', text_lower))
-                              for h in self.HEDGE_WORDS)
-
-            # Filler words/phrases
-            filler_count = sum(len(re.findall(re.escape(f), text_lower))
-                               for f in self.FILLER_WORDS)
-
-            # Transition words
-            transition_count = sum(len(re.findall(r'\b' + re.escape(t) + r'\b', text_lower))
-                                   for t in self.TRANSITION_WORDS)
+            content_words = Counter({w: n for w, n in words.items() if w not in STOPWORDS and len(w) > 3})
 
             return {
-                "avg_sentence_length": round(avg_sentence_length, 1),
-                "max_sentence_length": max_sentence_length,
-                "avg_paragraph_length": round(avg_paragraph_length, 1),
-                "total_sentences": len(sentences),
+                "avg_sentence_length": round(sum(sentence_lengths) / len(sentence_lengths), 1),
+                "max_sentence_length": max(sentence_lengths),
+                "avg_paragraph_length": round(sum(paragraph_lengths) / len(paragraph_lengths), 1) if paragraph_lengths else 0,
+                "total_sentences": len(sentence_lengths),
                 "total_words": total_words,
-                "passive_voice_ratio": round(passive_ratio, 2),
-                "hedge_word_count": hedge_count,
-                "filler_word_count": filler_count,
-                "transition_word_count": transition_count,
-                "unique_word_ratio": round(unique_word_ratio, 2),
-                "sentences_over_40_words": sentences_over_40,
-                "top_repeated_words": top_repeats[:5]
+                "passive_voice_ratio": round(counts["passive"] / len(sentence_lengths), 2),
+                "hedge_word_count": counts["hedge"],
+                "filler_word_count": counts["filler"],
+                "transition_word_count": counts["transition"],
+                "unique_word_ratio": round(len(words) / total_words, 2),
+                "sentences_over_40_words": sum(1 for l in sentence_lengths if l > 40),
+                "top_repeated_words": content_words.most_common(5)
             }
 
         except Exception as e:
@@ -422,9 +448,9 @@ Provide your holistic assessment."""
 
         print(f"   Sections to analyze: {', '.join(analyzable_sections.keys())}")
 
-        # Step 1: Compute metrics for full text and per section
-        full_text = ' '.join(analyzable_sections.values())
-        overall_metrics = self._compute_metrics(full_text)
+        # Step 1: Scan each section once; overall metrics aggregate the section counts
+        section_counts = {name: self._scan_text(text) for name, text in analyzable_sections.items()}
+        overall_metrics = self._metrics_from_counts(self._merge_counts(section_counts.values()))
 
         print(f"   Overall metrics computed:")
         print(f"     Avg sentence length: {overall_metrics['avg_sentence_length']} words")
@@ -433,16 +459,21 @@ Provide your holistic assessment."""
         print(f"     Filler words: {overall_metrics['filler_word_count']}")
         print(f"     Unique word ratio: {overall_metrics['unique_word_ratio']:.0%}\n")
 
-        # Step 2: Analyze each section
-        section_analyses = {}
-        for name, text in analyzable_sections.items():
-            print(f"   Analyzing {name}...")
-            section_metrics = self._compute_metrics(text)
-            analysis = self._analyze_section(name, text, section_metrics)
-            if analysis:
-                section_analyses[name] = analysis
-                score = analysis.get('overall_section_score', '?')
-                print(f"     Score: {score}/5")
+        # Step 2: Analyze sections concurrently (bounded); results keep section order
+        print(f"   Analyzing {len(analyzable_sections)} sections (up to {self.MAX_CONCURRENT_SECTIONS} at a time)...")
+        with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_SECTIONS) as executor:
+            futures = {
+                name: executor.submit(self._analyze_section, name, text,
+                                      self._metrics_from_counts(section_counts[name]))
+                for name, text in analyzable_sections.items()
+            }
+            section_analyses = {}
+            for name, future in futures.items():
+                analysis = future.result()
+                if analysis:
+                    section_analyses[name] = analysis
+                    score = analysis.get('overall_section_score', '?')
+                    print(f"     {name}: {score}/5")
 
         if not section_analyses:
             print("   No sections could be analyzed\n")
@@ -0,0 +1,264 @@
+"""Batch mode: analyze a directory (or manifest) of PDFs.
+
+    python workflow.py batch <directory|manifest> [options]
+
+With the pypdf backend, text extraction runs in a process pool, only a little ahead
+of the agents; with PyMuPDF (default) each analysis reads the text from the document
+it opens anyway. The agent work of several papers runs concurrently in threads, all
+sharing one LLM rate limiter. Each paper writes
+<name>.analysis.json and <name>.analysis.md into the output directory; papers whose
+outputs already exist are skipped, so an interrupted batch can simply be restarted.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from datetime import datetime
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+
+from core.rate_limiter import get_rate_limiter
+from core.document import PaperDocument
+from core.pdf_extraction import default_backend, process_pool, timed_extract
+from workflow import PaperAnalyzerWorkflow
+
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "output")
+
+SUMMARY_FIELDS = [
+    "pdf", "status", "paper_type", "title", "pages", "chars", "section_method", "section_confidence",
+    "extract_seconds", "analysis_seconds", "total_seconds", "error", "json_path", "report_path"
+]
+
+
+def discover_pdfs(source):
+    """List PDFs from a directory (recursive) or a manifest file (one path per line, or CSV with a 'path' column)"""
+    if os.path.isdir(source):
+        pdfs = []
+        for root, _, files in os.walk(source):
+            pdfs.extend(os.path.join(root, f) for f in files if f.lower().endswith(".pdf"))
+        return sorted(pdfs)
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    with open(source, "r", encoding="utf-8") as f:
+        if source.lower().endswith(".csv"):
+            paths = [row.get("path", "").strip() for row in csv.DictReader(f)]
+        else:
+            paths = [line.strip() for line in f]
+
+    pdfs = []
+    for path in paths:
+        if not path or path.startswith("#"):
+            continue
+        pdfs.append(path if os.path.isabs(path) else os.path.join(base_dir, path))
+    return pdfs
+
+
+def output_names(pdfs):
+    """Stable output base name per PDF (file stem; repeated stems get a numeric suffix)"""
+    names = {}
+    seen = {}
+    for pdf in pdfs:
+        stem = os.path.splitext(os.path.basename(pdf))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        names[pdf] = stem if seen[stem] == 1 else f"{stem}_{seen[stem]}"
+    return names
+
+
+def _write_atomic(path, content):
+    """Write via a temp file so an interrupted run never leaves a half-written output behind"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+def _export_data(result):
+    """Same JSON layout as the Streamlit 'Download Data' export, plus timings"""
+    return {
+        "paper_type": result["paper_type"],
+        "title": result["sections"].get("title", "Unknown Title"),
+        "results": result["results"],
+        "writing": result["writing"],
+        "methodology": result["methods"],
+        "visualization": result["visualization"],
+        "citations": result["citations"],
+        "plagiarism": result["plagiarism"],
+        "journals": result["journals"],
+        "funding": result["funding"],
+        "agent_timings": result["agent_timings"],
+        "section_extraction": result["section_extraction"]
+    }
+
+
+def run_batch(source, output_dir=DEFAULT_OUTPUT_DIR, max_papers=3, extract_workers=None,
+              llm_concurrency=None, use_cache=None):
+    """Analyze every PDF in `source`; returns the list of summary rows"""
+    pdfs = discover_pdfs(source)
+    os.makedirs(output_dir, exist_ok=True)
+    if llm_concurrency:
+        get_rate_limiter().set_max_concurrency(llm_concurrency)
+
+    names = output_names(pdfs)
+    jobs = {}
+    unprocessed = []
+    for pdf in pdfs:
+        json_path = os.path.join(output_dir, f"{names[pdf]}.analysis.json")
+        report_path = os.path.join(output_dir, f"{names[pdf]}.analysis.md")
+        if os.path.exists(json_path) and os.path.exists(report_path):
+            unprocessed.append({"pdf": pdf, "status": "skipped", "json_path": json_path, "report_path": report_path})
+        elif not os.path.exists(pdf):
+            unprocessed.append({"pdf": pdf, "status": "failed", "error": "File not found"})
+        else:
+            jobs[pdf] = (json_path, report_path)
+
+    print("=" * 60)
+    print(f"📚 BATCH ANALYSIS: {len(pdfs)} PDFs ({len(jobs)} to analyze, {len(pdfs) - len(jobs)} skipped/missing)")
+    print("=" * 60 + "\n")
+
+    summary_path = os.path.join(output_dir, f"batch_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+    rows = []
+    summary_lock = threading.Lock()
+    summary_file = open(summary_path, "w", newline="", encoding="utf-8")
+    writer = csv.DictWriter(summary_file, fieldnames=SUMMARY_FIELDS)
+    writer.writeheader()
+
+    def record(row):
+        # Rows are flushed as they arrive so an interrupted batch still leaves a summary
+        with summary_lock:
+            rows.append(row)
+            writer.writerow({field: row.get(field, "") for field in SUMMARY_FIELDS})
+            summary_file.flush()
+
+    for row in unprocessed:
+        record(row)
+
+    def analyze(pdf, full_text=None, page_count=None, extract_seconds=0.0):
+        json_path, report_path = jobs[pdf]
+        with PaperDocument(pdf, text=full_text) as document:
+            if full_text is None:
+                # PyMuPDF text comes from the same handle the figures use: one parse per PDF
+                start = time.perf_counter()
+                full_text, page_count = document.extract_text(), document.page_count
+                extract_seconds = time.perf_counter() - start
+            start = time.perf_counter()
+            result = PaperAnalyzerWorkflow(use_cache=use_cache).analyze_text(document, full_text)
+        _write_atomic(json_path, json.dumps(_export_data(result), indent=2, ensure_ascii=False))
+        _write_atomic(report_path, result["report"])
+        analysis_seconds = time.perf_counter() - start
+        return {
+            "pdf": pdf,
+            "status": "done",
+            "paper_type": result["paper_type"],
+            "title": result["sections"].get("title", ""),
+            "pages": page_count,
+            "chars": len(full_text),
+            "section_method": result["section_extraction"]["method"],
+            "section_confidence": result["section_extraction"]["confidence"],
+            "extract_seconds": round(extract_seconds, 2),
+            "analysis_seconds": round(analysis_seconds, 2),
+            "total_seconds": round(extract_seconds + analysis_seconds, 2),
+            "json_path": json_path,
+            "report_path": report_path
+        }
+
+    # pypdf is slow enough to extract ahead in worker processes; PyMuPDF text is read inside
+    # the analysis from the document it opens for figures anyway
+    prefetch = default_backend() == "pypdf"
+    # Texts are only extracted ahead of a free analysis slot, so at most max_papers + extract_workers
+    # full texts are held at a time no matter how large the corpus is
+    extract_workers = extract_workers or os.cpu_count() or 1
+    window = max_papers + extract_workers if prefetch else max_papers
+    queued = iter(jobs)
+    in_flight = {}
+
+    try:
+        # Workers only import core.pdf_extraction, not the agents
+        with (process_pool(extract_workers) if prefetch else nullcontext()) as extract_pool, \
+                ThreadPoolExecutor(max_workers=max_papers) as paper_pool:
+
+            def submit_extractions():
+                while len(in_flight) < window:
+                    pdf = next(queued, None)
+                    if pdf is None:
+                        return
+                    if prefetch:
+                        in_flight[extract_pool.submit(timed_extract, pdf)] = ("extract", pdf)
+                    else:
+                        in_flight[paper_pool.submit(analyze, pdf)] = ("analyze", pdf)
+
+            submit_extractions()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, pdf = in_flight.pop(future)
+                    if stage == "extract":
+                        try:
+                            full_text, page_count, extract_seconds = future.result()
+                        except Exception as e:
+                            print(f"❌ Text extraction failed for {pdf}: {e}")
+                            record({"pdf": pdf, "status": "failed", "error": f"extraction: {e}"})
+                            continue
+                        print(f"📄 Extracted {pdf} ({page_count} pages, {extract_seconds:.1f}s)")
+                        # Hand the paper to the agent pool as soon as its text is ready
+                        in_flight[paper_pool.submit(analyze, pdf, full_text, page_count, extract_seconds)] = \
+                            ("analyze", pdf)
+                        continue
+
+                    try:
+                        row = future.result()
+                        print(f"✅ Done: {pdf} ({row['total_seconds']}s)")
+                    except Exception as e:
+                        print(f"❌ Analysis failed for {pdf}: {e}")
+                        row = {"pdf": pdf, "status": "failed", "error": str(e)}
+                    record(row)
+                submit_extractions()
+    finally:
+        summary_file.close()
+
+    done = sum(1 for r in rows if r["status"] == "done")
+    failed = sum(1 for r in rows if r["status"] == "failed")
+    skipped = sum(1 for r in rows if r["status"] == "skipped")
+    print("\n" + "=" * 60)
+    print(f"✅ BATCH COMPLETE: {done} analyzed, {skipped} skipped, {failed} failed")
+    heuristic = sum(1 for r in rows if r.get("section_method") == "heuristic")
+    if done:
+        print(f"✂️  Sections from headings (no outline LLM call): {heuristic}/{done}")
+    print(f"📊 Summary: {summary_path}")
+    print("=" * 60)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python workflow.py batch",
+        description="Analyze a directory or manifest of PDFs; re-running skips papers that already have outputs."
+    )
+    parser.add_argument("source", help="Directory of PDFs, or a manifest (.txt with one path per line, or .csv with a 'path' column)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="Output directory (default: data/output)")
+    parser.add_argument("--papers", type=int, default=3, help="Papers analyzed concurrently (default: 3)")
+    parser.add_argument("--extract-workers", type=int, default=None, help="Processes for PDF text extraction (default: CPU count)")
+    parser.add_argument("--llm-concurrency", type=int, default=None,
+                        help="Max LLM requests in flight across all papers (default: LLM_MAX_CONCURRENCY or unlimited)")
+    parser.add_argument("--no-cache", action="store_true", help="Don't reuse cached LLM responses")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"❌ Error: Not found: {args.source}")
+        return 1
+
+    rows = run_batch(
+        args.source,
+        output_dir=args.output,
+        max_papers=args.papers,
+        extract_workers=args.extract_workers,
+        llm_concurrency=args.llm_concurrency,
+        use_cache=False if args.no_cache else None
+    )
+    return 1 if any(r["status"] == "failed" for r in rows) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
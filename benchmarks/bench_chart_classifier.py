@@ -0,0 +1,310 @@
+"""Accuracy and throughput of the chart-likeness pre-classifier.
+
+    python benchmarks/bench_chart_classifier.py [--repeat 20] [--threshold SCORE]
+
+Builds a small labelled fixture set of synthetic images: charts (bar, grouped
+bar, line, scatter, box plot, pie, heatmap, ggplot-style grey-panel scatter and
+bar charts, a despined line chart without axes) and non-charts (photo-like
+textures, logo, equation snippet, publisher banner, scanned text, blank scanned
+page). It prints each fixture's score, the accuracy at the DataViz Critic's skip floor, how well the
+score ranks charts above non-charts (what decides which MAX_FIGURES are kept)
+and how many encoded images per second are classified, decoding included.
+"""
+
+from statistics import median
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+from agents.visualization import DataVisualizationCritic
+from core.chart_classifier import chart_score
+
+PALETTE = [(31, 119, 180), (255, 127, 14), (44, 160, 44), (214, 39, 40), (148, 103, 189)]
+
+
+def _axes(draw, box, ticks=5):
+    x0, y0, x1, y1 = box
+    draw.line([(x0, y0), (x0, y1), (x1, y1)], fill="black", width=2)
+    font = ImageFont.load_default()
+    for i in range(ticks + 1):
+        x = x0 + (x1 - x0) * i / ticks
+        y = y1 - (y1 - y0) * i / ticks
+        draw.line([(x, y1), (x, y1 + 5)], fill="black")
+        draw.line([(x0 - 5, y), (x0, y)], fill="black")
+        draw.text((x - 4, y1 + 8), str(i * 10), fill="black", font=font)
+        draw.text((x0 - 28, y - 5), str(i * 20), fill="black", font=font)
+
+
+def bar_chart(rng, size=(640, 480), groups=1):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    box = (60, 30, size[0] - 20, size[1] - 40)
+    _axes(draw, box)
+    n = rng.randint(4, 9)
+    slot = (box[2] - box[0]) / n
+    for i in range(n):
+        for g in range(groups):
+            h = rng.uniform(0.1, 0.95) * (box[3] - box[1])
+            x = box[0] + i * slot + 6 + g * (slot - 12) / groups
+            draw.rectangle([x, box[3] - h, x + (slot - 12) / groups - 2, box[3]], fill=PALETTE[g])
+    return img
+
+
+def line_chart(rng, size=(640, 420)):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    box = (60, 20, size[0] - 20, size[1] - 40)
+    _axes(draw, box)
+    for series in range(rng.randint(1, 3)):
+        y = rng.uniform(0.3, 0.7)
+        points = []
+        for i in range(30):
+            y = min(max(y + rng.uniform(-0.08, 0.08), 0.05), 0.95)
+            points.append((box[0] + (box[2] - box[0]) * i / 29, box[3] - y * (box[3] - box[1])))
+        draw.line(points, fill=PALETTE[series], width=2)
+    return img
+
+
+def scatter_plot(rng, size=(560, 560)):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    box = (60, 20, size[0] - 20, size[1] - 40)
+    _axes(draw, box)
+    for _ in range(120):
+        x = rng.uniform(box[0] + 5, box[2] - 5)
+        y = rng.uniform(box[1] + 5, box[3] - 5)
+        draw.ellipse([x - 3, y - 3, x + 3, y + 3], fill=PALETTE[rng.randint(0, 2)])
+    return img
+
+
+def box_plot(rng, size=(600, 420)):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    box = (60, 20, size[0] - 20, size[1] - 40)
+    _axes(draw, box)
+    for i in range(4):
+        cx = box[0] + 60 + i * 120
+        q1, q3 = rng.uniform(150, 220), rng.uniform(250, 320)
+        draw.line([(cx, q1 - 60), (cx, q3 + 40)], fill="black")
+        draw.rectangle([cx - 25, q1, cx + 25, q3], outline="black", fill=PALETTE[i % 5])
+        draw.line([(cx - 25, (q1 + q3) / 2), (cx + 25, (q1 + q3) / 2)], fill="black", width=2)
+    return img
+
+
+def pie_chart(rng, size=(480, 480)):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    start = 0
+    for i, share in enumerate(np.random.default_rng(rng.randint(0, 999)).dirichlet(np.ones(5))):
+        end = start + share * 360
+        draw.pieslice([40, 40, size[0] - 40, size[1] - 40], start, end, fill=PALETTE[i], outline="white")
+        start = end
+    return img
+
+
+def heatmap(rng, size=(520, 520)):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    box = (60, 20, size[0] - 20, size[1] - 40)
+    cells = 10
+    w = (box[2] - box[0]) / cells
+    h = (box[3] - box[1]) / cells
+    for i in range(cells):
+        for j in range(cells):
+            v = rng.random()
+            draw.rectangle([box[0] + i * w, box[1] + j * h, box[0] + (i + 1) * w, box[1] + (j + 1) * h],
+                           fill=(int(255 * v), int(80 + 100 * v), int(255 * (1 - v))))
+    _axes(draw, box, ticks=cells)
+    return img
+
+
+def _grey_panel(draw, box, ticks=5):
+    """ggplot2-style panel: grey background, white grid lines, tick labels outside, no axis lines"""
+    x0, y0, x1, y1 = box
+    draw.rectangle(box, fill=(235, 235, 235))
+    font = ImageFont.load_default()
+    for i in range(ticks + 1):
+        x = x0 + (x1 - x0) * i / ticks
+        y = y1 - (y1 - y0) * i / ticks
+        draw.line([(x, y0), (x, y1)], fill="white", width=2)
+        draw.line([(x0, y), (x1, y)], fill="white", width=2)
+        draw.text((x - 4, y1 + 6), str(i * 10), fill=(77, 77, 77), font=font)
+        draw.text((x0 - 24, y - 5), str(i * 20), fill=(77, 77, 77), font=font)
+
+
+def ggplot_scatter(rng, size=(560, 480)):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    box = (50, 20, size[0] - 20, size[1] - 40)
+    _grey_panel(draw, box)
+    for _ in range(80):
+        x = rng.uniform(box[0] + 5, box[2] - 5)
+        y = rng.uniform(box[1] + 5, box[3] - 5)
+        draw.ellipse([x - 3, y - 3, x + 3, y + 3], fill=(0, 0, 0) if rng.random() < 0.5 else (248, 118, 109))
+    return img
+
+
+def grey_panel_bar_chart(rng, size=(600, 420)):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    box = (50, 20, size[0] - 20, size[1] - 40)
+    _grey_panel(draw, box)
+    n = rng.randint(3, 7)
+    slot = (box[2] - box[0]) / n
+    for i in range(n):
+        h = rng.uniform(0.1, 0.95) * (box[3] - box[1])
+        x = box[0] + i * slot + slot * 0.15
+        draw.rectangle([x, box[3] - h, x + slot * 0.7, box[3]], fill=(89, 89, 89))
+    return img
+
+
+def despined_line_chart(rng, size=(640, 360)):
+    """Minimal style: no axes, ticks or grid, only thin series lines and a few labels"""
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default()
+    for series in range(rng.randint(1, 3)):
+        y = rng.uniform(0.3, 0.7)
+        points = []
+        for i in range(40):
+            y = min(max(y + rng.uniform(-0.06, 0.06), 0.05), 0.95)
+            points.append((30 + (size[0] - 90) * i / 39, 20 + (1 - y) * (size[1] - 40)))
+        draw.line(points, fill=PALETTE[series], width=2)
+        draw.text((points[-1][0] + 6, points[-1][1] - 5), f"S{series + 1}", fill=PALETTE[series], font=font)
+    return img
+
+
+def photo(rng, size=(640, 480)):
+    """Natural-image stand-in: smooth colour fields plus sensor noise"""
+    gen = np.random.default_rng(rng.randint(0, 9999))
+    low = gen.uniform(0, 255, (6, 8, 3)).astype(np.uint8)
+    img = Image.fromarray(low).resize(size, Image.BICUBIC)
+    noise = gen.normal(0, 12, (size[1], size[0], 3))
+    arr = np.clip(np.asarray(img, dtype=np.float32) + noise, 0, 255).astype(np.uint8)
+    return Image.fromarray(arr).filter(ImageFilter.GaussianBlur(0.8))
+
+
+def logo(rng, size=(300, 300)):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    color = PALETTE[rng.randint(0, 4)]
+    draw.ellipse([40, 40, size[0] - 40, size[1] - 80], fill=color)
+    draw.text((size[0] // 2 - 40, size[1] - 60), "JOURNAL PRESS", fill=color, font=ImageFont.load_default())
+    return img
+
+
+def blank_page(rng, size=(1700, 2200)):
+    """Empty scanned page: off-white paper with sensor noise, a page number at most"""
+    gen = np.random.default_rng(rng.randint(0, 9999))
+    tone = rng.randint(225, 250)
+    arr = np.clip(gen.normal(tone, 18, (size[1], size[0])), 0, 255).astype(np.uint8)
+    img = Image.fromarray(arr, "L").convert("RGB")
+    if rng.random() < 0.5:
+        ImageDraw.Draw(img).text((size[0] // 2, size[1] - 120), str(rng.randint(1, 300)), fill="black",
+                                 font=ImageFont.load_default())
+    return img
+
+
+def _text_lines(draw, rng, box, lines, chars):
+    font = ImageFont.load_default()
+    words = "the of and model results sigma alpha beta sum integral equation data".split()
+    y = box[1]
+    for _ in range(lines):
+        line = ""
+        while len(line) < chars:
+            line += rng.choice(words) + " "
+        draw.text((box[0], y), line, fill="black", font=font)
+        y += 14
+
+
+def equation(rng, size=(520, 70)):
+    img = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default()
+    terms = ["f(x)", "=", "sum", "a_i", "x^i", "+", "int", "g(t)", "dt", "/", "(1 + e^-x)"]
+    draw.text((10, 25), " ".join(rng.choice(terms) for _ in range(14)), fill="black", font=font)
+    return img
+
+
+def banner(rng, size=(900, 120)):
+    img = Image.new("RGB", size, PALETTE[rng.randint(0, 4)])
+    draw = ImageDraw.Draw(img)
+    _text_lines(draw, rng, (20, 20), 5, 120)
+    return img
+
+
+def scanned_text(rng, size=(600, 500)):
+    img = Image.new("RGB", size, (250, 248, 240))
+    draw = ImageDraw.Draw(img)
+    _text_lines(draw, rng, (20, 20), 30, 85)
+    return img
+
+
+CHART_MAKERS = [bar_chart, lambda rng: bar_chart(rng, groups=3), line_chart, scatter_plot, box_plot, pie_chart, heatmap,
+                ggplot_scatter, grey_panel_bar_chart, despined_line_chart]
+NON_CHART_MAKERS = [photo, logo, equation, banner, scanned_text, blank_page]
+
+
+def make_fixtures(per_kind=3, seed=0):
+    """[(is_chart, kind, encoded_bytes)]; JPEG for photos and scans, PNG otherwise, like real PDF embeds"""
+    rng = random.Random(seed)
+    fixtures = []
+    for is_chart, makers in ((True, CHART_MAKERS), (False, NON_CHART_MAKERS)):
+        for maker in makers:
+            kind = getattr(maker, "__name__", "bar_chart")
+            kind = "grouped_bar_chart" if kind == "<lambda>" else kind
+            for _ in range(per_kind):
+                img = maker(rng)
+                buffer = io.BytesIO()
+                img.save(buffer, format="JPEG" if maker in (photo, blank_page) else "PNG", quality=85)
+                fixtures.append((is_chart, kind, buffer.getvalue()))
+    return fixtures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--threshold", type=float, default=DataVisualizationCritic.CHART_MIN_SCORE)
+    args = parser.parse_args(argv)
+
+    fixtures = make_fixtures()
+    print(f"Fixtures: {sum(1 for f in fixtures if f[0])} charts, {sum(1 for f in fixtures if not f[0])} non-charts\n")
+
+    correct = 0
+    by_kind = {}
+    for is_chart, kind, data in fixtures:
+        score = chart_score(data)
+        by_kind.setdefault((is_chart, kind), []).append(score)
+        correct += (score >= args.threshold) == is_chart
+    for (is_chart, kind), scores in by_kind.items():
+        print(f"  {'chart    ' if is_chart else 'non-chart'} {kind:22s} " + " ".join(f"{s:.2f}" for s in scores))
+    print(f"\nAccuracy at threshold {args.threshold}: {correct}/{len(fixtures)}")
+    print(f"Charts skipped at threshold: {sum(s < args.threshold for (c, _), ss in by_kind.items() if c for s in ss)}")
+
+    # Share of (chart, non-chart) pairs where the chart scores higher (ROC AUC)
+    charts = [s for (c, _), ss in by_kind.items() if c for s in ss]
+    others = [s for (c, _), ss in by_kind.items() if not c for s in ss]
+    pairs = sum((a > b) + 0.5 * (a == b) for a in charts for b in others)
+    print(f"Ranking (chart above non-chart): {pairs / (len(charts) * len(others)):.3f}")
+
+    runs = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        for _, _, data in fixtures:
+            chart_score(data)
+        runs.append(time.perf_counter() - start)
+    seconds = median(runs)
+    print(f"Throughput: {len(fixtures) / seconds:.0f} images/s ({seconds / len(fixtures) * 1000:.2f} ms per image, "
+          f"median of {args.repeat})")
+
+
+if __name__ == "__main__":
+    main()
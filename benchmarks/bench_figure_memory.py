@@ -0,0 +1,161 @@
+"""Python heap used by the DataViz Critic's figure pipeline (tracemalloc).
+
+    python benchmarks/bench_figure_memory.py [paper.pdf] [--pages 100]
+
+Without a PDF, a scanned-thesis-like document is generated: every page is a
+large full-page JPEG scan, and every tenth page also embeds a chart. Two
+pipelines are measured on it, and both send the same figures:
+
+  before  the DataViz Critic's previous _extract_figures(): every image
+          extracted before its size is checked, every chart-like candidate
+          held until all pages are read, then the MAX_FIGURES most chart-like
+          resized and base64-encoded up front and kept through the vision calls
+  lean    DataVisualizationCritic now: size checked on get_images() metadata,
+          draft-mode thumbnails for scoring, only MAX_FIGURES candidates held,
+          base64 built per request and image bytes released after each call
+
+The vision client is a stub that answers instantly, so only local memory is
+measured. tracemalloc sees Python allocations (image bytes, base64 strings,
+NumPy/PIL buffers exposed to Python); MuPDF's own C heap is not included.
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+from agents.visualization import DataVisualizationCritic
+from benchmarks.bench_chart_classifier import bar_chart, line_chart, scatter_plot
+from core.document import PaperDocument
+
+MIB = 1024 * 1024
+
+
+def make_scanned_pdf(path, pages, seed=0):
+    rng = random.Random(seed)
+    gen = np.random.default_rng(seed)
+    charts = [bar_chart, line_chart, scatter_plot]
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        # Noisy grey paper at ~200 dpi; noise compresses poorly, so each page is a MB-sized JPEG
+        scan = np.clip(gen.normal(235, 18, (2200, 1700)), 0, 255).astype(np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(scan, "L").save(buffer, format="JPEG", quality=80)
+        page.insert_image(page.rect, stream=buffer.getvalue())
+        if i % 10 == 5:
+            buffer = io.BytesIO()
+            charts[i % 3](rng).save(buffer, format="PNG")
+            page.insert_image(fitz.Rect(80, 300, 520, 620), stream=buffer.getvalue())
+    doc.save(path)
+    doc.close()
+
+
+class StubCompletions:
+    def create(self, **request):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(
+            content=json.dumps({"overall_figure_score": 4})))])
+
+
+def _resize_before(critic, image_bytes, ext):
+    """_resize_if_needed() as it was: full decode, no draft mode"""
+    img = Image.open(io.BytesIO(image_bytes))
+    w, h = img.size
+    if max(w, h) <= critic.MAX_IMAGE_DIMENSION:
+        return image_bytes
+    ratio = critic.MAX_IMAGE_DIMENSION / max(w, h)
+    img = img.resize((int(w * ratio), int(h * ratio)), Image.LANCZOS)
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG" if ext in ("jpg", "jpeg") else "PNG")
+    return buffer.getvalue()
+
+
+def before_pipeline(critic, document):
+    """The previous _extract_figures() + per-figure vision calls, same filters, scores and cap"""
+    candidates = []
+    seen_hashes = []
+    seen_xrefs = set()
+    for page_num in range(document.page_count):
+        for img_info in document.page_images(page_num):
+            xref = img_info[0]
+            if xref in seen_xrefs:
+                continue
+            seen_xrefs.add(xref)
+            img_data = document.extract_image(xref)
+            if not img_data or not img_data.get("image"):
+                continue
+            critic._add_candidate(candidates, seen_hashes, page_num + 1, img_data["image"],
+                                  img_data.get("ext", "png"), img_data.get("width", 0),
+                                  img_data.get("height", 0), xref=xref)
+
+    if len(candidates) > critic.MAX_FIGURES:
+        candidates = sorted(candidates, key=lambda c: c["chart_score"], reverse=True)[:critic.MAX_FIGURES]
+    candidates.sort(key=lambda c: c["page"])
+    figures = [{"page": c["page"], "xref": c["xref"], "mime_type": f"image/{'jpeg' if c['ext'] in ('jpg', 'jpeg') else 'png'}",
+                "base64_data": base64.b64encode(_resize_before(critic, c["image"], c["ext"])).decode("utf-8")}
+               for c in candidates]
+    for figure in figures:
+        critic.client.chat.completions.create(messages=[{"role": "user", "content": [
+            {"type": "image_url", "image_url": {"url": f"data:{figure['mime_type']};base64,{figure['base64_data']}"}}
+        ]}])
+    return [(f["page"], f["xref"]) for f in figures]
+
+
+def lean_pipeline(critic, document):
+    figures, _, _ = critic._extract_figures(document)
+    sent = [(f["page"], f["xref"]) for f in figures]
+    for number, figure in enumerate(figures, 1):
+        critic._analyze_and_release(figure, number, len(figures))
+    return sent
+
+
+def measure(label, fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    sent = fn()
+    seconds = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  {label:<6} peak {peak / MIB:8.1f} MiB   retained {current / MIB:6.1f} MiB   "
+          f"{seconds:6.1f}s   {len(sent)} figures sent")
+    return sent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", nargs="?", help="PDF to benchmark (default: generated scanned thesis)")
+    parser.add_argument("--pages", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    DataVisualizationCritic.FIGURE_CACHE_ENABLED = False
+    DataVisualizationCritic.VECTOR_FIGURES_ENABLED = False
+    critic = DataVisualizationCritic(client=SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions())))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf = args.pdf
+        if not pdf:
+            pdf = os.path.join(tmp, f"scanned_{args.pages}p.pdf")
+            make_scanned_pdf(pdf, args.pages)
+        print(f"{os.path.basename(pdf)} ({os.path.getsize(pdf) / MIB:.1f} MiB on disk)\n")
+        sent = {}
+        for label, pipeline in (("before", before_pipeline), ("lean", lean_pipeline)):
+            with PaperDocument(pdf) as document:
+                sent[label] = measure(label, lambda: pipeline(critic, document))
+        print(f"\nSame figures sent: {'yes' if sent['before'] == sent['lean'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
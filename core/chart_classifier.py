@@ -0,0 +1,130 @@
+"""CPU-only chart-likeness score for candidate figure images (NumPy, no model).
+
+Charts are mostly flat background with a few flat colours, crisp edges, long
+straight axis/grid/bar lines and little text. Photos have many colours and
+soft gradients everywhere; equation snippets, banners and scanned text are
+dominated by glyph strokes without long lines; blank scanned pages have no
+marks at all and score 0. chart_score() combines those cues into 0..1 on a
+thumbnail of at most THUMBNAIL_SIZE pixels, so it costs a few milliseconds per
+image and runs before any vision call.
+"""
+
+import io
+
+import numpy as np
+from PIL import Image
+
+THUMBNAIL_SIZE = 256
+# An unbroken edge run at least this share of the width/height counts as a line
+LINE_LENGTH = 0.3
+
+
+def _load(image):
+    """PIL image (or encoded bytes) -> RGB uint8 array, downscaled cheaply"""
+    if isinstance(image, (bytes, bytearray)):
+        image = Image.open(io.BytesIO(image))
+    image.draft("RGB", (THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    image = image.convert("RGB")
+    image.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+    return np.asarray(image, dtype=np.uint8)
+
+
+def _longest_runs(mask):
+    """Length of the longest run of True per row of a 2-D boolean array"""
+    padded = np.zeros((mask.shape[0], mask.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    changes = np.diff(padded, axis=1)
+    starts = np.argwhere(changes == 1)
+    ends = np.argwhere(changes == -1)
+    longest = np.zeros(mask.shape[0], dtype=np.int64)
+    np.maximum.at(longest, starts[:, 0], ends[:, 1] - starts[:, 1])
+    return longest
+
+
+def chart_features(image):
+    """Feature dict used by chart_score (exposed for tuning and the benchmark)"""
+    rgb = _load(image)
+    gray = rgb.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    height, width = gray.shape
+
+    # Colour histogram on 4 bits per channel
+    quantized = (rgb >> 4).astype(np.int32)
+    codes = (quantized[..., 0] << 8) | (quantized[..., 1] << 4) | quantized[..., 2]
+    counts = np.bincount(codes.ravel(), minlength=4096)
+    ranked = np.sort(counts)[::-1]
+    total = gray.size
+    background_ratio = ranked[0] / total
+    top_colors_ratio = ranked[:8].sum() / total
+    distinct_colors = int((counts > total * 0.001).sum())
+    # Colours besides the background that fill a visible area (bars, series, pie slices)
+    fill_colors = int((ranked[1:] > total * 0.02).sum())
+
+    # Edges: horizontal and vertical intensity differences
+    dx = np.abs(np.diff(gray, axis=1))
+    dy = np.abs(np.diff(gray, axis=0))
+    strong_x = dx > 48
+    strong_y = dy > 48
+    edge_density = (strong_x.sum() + strong_y.sum()) / total
+    soft_edges = (((dx > 6) & (dx <= 48)).sum() + ((dy > 6) & (dy <= 48)).sum()) / total
+
+    # Long straight lines (axes, grid lines, bar edges): unbroken runs of strong edges
+    horizontal_lines = int((_longest_runs(strong_y) > width * LINE_LENGTH).sum())
+    vertical_lines = int((_longest_runs(strong_x.T) > height * LINE_LENGTH).sum())
+
+    # Text: rows where ink (clearly darker than the background) flips on and off very often
+    background_gray = np.median(gray[codes == np.argmax(counts)]) if ranked[0] else 255.0
+    ink = gray < background_gray - 60
+    ink_ratio = ink.mean()
+    # Anything visibly different from the background, in any channel (coloured marks, light fills)
+    background_rgb = np.median(rgb[codes == np.argmax(counts)], axis=0) if ranked[0] else np.full(3, 255.0)
+    mark_ratio = (np.abs(rgb.astype(np.int16) - background_rgb.astype(np.int16)).max(axis=2) > 40).mean()
+    flips = np.abs(np.diff(ink.astype(np.int8), axis=1)).sum(axis=1)
+    ink_rows = ink.any(axis=1)
+    text_ratio = float((flips[ink_rows] > width * 0.06).mean()) if ink_rows.any() else 0.0
+
+    return {
+        "width": width,
+        "height": height,
+        "background_ratio": float(background_ratio),
+        "top_colors_ratio": float(top_colors_ratio),
+        "distinct_colors": distinct_colors,
+        "fill_colors": fill_colors,
+        "edge_density": float(edge_density),
+        "soft_edges": float(soft_edges),
+        "horizontal_lines": horizontal_lines,
+        "vertical_lines": vertical_lines,
+        "ink_ratio": float(ink_ratio),
+        "mark_ratio": float(mark_ratio),
+        "text_ratio": text_ratio,
+    }
+
+
+def score_features(f):
+    """0..1 chart-likeness from chart_features()"""
+    # Blank or near-blank pages (empty scans, separators): nothing drawn, nothing to rank
+    if f["edge_density"] < 0.001 and f["ink_ratio"] < 0.001 and f["mark_ratio"] < 0.001:
+        return 0.0
+    lines = f["horizontal_lines"] + f["vertical_lines"]
+    score = 0.35
+    # Axes, grid lines, bar edges
+    score += 0.15 * min(f["horizontal_lines"], 3) / 3 + 0.15 * min(f["vertical_lines"], 3) / 3
+    # Flat colours on a dominant background
+    score += 0.25 * max(0.0, f["top_colors_ratio"] - 0.6) / 0.4
+    score += 0.1 * min(f["background_ratio"] / 0.5, 1.0)
+    # Photographs: many colours, gradients everywhere
+    score -= 0.35 * min(f["soft_edges"] / 0.5, 1.0)
+    score -= 0.15 * min(max(f["distinct_colors"] - 24, 0) / 100, 1.0)
+    # Glyph-dominated images: equations, banners, scanned text
+    score -= 0.4 * f["text_ratio"] * (1.0 if lines == 0 else 0.5)
+    # Strips far wider than tall are equations, banners or rules, not plots
+    if f["width"] > 4 * f["height"]:
+        score -= 0.3
+    # Without any straight line only a multi-colour pie is plausible; logos and emblems are single-colour
+    if lines == 0:
+        score -= 0.1 if f["fill_colors"] >= 3 else 0.4
+    return float(min(max(score, 0.0), 1.0))
+
+
+def chart_score(image):
+    """Chart-likeness of an image (PIL image or encoded bytes), 0 = surely not a chart, 1 = surely a chart"""
+    return score_features(chart_features(image))
@@ -0,0 +1,133 @@
+from dotenv import load_dotenv
+import threading
+
+import fitz  # PyMuPDF
+
+from core.pdf_extraction import PARALLEL_MIN_PAGES, default_backend, default_workers, extract_pdf_text
+from core.vector_figures import RENDER_DPI, page_regions, render_region
+
+load_dotenv()
+
+
+class PaperDocument:
+    """One opened PDF shared by every step of an analysis.
+
+    The PyMuPDF document is opened once and serves page count, metadata, images
+    and (with the default PDF_TEXT_BACKEND=pymupdf) text, so the file is parsed
+    once; with the pypdf backend a PdfReader is created on first text access.
+    Page and full text are cached after first use. PyMuPDF documents are not
+    thread-safe, so access goes through one lock.
+
+    If PyMuPDF cannot open the file, text still comes from pypdf and only the
+    layout-based steps (heading detection, figures) fail, via open_error.
+    """
+
+    def __init__(self, path, backend=None, text=None):
+        self.path = path
+        self.backend = backend or default_backend()
+        self._lock = threading.RLock()
+        self._reader = None
+        self._page_text = {}
+        self._text = text
+        self.open_error = None
+        try:
+            self._doc = fitz.open(path)
+        except Exception as e:
+            print(f"⚠️  PyMuPDF could not open {path} ({e}); text via pypdf, no figure analysis")
+            self._doc = None
+            self.open_error = str(e)
+            self.backend = "pypdf"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self._lock:
+            if self._doc is not None and not self._doc.is_closed:
+                self._doc.close()
+
+    def _fitz(self):
+        """The PyMuPDF document, or RuntimeError if it could not be opened"""
+        if self._doc is None:
+            raise RuntimeError(f"PDF could not be opened with PyMuPDF: {self.open_error}")
+        return self._doc
+
+    def _pdf_reader(self):
+        if self._reader is None:
+            from pypdf import PdfReader
+            self._reader = PdfReader(self.path)
+        return self._reader
+
+    @property
+    def page_count(self):
+        with self._lock:
+            if self._doc is None:
+                return len(self._pdf_reader().pages)
+            return self._doc.page_count
+
+    @property
+    def metadata(self):
+        """PDF metadata (title, author, subject, keywords, ...)"""
+        with self._lock:
+            if self._doc is None:
+                return {}
+            return dict(self._doc.metadata or {})
+
+    def page_text(self, page_index):
+        with self._lock:
+            if page_index not in self._page_text:
+                if self.backend == "pymupdf":
+                    text = self._doc[page_index].get_text()
+                else:
+                    text = self._pdf_reader().pages[page_index].extract_text()
+                self._page_text[page_index] = text
+            return self._page_text[page_index]
+
+    def extract_text(self, workers=None):
+        """Full text (pages joined).
+
+        PyMuPDF text comes from the shared handle (fast enough serially, and the
+        file isn't parsed again); large PDFs on the pypdf backend are extracted
+        page-parallel in worker processes.
+        """
+        with self._lock:
+            if self._text is None:
+                workers = workers or default_workers()
+                if self.backend == "pypdf" and workers > 1 and self.page_count >= PARALLEL_MIN_PAGES:
+                    self._text, _ = extract_pdf_text(self.path, backend=self.backend, workers=workers)
+                else:
+                    self._text = "".join(self.page_text(i) for i in range(self.page_count))
+            return self._text
+
+    @property
+    def text(self):
+        return self.extract_text()
+
+    def page_lines(self, page_index):
+        """Text lines of a page in reading order, as lists of PyMuPDF span dicts (text, size, flags, font)"""
+        with self._lock:
+            blocks = self._fitz()[page_index].get_text("dict")["blocks"]
+        return [line["spans"] for block in blocks for line in block.get("lines", []) if line["spans"]]
+
+    def page_images(self, page_index):
+        """Image tuples of a page as returned by PyMuPDF's get_images(full=True)"""
+        with self._lock:
+            return self._fitz()[page_index].get_images(full=True)
+
+    def extract_image(self, xref):
+        """Raw image dict (image bytes, ext, width, height, ...) for an xref"""
+        with self._lock:
+            return self._fitz().extract_image(xref)
+
+    def vector_regions(self, page_index):
+        """[(page_index, region tuple)] of vector-drawn figures on a page (core/vector_figures.py)"""
+        with self._lock:
+            return page_regions(self._fitz()[page_index], page_index)
+
+    def render_clip(self, page_index, region, max_dimension, dpi=RENDER_DPI):
+        """(PNG bytes, width, height) of a page region, longer side at most max_dimension pixels"""
+        with self._lock:
+            return render_region(self._fitz()[page_index], fitz.Rect(region), max_dimension, dpi)
@@ -0,0 +1,72 @@
+from dotenv import load_dotenv
+import hashlib
+import io
+import json
+import os
+import threading
+
+from PIL import Image
+
+from core.disk_cache import SQLiteCache, CACHE_DIR
+
+load_dotenv()
+
+# dHash: 9x8 grayscale thumbnail, one bit per horizontal neighbour comparison
+HASH_SIZE = 8
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def perceptual_hash(image_bytes):
+    """64-bit difference hash as 16 hex chars; survives re-encoding, rescaling and small edits"""
+    with Image.open(io.BytesIO(image_bytes)) as img:
+        img.draft("L", (HASH_SIZE * 4, HASH_SIZE * 4))
+        pixels = list(img.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).getdata())
+    bits = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return f"{bits:016x}"
+
+
+def hash_distance(a, b):
+    """Hamming distance between two hex perceptual hashes"""
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+class FigureVerdictCache:
+    """Vision verdicts per figure, keyed by perceptual hash + prompt + model.
+
+    Changing the figure prompt or the deployment starts from a clean slate
+    automatically, since both are part of the key.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else SQLiteCache(
+            os.getenv("DATAVIZ_FIGURE_CACHE_PATH") or os.path.join(CACHE_DIR, "figure_verdicts.sqlite"),
+            max_entries=int(os.getenv("DATAVIZ_FIGURE_CACHE_MAX_ENTRIES", "5000")),
+            ttl_seconds=float(os.getenv("DATAVIZ_FIGURE_CACHE_TTL_HOURS", "2160")) * 3600
+        )
+
+    @staticmethod
+    def make_key(image_hash, prompt, model):
+        payload = json.dumps({"hash": image_hash, "prompt": prompt, "model": model}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, image_hash, prompt, model):
+        value = self.cache.get(self.make_key(image_hash, prompt, model))
+        return json.loads(value) if value is not None else None
+
+    def set(self, image_hash, prompt, model, verdict):
+        self.cache.set(self.make_key(image_hash, prompt, model), json.dumps(verdict, ensure_ascii=False))
+
+
+def get_figure_cache():
+    """Return the process-wide figure verdict cache (created on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FigureVerdictCache()
+        return _cache
@@ -0,0 +1,283 @@
+"""Local text-overlap index for the Plagiarism Detector (winnowing over word n-grams).
+
+A reference corpus indexed with
+
+    python workflow.py index-corpus <directory> [--recursive]
+
+(plus every analyzed paper when PLAGIARISM_INDEX_ADD_ANALYZED=1) is reduced to winnowed fingerprints: hashes of overlapping KGRAM-word shingles,
+keeping the minimum hash of every WINDOW consecutive shingles. Only
+(hash, document) pairs are stored, in a WITHOUT ROWID SQLite table keyed by
+hash, so the index stays compact at tens of thousands of documents and lookups
+are index seeks.
+
+Queries hash every shingle of every sentence of the paper (not just the winnowed
+ones), so any passage shared with an indexed document that is at least
+KGRAM + WINDOW - 1 words long is guaranteed to hit one of its fingerprints.
+Hashes present in more than MAX_DOC_FREQ documents (boilerplate such as
+funding statements) are ignored.
+"""
+
+from collections import defaultdict
+from dotenv import load_dotenv
+import argparse
+import glob
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from core.disk_cache import CACHE_DIR
+from core.pdf_extraction import extract_pdf_text
+
+load_dotenv()
+
+KGRAM = 6
+WINDOW = 8
+MAX_DOC_FREQ = 50
+# SQLite's default limit on bound parameters is 999 in older builds
+QUERY_CHUNK = 900
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+SENTENCE_PATTERN = re.compile(r"[^.!?]+[.!?]*")
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def tokenize(text):
+    """[(word, start, end)] of lowercase alphanumeric words with character offsets into text"""
+    return [(m.group(), m.start(), m.end()) for m in WORD_PATTERN.finditer(text.lower())]
+
+
+def shingle_hashes(words):
+    """64-bit signed hash of every KGRAM-word shingle (stable across runs, unlike hash())"""
+    return [
+        int.from_bytes(hashlib.blake2b(" ".join(words[i:i + KGRAM]).encode("utf-8"), digest_size=8).digest(),
+                       "big", signed=True)
+        for i in range(len(words) - KGRAM + 1)
+    ]
+
+
+def winnow(hashes, window=WINDOW):
+    """Set of fingerprints: the minimum hash of every window of consecutive shingle hashes"""
+    if not hashes:
+        return set()
+    if len(hashes) <= window:
+        return {min(hashes)}
+    return {min(hashes[i:i + window]) for i in range(len(hashes) - window + 1)}
+
+
+def sentence_spans(text, min_words=KGRAM):
+    """[(start, end)] character spans of sentences with at least min_words words"""
+    spans = []
+    for match in SENTENCE_PATTERN.finditer(text):
+        if len(WORD_PATTERN.findall(match.group().lower())) >= min_words:
+            spans.append((match.start(), match.end()))
+    return spans
+
+
+def document_key(text):
+    """Content hash of the normalized word sequence; the same paper re-extracted keeps its key"""
+    return hashlib.sha256(" ".join(w for w, _, _ in tokenize(text)).encode("utf-8")).hexdigest()
+
+
+class FingerprintIndex:
+    """add() documents, find_matches() for the sentences of a new one"""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("PLAGIARISM_INDEX_PATH") or os.path.join(CACHE_DIR, "fingerprints.sqlite")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "doc_id INTEGER PRIMARY KEY, doc_key TEXT UNIQUE NOT NULL, title TEXT, source TEXT, "
+            "fingerprints INTEGER NOT NULL, added_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints ("
+            "hash INTEGER NOT NULL, doc_id INTEGER NOT NULL, PRIMARY KEY (hash, doc_id)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def add(self, text, title=None, source=None):
+        """Index a document (no-op if the same text is already indexed); returns its doc_id"""
+        key = document_key(text)
+        fingerprints = winnow(shingle_hashes([w for w, _, _ in tokenize(text)]))
+        with self._lock:
+            row = self._conn.execute("SELECT doc_id FROM documents WHERE doc_key = ?", (key,)).fetchone()
+            if row:
+                return row[0]
+            cursor = self._conn.execute(
+                "INSERT INTO documents (doc_key, title, source, fingerprints, added_at) VALUES (?, ?, ?, ?, ?)",
+                (key, title, source, len(fingerprints), time.time())
+            )
+            doc_id = cursor.lastrowid
+            self._conn.executemany("INSERT OR IGNORE INTO fingerprints (hash, doc_id) VALUES (?, ?)",
+                                   ((h, doc_id) for h in fingerprints))
+            self._conn.commit()
+            return doc_id
+
+    def _lookup(self, hashes, exclude_doc_ids=()):
+        """{hash: [doc_id, ...]} for the given hashes, without over-common hashes and the excluded documents"""
+        postings = defaultdict(list)
+        hashes = list(hashes)
+        with self._lock:
+            for start in range(0, len(hashes), QUERY_CHUNK):
+                chunk = hashes[start:start + QUERY_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT hash, doc_id FROM fingerprints WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for h, doc_id in rows:
+                    if doc_id not in exclude_doc_ids:
+                        postings[h].append(doc_id)
+        return {h: docs for h, docs in postings.items() if len(docs) <= MAX_DOC_FREQ}
+
+    def _documents(self, doc_ids):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT doc_id, title, source FROM documents WHERE doc_id IN ({','.join('?' * len(doc_ids))})",
+                list(doc_ids)
+            ).fetchall()
+        return {doc_id: {"title": title, "source": source} for doc_id, title, source in rows}
+
+    @staticmethod
+    def _covered_words(positions):
+        """Word positions covered by matching shingles starting at positions (ascending).
+
+        Only winnowed shingles are indexed, but a shared run has one in every WINDOW
+        shingles, so gaps up to WINDOW between hits are counted as covered too.
+        """
+        words = set()
+        for previous, current in zip([None] + positions, positions):
+            first = previous if previous is not None and current - previous <= WINDOW else current
+            words.update(range(first, current + KGRAM))
+        return words
+
+    def _own_doc_ids(self, text, title=None, source=None):
+        """doc_ids that are the queried paper itself: same normalized text, source path or title"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT doc_id FROM documents WHERE doc_key = ? OR source = ? OR lower(title) = lower(?)",
+                (document_key(text), source, (title or "").strip() or None)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def find_matches(self, text, min_coverage=0.5, max_matches=50, title=None, source=None):
+        """Sentences of text that overlap indexed documents.
+
+        A sentence matches a document when shingles shared with it cover at least
+        min_coverage of the sentence's words. Returns the best matches by coverage:
+        [{"text", "matched_text", "start", "end", "coverage", "doc_id", "title", "source"}].
+        The document itself is never reported: neither the same normalized text nor,
+        so that a revised draft does not match its earlier version, an indexed
+        document with the same source or title.
+        """
+        own_ids = self._own_doc_ids(text, title, source)
+
+        sentences = []
+        all_hashes = set()
+        for start, end in sentence_spans(text):
+            tokens = tokenize(text[start:end])
+            hashes = shingle_hashes([w for w, _, _ in tokens])
+            sentences.append((start, end, tokens, hashes))
+            all_hashes.update(hashes)
+        if not all_hashes:
+            return []
+        postings = self._lookup(all_hashes, exclude_doc_ids=own_ids)
+        if not postings:
+            return []
+
+        matches = []
+        for start, end, tokens, hashes in sentences:
+            hits = defaultdict(list)
+            for i, h in enumerate(hashes):
+                for doc_id in postings.get(h, ()):
+                    hits[doc_id].append(i)
+            if not hits:
+                continue
+            doc_id, words = max(((doc_id, self._covered_words(positions)) for doc_id, positions in hits.items()),
+                                key=lambda item: len(item[1]))
+            coverage = len(words) / len(tokens)
+            if coverage < min_coverage:
+                continue
+            first, last = min(words), max(words)
+            matches.append({
+                "text": text[start:end].strip(),
+                "matched_text": text[start + tokens[first][1]:start + tokens[last][2]],
+                "start": start + tokens[first][1],
+                "end": start + tokens[last][2],
+                "coverage": round(coverage, 2),
+                "doc_id": doc_id
+            })
+
+        matches.sort(key=lambda m: m["coverage"], reverse=True)
+        matches = matches[:max_matches]
+        if matches:
+            documents = self._documents({m["doc_id"] for m in matches})
+            for match in matches:
+                match.update(documents.get(match["doc_id"], {"title": None, "source": None}))
+        return matches
+
+    def stats(self):
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            fingerprints = self._conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return {"documents": documents, "fingerprints": fingerprints, "size_mb": round(size / 1e6, 1)}
+
+
+def get_fingerprint_index():
+    """Return the process-wide fingerprint index (created on first use)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = FingerprintIndex()
+        return _index
+
+
+# --- Reference corpus ---
+
+def index_corpus(directory, recursive=False, index=None):
+    """Add every PDF and .txt file under directory to the index"""
+    index = index or get_fingerprint_index()
+    pattern = "**/*" if recursive else "*"
+    paths = sorted(p for p in glob.glob(os.path.join(directory, pattern), recursive=recursive)
+                   if p.lower().endswith((".pdf", ".txt")))
+    added = 0
+    for i, path in enumerate(paths, 1):
+        try:
+            if path.lower().endswith(".pdf"):
+                text, _ = extract_pdf_text(path)
+            else:
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    text = f.read()
+        except Exception as e:
+            print(f"⚠️  Skipping {path}: {e}")
+            continue
+        if text.strip():
+            index.add(text, title=os.path.splitext(os.path.basename(path))[0], source=path)
+            added += 1
+        if i % 100 == 0:
+            print(f"   {i}/{len(paths)} files...")
+
+    stats = index.stats()
+    print(f"✅ Indexed {added} files; index holds {stats['documents']} documents, "
+          f"{stats['fingerprints']} fingerprints ({stats['size_mb']} MB)")
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python workflow.py index-corpus",
+        description="Add a local reference corpus (PDF/.txt files) to the plagiarism fingerprint index."
+    )
+    parser.add_argument("directory", help="Directory with PDF and/or .txt files")
+    parser.add_argument("--recursive", action="store_true", help="Include subdirectories")
+    args = parser.parse_args(argv)
+    index_corpus(args.directory, recursive=args.recursive)
+    return 0
@@ -0,0 +1,81 @@
+from openai.types.chat import ChatCompletion
+from dotenv import load_dotenv
+from types import SimpleNamespace
+import hashlib
+import json
+import os
+import threading
+
+from core.disk_cache import SQLiteCache, CACHE_DIR
+
+load_dotenv()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_enabled_by_default():
+    """LLM_CACHE_ENABLED=0 turns the cache off unless a run explicitly asks for it"""
+    return os.getenv("LLM_CACHE_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+
+
+def get_llm_cache():
+    """Return the process-wide chat completion cache (created on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SQLiteCache(
+                os.getenv("LLM_CACHE_PATH") or os.path.join(CACHE_DIR, "llm_cache.sqlite"),
+                max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2000")),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL_HOURS", "168")) * 3600
+            )
+        return _cache
+
+
+def make_cache_key(request):
+    """Content hash of a chat completion request (deployment, messages, response_format, temperature, ...)"""
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CachedChatClient:
+    """Wraps an OpenAI client so chat.completions.create is served from the disk cache (get_llm_cache()) when possible.
+
+    Agents keep calling self.client.chat.completions.create(...) unchanged; everything
+    else is forwarded to the wrapped client.
+    """
+
+    def __init__(self, client, cache=None, enabled=None):
+        self._client = client
+        self.cache = cache if cache is not None else get_llm_cache()
+        self.enabled = cache_enabled_by_default() if enabled is None else enabled
+        # Per-client counters (the cache keeps process-wide ones); agents share one client across threads
+        self.hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _create_completion(self, **kwargs):
+        if not self.enabled or kwargs.get("stream"):
+            return self._client.chat.completions.create(**kwargs)
+
+        key = make_cache_key(kwargs)
+        cached = self.cache.get(key)
+        if cached is not None:
+            with self._counter_lock:
+                self.hits += 1
+            return ChatCompletion.model_validate_json(cached)
+
+        with self._counter_lock:
+            self.misses += 1
+        response = self._client.chat.completions.create(**kwargs)
+        # Truncated or filtered completions are not worth replaying
+        if response.choices and all(c.finish_reason == "stop" for c in response.choices):
+            self.cache.set(key, response.model_dump_json())
+        return response
+
+    def cache_stats(self):
+        return {"hits": self.hits, "misses": self.misses, "enabled": self.enabled}
@@ -0,0 +1,57 @@
+from openai import AzureOpenAI
+from dotenv import load_dotenv
+import httpx
+import os
+import threading
+
+from core.llm_cache import CachedChatClient
+from core.rate_limiter import RateLimitedChatClient
+
+load_dotenv()
+
+_lock = threading.Lock()
+_sync_client = None
+
+
+def _pool_limits():
+    """Connection-pool limits of the shared client"""
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "10")),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    )
+
+
+def _timeout():
+    return httpx.Timeout(float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "120")), connect=10.0)
+
+
+def _azure_settings():
+    return {
+        "azure_endpoint": os.getenv("AZURE_OPENAI_ENDPOINT"),
+        "api_key": os.getenv("AZURE_OPENAI_API_KEY"),
+        "api_version": os.getenv("AZURE_OPENAI_API_VERSION")
+    }
+
+
+def get_azure_client():
+    """Return the process-wide AzureOpenAI client (one HTTP connection pool for every agent)"""
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            # Retries are handled by RateLimitedChatClient, which knows about the shared quota
+            _sync_client = AzureOpenAI(
+                **_azure_settings(),
+                max_retries=0,
+                http_client=httpx.Client(limits=_pool_limits(), timeout=_timeout())
+            )
+        return _sync_client
+
+
+def create_llm_client(use_cache=None):
+    """Per-run client for agents: cache -> rate limiter -> shared pooled connection.
+
+    Share the returned object between all agents of one analysis; the pool and the
+    rate limiter are shared across analyses. Cache hits never touch the limiter.
+    """
+    return CachedChatClient(RateLimitedChatClient(get_azure_client()), enabled=use_cache)
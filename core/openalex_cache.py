@@ -0,0 +1,257 @@
+"""Persistent cache for OpenAlex API responses, shared by the journal and funding agents.
+
+Entity lookups (sources, funders) change slowly and are cached for weeks; works
+searches for a day. Expired entries are revalidated with If-None-Match /
+If-Modified-Since when the server sent validators, and served stale if OpenAlex
+is unreachable.
+
+    python workflow.py warm-openalex [--sources 1000] [--funders 500]
+
+preloads the most prolific sources and funders so typical papers need no entity
+lookups at all.
+"""
+
+from dotenv import load_dotenv
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+from core.disk_cache import SQLiteCache, CACHE_DIR
+
+load_dotenv()
+
+OPENALEX_BASE = "https://api.openalex.org"
+
+# Hours until an entry is revalidated, by first path segment of the endpoint
+DEFAULT_TTL_HOURS = {
+    "sources": 720,
+    "funders": 720,
+    "awards": 168,
+    "works": 24,
+}
+FALLBACK_TTL_HOURS = 24
+
+# OpenAlex accepts up to 50 values in one OR filter (openalex_id:A|B|...)
+BULK_FILTER_MAX = 50
+
+# Field selection used for journal details; warm-up must store the same response shape
+SOURCE_SELECT = ("id,display_name,host_organization_name,issn,is_oa,"
+                 "apc_usd,homepage_url,summary_stats,works_count,"
+                 "cited_by_count,type")
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def endpoint_kind(endpoint):
+    """'/sources/S123' -> 'sources'"""
+    return endpoint.strip("/").split("/")[0]
+
+
+def make_cache_key(endpoint, params):
+    """Key from endpoint + params; mailto only affects rate limits, not the response"""
+    payload = json.dumps(
+        {"endpoint": endpoint, "params": {k: v for k, v in (params or {}).items() if k != "mailto"}},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class OpenAlexCache:
+    """get_or_fetch(endpoint, params, fetch) in front of any OpenAlex request function.
+
+    fetch(endpoint, params, headers) must return a requests.Response with status
+    200 or 304, or None on failure.
+    """
+
+    def __init__(self, cache=None, ttl_hours=None, enabled=None):
+        self.cache = cache if cache is not None else SQLiteCache(
+            os.getenv("OPENALEX_CACHE_PATH") or os.path.join(CACHE_DIR, "openalex_cache.sqlite"),
+            max_entries=int(os.getenv("OPENALEX_CACHE_MAX_ENTRIES", "20000"))
+        )
+        self.ttl_hours = dict(DEFAULT_TTL_HOURS)
+        for kind in DEFAULT_TTL_HOURS:
+            override = os.getenv(f"OPENALEX_CACHE_TTL_{kind.upper()}_HOURS")
+            if override:
+                self.ttl_hours[kind] = float(override)
+        self.ttl_hours.update(ttl_hours or {})
+        if enabled is None:
+            enabled = os.getenv("OPENALEX_CACHE_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+        self.enabled = enabled
+
+        self._counter_lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "revalidated": 0, "stale_served": 0}
+
+    def _count(self, name):
+        with self._counter_lock:
+            self._counters[name] += 1
+
+    def ttl_seconds(self, endpoint):
+        return self.ttl_hours.get(endpoint_kind(endpoint), FALLBACK_TTL_HOURS) * 3600
+
+    def get_or_fetch(self, endpoint, params, fetch):
+        """Cached JSON for endpoint + params, fetching (or revalidating) when missing or expired"""
+        if not self.enabled:
+            response = fetch(endpoint, params, {})
+            return response.json() if response is not None and response.status_code == 200 else None
+
+        key = make_cache_key(endpoint, params)
+        entry = self.cache.get_with_age(key)
+        stored = None
+        if entry is not None:
+            stored = json.loads(entry[0])
+            if entry[1] <= self.ttl_seconds(endpoint):
+                self._count("hits")
+                return stored["body"]
+
+        headers = {}
+        if stored:
+            if stored.get("etag"):
+                headers["If-None-Match"] = stored["etag"]
+            if stored.get("last_modified"):
+                headers["If-Modified-Since"] = stored["last_modified"]
+
+        response = fetch(endpoint, params, headers)
+        if response is None:
+            if stored:
+                # Better an old answer than none while OpenAlex is down or rate limiting
+                self._count("stale_served")
+                return stored["body"]
+            self._count("misses")
+            return None
+
+        if response.status_code == 304 and stored:
+            self.cache.refresh(key)
+            self._count("revalidated")
+            return stored["body"]
+
+        self._count("misses")
+        body = response.json()
+        self.put(endpoint, params, body, response.headers)
+        return body
+
+    def get_many(self, kind, ids, params, fetch):
+        """Entities of one kind ('sources', 'funders') by ID, fetched in bulk.
+
+        Fresh entities come from the cache; the rest are requested with
+        filter=openalex_id:A|B|... in batches of up to BULK_FILTER_MAX IDs, and each
+        result is stored under its single-entity key (/kind/ID + params), so bulk and
+        single lookups share entries. Returns {short_id: entity}; IDs OpenAlex doesn't
+        know are left out.
+        """
+        short_ids = list(dict.fromkeys(entity_id.split("/")[-1] for entity_id in ids))
+        found = {}
+        stale = {}
+        missing = []
+        for short_id in short_ids:
+            endpoint = f"/{kind}/{short_id}"
+            entry = self.cache.get_with_age(make_cache_key(endpoint, params)) if self.enabled else None
+            if entry is not None:
+                body = json.loads(entry[0])["body"]
+                if entry[1] <= self.ttl_seconds(endpoint):
+                    self._count("hits")
+                    found[short_id] = body
+                    continue
+                stale[short_id] = body
+            missing.append(short_id)
+
+        for start in range(0, len(missing), BULK_FILTER_MAX):
+            batch = missing[start:start + BULK_FILTER_MAX]
+            response = fetch(f"/{kind}", dict(params, filter="openalex_id:" + "|".join(batch),
+                                              per_page=len(batch)), {})
+            results = response.json().get("results", []) if response is not None and response.status_code == 200 else None
+            if results is None:
+                for short_id in batch:
+                    if short_id in stale:
+                        self._count("stale_served")
+                        found[short_id] = stale[short_id]
+                continue
+            for entity in results:
+                short_id = (entity.get("id") or "").split("/")[-1]
+                if short_id:
+                    self._count("misses")
+                    found[short_id] = entity
+                    if self.enabled:
+                        self.put(f"/{kind}/{short_id}", params, entity)
+
+        return found
+
+    def put(self, endpoint, params, body, headers=None):
+        headers = headers or {}
+        self.cache.set(make_cache_key(endpoint, params), json.dumps({
+            "body": body,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified")
+        }))
+
+    def stats(self):
+        with self._counter_lock:
+            counters = dict(self._counters)
+        counters["entries"] = self.cache.stats()["entries"]
+        return counters
+
+
+def get_openalex_cache():
+    """Return the process-wide OpenAlex cache (created on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = OpenAlexCache()
+        return _cache
+
+
+# --- Warm-up ---
+
+def _list_entities(endpoint, params, limit):
+    """Page through an OpenAlex list endpoint with cursor paging"""
+    from core.openalex_client import get_openalex_client  # imports this module
+
+    params = dict(params, per_page=min(200, limit), cursor="*")
+    results = []
+    while len(results) < limit:
+        response = get_openalex_client().get(endpoint, params, timeout=30)
+        if response is None:
+            raise RuntimeError(f"OpenAlex request failed: {endpoint}")
+        data = response.json()
+        results.extend(data.get("results", []))
+        params["cursor"] = data.get("meta", {}).get("next_cursor")
+        if not params["cursor"] or not data.get("results"):
+            break
+    return results[:limit]
+
+
+def warm_up(sources=1000, funders=500, cache=None):
+    """Preload the top sources and funders (by works count) under the keys the agents look up"""
+    cache = cache or get_openalex_cache()
+    stored = {"sources": 0, "funders": 0}
+
+    if sources:
+        print(f"Fetching top {sources} sources...")
+        for source in _list_entities("/sources", {"sort": "works_count:desc", "select": SOURCE_SELECT}, sources):
+            short_id = source["id"].split("/")[-1]
+            cache.put(f"/sources/{short_id}", {"select": SOURCE_SELECT}, source)
+            stored["sources"] += 1
+
+    if funders:
+        print(f"Fetching top {funders} funders...")
+        for funder in _list_entities("/funders", {"sort": "works_count:desc"}, funders):
+            short_id = funder["id"].split("/")[-1]
+            cache.put(f"/funders/{short_id}", {}, funder)
+            stored["funders"] += 1
+
+    print(f"✅ Cached {stored['sources']} sources and {stored['funders']} funders ({cache.stats()['entries']} entries total)")
+    return stored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python workflow.py warm-openalex",
+        description="Preload the OpenAlex cache with the most prolific sources and funders."
+    )
+    parser.add_argument("--sources", type=int, default=1000, help="Number of sources to preload (default: 1000)")
+    parser.add_argument("--funders", type=int, default=500, help="Number of funders to preload (default: 500)")
+    args = parser.parse_args(argv)
+    warm_up(args.sources, args.funders)
+    return 0
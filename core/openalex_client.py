@@ -0,0 +1,172 @@
+"""Shared OpenAlex HTTP client for the journal, funding and similar-works agents.
+
+One keep-alive requests.Session for the whole process, with mailto set once so
+every request lands in the polite pool. Requests from any thread are admitted
+against a requests-per-second budget (OPENALEX_RPS, OpenAlex allows 10/s); a 429
+pauses all requests for a jittered, exponentially growing backoff (or the
+server's Retry-After); connection errors and timeouts are retried by the
+calling thread with the same backoff. Agents no longer sleep between calls or
+retry on their own. openalex_map() runs independent lookups concurrently.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.openalex_cache import OPENALEX_BASE, get_openalex_cache
+from core.rate_limiter import TokenBucket, retry_after_from_headers
+
+load_dotenv()
+
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class OpenAlexClient:
+    """Thread-safe, rate-limited OpenAlex GETs over one pooled session"""
+
+    def __init__(self, rps=None, max_workers=None, email=None, timeout=15):
+        self.rps = float(rps if rps is not None else os.getenv("OPENALEX_RPS", "10"))
+        self.max_workers = int(max_workers if max_workers is not None else os.getenv("OPENALEX_MAX_WORKERS", "8"))
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(self.max_workers, 1))
+        self.session.mount("https://", adapter)
+        email = os.getenv("OPENALEX_EMAIL", "") if email is None else email
+        if email:
+            self.session.params = {"mailto": email}
+
+        # Capacity of one second's budget: short bursts allowed, sustained rate capped
+        self._bucket = TokenBucket(self.rps, 1.0) if self.rps > 0 else None
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self._backoff_level = 0
+
+        self._requests = 0
+        self._rate_limited = 0
+        self._network_errors = 0
+        self._total_wait = 0.0
+
+    def _admit(self):
+        """Block until the shared budget allows one more request"""
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(0.0, self._blocked_until - now)
+                if self._bucket:
+                    wait = max(wait, self._bucket.wait_time(1, now))
+                if wait <= 0:
+                    if self._bucket:
+                        self._bucket.consume(1, now)
+                    self._requests += 1
+                    self._total_wait += now - start
+                    return
+            time.sleep(wait)
+
+    @staticmethod
+    def _backoff_delay(level):
+        """Jittered exponential backoff: uniform in [ceiling / 2, ceiling]"""
+        ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** level)
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _on_rate_limited(self, response):
+        """Pause every caller: server's Retry-After, else jittered exponential backoff"""
+        with self._lock:
+            self._rate_limited += 1
+            delay = retry_after_from_headers(response.headers)
+            if delay is None:
+                delay = self._backoff_delay(self._backoff_level)
+            self._backoff_level += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            return delay
+
+    def get(self, endpoint, params=None, headers=None, timeout=None):
+        """GET an OpenAlex endpoint; returns the response (200/304) or None"""
+        for attempt in range(MAX_RETRIES):
+            self._admit()
+            try:
+                response = self.session.get(f"{OPENALEX_BASE}{endpoint}", params=params, headers=headers,
+                                            timeout=timeout or self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # Transient: only this caller waits, the others may still get through
+                with self._lock:
+                    self._network_errors += 1
+                if attempt + 1 == MAX_RETRIES:
+                    print(f"   ⚠️  OpenAlex API error after {MAX_RETRIES} attempts: {e}")
+                    return None
+                delay = self._backoff_delay(attempt)
+                print(f"   ⚠️  OpenAlex network error ({type(e).__name__}), retrying in {delay:.1f}s... "
+                      f"({attempt + 1}/{MAX_RETRIES})")
+                time.sleep(delay)
+                continue
+            except requests.exceptions.RequestException as e:
+                print(f"   ⚠️  OpenAlex API error: {e}")
+                return None
+
+            if response.status_code == 429:
+                delay = self._on_rate_limited(response)
+                print(f"   ⚠️  Rate limited by OpenAlex, pausing requests for {delay:.1f}s... ({attempt + 1}/{MAX_RETRIES})")
+                continue
+
+            with self._lock:
+                self._backoff_level = 0
+            if response.status_code in (200, 304):
+                return response
+            print(f"   ⚠️  OpenAlex API error: HTTP {response.status_code} for {endpoint}")
+            return None
+
+        print("   ⚠️  OpenAlex API: rate limit exceeded after retries")
+        return None
+
+    def map(self, fn, items):
+        """[fn(item) for item in items], run concurrently on up to max_workers threads"""
+        items = list(items)
+        if len(items) <= 1 or self.max_workers <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as pool:
+            return list(pool.map(fn, items))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "rate_limited_responses": self._rate_limited,
+                "network_errors": self._network_errors,
+                "avg_wait_seconds": round(self._total_wait / self._requests, 3) if self._requests else 0.0
+            }
+
+
+def get_openalex_client():
+    """Return the process-wide OpenAlex client (created on first use)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OpenAlexClient()
+        return _client
+
+
+def openalex_get(endpoint, params, headers=None):
+    """GET through the shared client; the fetch function handed to OpenAlexCache"""
+    return get_openalex_client().get(endpoint, params, headers)
+
+
+def openalex_request(endpoint, params=None):
+    """OpenAlex JSON for endpoint + params, served from the shared disk cache when fresh"""
+    return get_openalex_cache().get_or_fetch(endpoint, dict(params or {}), openalex_get)
+
+
+def openalex_map(fn, items):
+    """Run independent OpenAlex lookups concurrently within the shared rate budget"""
+    return get_openalex_client().map(fn, items)
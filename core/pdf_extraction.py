@@ -0,0 +1,104 @@
+from concurrent.futures import ProcessPoolExecutor
+from dotenv import load_dotenv
+import multiprocessing
+import os
+import time
+
+load_dotenv()
+
+BACKENDS = ("pypdf", "pymupdf")
+
+# Below this many pages a worker pool costs more to start than it saves
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))
+
+
+def default_backend():
+    """PDF_TEXT_BACKEND=pymupdf|pypdf (pymupdf reads text from the handle figures use anyway; pypdf keeps
+    the historical text layout)"""
+    backend = (os.getenv("PDF_TEXT_BACKEND") or "pymupdf").lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown PDF_TEXT_BACKEND '{backend}' (expected one of {', '.join(BACKENDS)})")
+    return backend
+
+
+def default_workers():
+    """PDF_EXTRACT_WORKERS (default: CPU count, at most 4; 1 disables the process pool)"""
+    workers = os.getenv("PDF_EXTRACT_WORKERS")
+    if workers:
+        return max(1, int(workers))
+    return min(4, os.cpu_count() or 1)
+
+
+def process_pool(max_workers=None):
+    """ProcessPoolExecutor whose workers are spawned, not forked.
+
+    Callers run inside threaded servers (Streamlit) and thread pools; forking a
+    process while other threads hold locks can deadlock the child.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def count_pages(pdf_path, backend):
+    if backend == "pymupdf":
+        import fitz
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    from pypdf import PdfReader
+    return len(PdfReader(pdf_path).pages)
+
+
+def extract_page_range(pdf_path, start, stop, backend):
+    """Text of pages [start, stop) as one string; module-level so it can run in a worker process"""
+    if backend == "pymupdf":
+        import fitz
+        with fitz.open(pdf_path) as doc:
+            return "".join(doc[i].get_text() for i in range(start, stop))
+    from pypdf import PdfReader
+    reader = PdfReader(pdf_path)
+    return "".join(reader.pages[i].extract_text() for i in range(start, stop))
+
+
+def page_ranges(page_count, chunks):
+    """Split [0, page_count) into at most `chunks` contiguous, nearly equal ranges"""
+    chunks = max(1, min(chunks, page_count))
+    size, extra = divmod(page_count, chunks)
+    ranges = []
+    start = 0
+    for i in range(chunks):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def extract_pdf_text(pdf_path, backend=None, workers=None):
+    """Extract the full text of a PDF; returns (text, page_count).
+
+    Large PDFs are split into page ranges that are extracted in a process pool
+    (text extraction is CPU-bound, so threads would not help). Pass workers=1 when
+    already running inside a worker process.
+    """
+    backend = backend or default_backend()
+    workers = workers or default_workers()
+    page_count = count_pages(pdf_path, backend)
+
+    if workers == 1 or page_count < PARALLEL_MIN_PAGES:
+        return extract_page_range(pdf_path, 0, page_count, backend), page_count
+
+    ranges = page_ranges(page_count, workers)
+    with process_pool(len(ranges)) as pool:
+        parts = pool.map(
+            extract_page_range,
+            [pdf_path] * len(ranges),
+            [start for start, _ in ranges],
+            [stop for _, stop in ranges],
+            [backend] * len(ranges)
+        )
+        return "".join(parts), page_count
+
+
+def timed_extract(pdf_path):
+    """(text, page_count, seconds) for one PDF in a single process; a pool task for batch mode"""
+    start = time.perf_counter()
+    full_text, page_count = extract_pdf_text(pdf_path, workers=1)
+    return full_text, page_count, time.perf_counter() - start
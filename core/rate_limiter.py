@@ -0,0 +1,312 @@
+from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from dotenv import load_dotenv
+from email.utils import parsedate_to_datetime
+from types import SimpleNamespace
+import json
+import math
+import os
+import random
+import threading
+import time
+
+load_dotenv()
+
+# Rough prompt-token estimate: ~4 characters per token for English text
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+# A high-detail image is at most 4 tiles at 1024px: 85 + 4 * 170 tokens
+IMAGE_TOKENS = 765
+IMAGE_BASE_TOKENS = 85
+IMAGE_TILE_TOKENS = 170
+
+
+class TokenBucket:
+    """Bucket of `capacity` units refilled continuously over `period` seconds (not thread-safe on its own)"""
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.period = period
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        self.level = min(self.capacity, self.level + elapsed * self.capacity / self.period)
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available"""
+        self._refill(now)
+        missing = amount - self.level
+        return 0.0 if missing <= 0 else missing * self.period / self.capacity
+
+    def consume(self, amount, now):
+        self._refill(now)
+        self.level -= amount
+
+    def refund(self, amount, now):
+        """Give back (or, if negative, charge) units after the real cost is known"""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+def image_tokens(width, height, detail="high"):
+    """Vision input tokens of one image: fit into 2048x2048, shortest side down to 768, 170 per 512px tile"""
+    if detail == "low":
+        return IMAGE_BASE_TOKENS
+    width, height = max(width, 1), max(height, 1)
+    scale = min(1.0, 2048 / max(width, height))
+    scale *= min(1.0, 768 / (min(width, height) * scale))
+    tiles = math.ceil(width * scale / 512) * math.ceil(height * scale / 512)
+    return IMAGE_BASE_TOKENS + IMAGE_TILE_TOKENS * tiles
+
+
+def estimate_request_tokens(request, default_completion_tokens=1000):
+    """Estimate how many tokens a chat completion counts against the TPM quota.
+
+    Azure charges prompt tokens plus max_tokens up front, so the completion budget
+    is included.
+    """
+    tokens = 0
+    for message in request.get("messages", []):
+        tokens += MESSAGE_OVERHEAD_TOKENS
+        content = message.get("content")
+        if isinstance(content, str):
+            tokens += len(content) // CHARS_PER_TOKEN
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "image_url":
+                    tokens += IMAGE_TOKENS
+                else:
+                    tokens += len(part.get("text", "")) // CHARS_PER_TOKEN
+    if request.get("response_format"):
+        tokens += len(json.dumps(request["response_format"])) // CHARS_PER_TOKEN
+    tokens += request.get("max_tokens") or default_completion_tokens
+    return tokens
+
+
+def retry_after_from_headers(headers):
+    """Seconds from Retry-After (delta or HTTP date) or retry-after-ms, if the server sent one"""
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def retry_after_seconds(error):
+    """Read Retry-After (or retry-after-ms) from a rate-limit error, if the server sent one"""
+    response = getattr(error, "response", None)
+    return retry_after_from_headers(getattr(response, "headers", None) or {})
+
+
+class LLMRateLimiter:
+    """Process-wide admission control for Azure OpenAI requests.
+
+    Requests are admitted first-come first-served against a requests-per-minute and a
+    tokens-per-minute budget and an in-flight cap (0 disables each); the rest queue.
+    A 429 pauses all admissions until the server's Retry-After has passed.
+    """
+
+    def __init__(self, rpm=0, tpm=0, max_concurrency=0):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_concurrency = max_concurrency
+        self._in_flight = 0
+        # Azure enforces RPM in 10-second windows, TPM per minute
+        self._request_bucket = TokenBucket(max(rpm / 6, 1), 10.0) if rpm else None
+        self._token_bucket = TokenBucket(tpm, 60.0) if tpm else None
+        self._cond = threading.Condition()
+        self._next_ticket = 0
+        self._serving = 0
+        self._abandoned = set()
+        self._blocked_until = 0.0
+
+        self._queue_depth = 0
+        self._max_queue_depth = 0
+        self._admitted = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._rate_limited = 0
+
+    def _wait_time(self, tokens, now):
+        wait = max(0.0, self._blocked_until - now)
+        if self._request_bucket:
+            wait = max(wait, self._request_bucket.wait_time(1, now))
+        if self._token_bucket:
+            wait = max(wait, self._token_bucket.wait_time(tokens, now))
+        return wait
+
+    def _advance(self):
+        self._serving += 1
+        while self._serving in self._abandoned:
+            self._abandoned.discard(self._serving)
+            self._serving += 1
+
+    def acquire(self, tokens):
+        """Block until the request may be sent; returns the estimate actually charged"""
+        if self._token_bucket:
+            tokens = min(tokens, self._token_bucket.capacity)
+        start = time.monotonic()
+
+        with self._cond:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self._queue_depth += 1
+            self._max_queue_depth = max(self._max_queue_depth, self._queue_depth)
+            admitted = False
+            try:
+                while True:
+                    if ticket == self._serving:
+                        if self.max_concurrency and self._in_flight >= self.max_concurrency:
+                            self._cond.wait()
+                            continue
+                        now = time.monotonic()
+                        wait = self._wait_time(tokens, now)
+                        if wait <= 0:
+                            break
+                        self._cond.wait(timeout=wait)
+                    else:
+                        self._cond.wait()
+
+                now = time.monotonic()
+                if self._request_bucket:
+                    self._request_bucket.consume(1, now)
+                if self._token_bucket:
+                    self._token_bucket.consume(tokens, now)
+                self._in_flight += 1
+                admitted = True
+                self._advance()
+            finally:
+                self._queue_depth -= 1
+                if not admitted:
+                    if ticket == self._serving:
+                        self._advance()
+                    else:
+                        self._abandoned.add(ticket)
+                self._cond.notify_all()
+
+            waited = time.monotonic() - start
+            self._admitted += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        if waited > 1:
+            print(f"   ⏳ LLM rate limit: waited {waited:.1f}s (queue depth {self._queue_depth})")
+        return tokens
+
+    def release(self):
+        """Mark an admitted request as finished (frees an in-flight slot)"""
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def set_max_concurrency(self, max_concurrency):
+        with self._cond:
+            self.max_concurrency = max_concurrency
+            self._cond.notify_all()
+
+    def record_usage(self, estimated_tokens, actual_tokens):
+        """Correct the TPM bucket once the real token usage is known"""
+        if not self._token_bucket or actual_tokens is None:
+            return
+        with self._cond:
+            self._token_bucket.refund(estimated_tokens - actual_tokens, time.monotonic())
+            self._cond.notify_all()
+
+    def record_rate_limited(self, retry_after):
+        """Pause all admissions after a 429"""
+        with self._cond:
+            self._rate_limited += 1
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+    def metrics(self):
+        with self._cond:
+            return {
+                "queue_depth": self._queue_depth,
+                "in_flight": self._in_flight,
+                "max_queue_depth": self._max_queue_depth,
+                "requests_admitted": self._admitted,
+                "total_wait_seconds": round(self._total_wait, 2),
+                "avg_wait_seconds": round(self._total_wait / self._admitted, 2) if self._admitted else 0.0,
+                "max_wait_seconds": round(self._max_wait, 2),
+                "rate_limited_responses": self._rate_limited
+            }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide limiter (AZURE_OPENAI_RPM / AZURE_OPENAI_TPM / LLM_MAX_CONCURRENCY)"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = LLMRateLimiter(
+                rpm=int(os.getenv("AZURE_OPENAI_RPM") or 0),
+                tpm=int(os.getenv("AZURE_OPENAI_TPM") or 0),
+                max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY") or 0)
+            )
+        return _limiter
+
+
+class RateLimitedChatClient:
+    """Wraps an OpenAI client so chat.completions.create passes through LLMRateLimiter.
+
+    Retries 429s (honoring Retry-After) and transient connection/5xx errors; the
+    wrapped client should be created with max_retries=0 so retries happen only here.
+    """
+
+    def __init__(self, client, limiter=None, max_retries=None):
+        self._client = client
+        self.limiter = limiter or get_rate_limiter()
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "4")) if max_retries is None else max_retries
+        self.default_completion_tokens = int(os.getenv("LLM_DEFAULT_COMPLETION_TOKENS", "1000"))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create_completion))
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _create_completion(self, **kwargs):
+        estimate = estimate_request_tokens(kwargs, self.default_completion_tokens)
+
+        for attempt in range(self.max_retries + 1):
+            charged = self.limiter.acquire(estimate)
+            try:
+                response = self._client.chat.completions.create(**kwargs)
+            except RateLimitError as e:
+                self.limiter.release()
+                wait = retry_after_seconds(e)
+                if wait is None:
+                    wait = 2 ** (attempt + 1)
+                self.limiter.record_rate_limited(wait)
+                if attempt == self.max_retries:
+                    raise
+                print(f"   ⚠️  Azure OpenAI rate limited (429), retrying in {wait:.1f}s... ({attempt + 1}/{self.max_retries})")
+                continue
+            except (APIConnectionError, APITimeoutError, InternalServerError) as e:
+                self.limiter.release()
+                if attempt == self.max_retries:
+                    raise
+                wait = min(2 ** attempt, 30) + random.uniform(0, 1)
+                print(f"   ⚠️  Azure OpenAI error ({type(e).__name__}), retrying in {wait:.1f}s... ({attempt + 1}/{self.max_retries})")
+                time.sleep(wait)
+                continue
+            except BaseException:
+                self.limiter.release()
+                raise
+
+            self.limiter.release()
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.limiter.record_usage(charged, usage.total_tokens)
+            return response
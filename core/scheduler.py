@@ -0,0 +1,120 @@
+import asyncio
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AgentNode:
+    """A single step in the agent graph: a callable plus the steps it depends on"""
+
+    def __init__(self, name, fn, depends_on=(), fallback=None):
+        self.name = name
+        self.fn = fn
+        self.depends_on = tuple(depends_on)
+        # Called as fallback(exception) when fn raises; None re-raises
+        self.fallback = fallback
+
+
+class AgentScheduler:
+    """Runs an agent graph on an asyncio loop, starting each node as soon as its dependencies finish.
+
+    Nodes are plain (blocking) callables, executed on a thread pool. Each node receives the
+    results of its dependencies as keyword arguments named after those dependencies.
+    """
+
+    def __init__(self, nodes, max_workers=None):
+        self.nodes = {}
+        for node in nodes:
+            if node.name in self.nodes:
+                raise ValueError(f"Duplicate agent node: {node.name}")
+            self.nodes[node.name] = node
+        self.max_workers = max_workers or max(len(self.nodes), 1)
+        self.results = {}
+        self.timings = {}
+        self._validate()
+
+    def _validate(self):
+        """Reject unknown dependencies and cycles before anything runs"""
+        for node in self.nodes.values():
+            for dep in node.depends_on:
+                if dep not in self.nodes:
+                    raise ValueError(f"Agent node '{node.name}' depends on unknown node '{dep}'")
+
+        remaining = {name: set(node.depends_on) for name, node in self.nodes.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Agent graph has a cycle between: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    async def run_async(self, on_complete=None):
+        """Execute the graph; on_complete(name, result) is called as each node finishes"""
+        loop = asyncio.get_running_loop()
+        self.results = {}
+        self.timings = {}
+        tasks = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+
+            async def run_node(node):
+                if node.depends_on:
+                    await asyncio.gather(*(tasks[dep] for dep in node.depends_on))
+                deps = {dep: self.results[dep] for dep in node.depends_on}
+
+                start = time.perf_counter()
+                try:
+                    result = await loop.run_in_executor(executor, functools.partial(node.fn, **deps))
+                except Exception as e:
+                    if node.fallback is None:
+                        raise
+                    print(f"Agent {node.name} failed: {e}")
+                    result = node.fallback(e)
+                self.timings[node.name] = time.perf_counter() - start
+                self.results[node.name] = result
+
+                if on_complete:
+                    on_complete(node.name, result)
+                return result
+
+            for node in self.nodes.values():
+                tasks[node.name] = asyncio.create_task(run_node(node))
+            await asyncio.gather(*tasks.values())
+
+        return self.results
+
+    def iter_completed(self):
+        """Run the graph on a background event loop, yielding (name, result) as nodes finish"""
+        events = queue.Queue()
+        done = object()
+
+        def worker():
+            try:
+                asyncio.run(self.run_async(on_complete=lambda name, result: events.put((name, result))))
+            except BaseException as e:
+                events.put(e)
+            else:
+                events.put(done)
+
+        thread = threading.Thread(target=worker, name="agent-scheduler", daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = events.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            thread.join()
+
+    def run(self):
+        """Run the graph to completion and return {name: result}"""
+        for _ in self.iter_completed():
+            pass
+        return self.results
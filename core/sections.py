@@ -0,0 +1,244 @@
+import re
+
+SECTION_KEYS = ['title', 'abstract', 'introduction', 'methods', 'results', 'discussion', 'conclusion']
+BODY_SECTIONS = SECTION_KEYS[1:]
+PAPER_TYPES = ("original_research", "review", "meta_analysis", "case_study", "other")
+
+# Anchors are matched on their first words only; the model rarely copies more verbatim
+ANCHOR_WORDS = 8
+
+
+def anchor_pattern(anchor):
+    """Regex for an anchor copied from the text: case-insensitive, any whitespace between words"""
+    words = re.findall(r"\S+", anchor or "")[:ANCHOR_WORDS]
+    if not words:
+        return None
+    return re.compile(r"\s+".join(re.escape(w) for w in words), re.IGNORECASE)
+
+
+def locate_anchor(full_text, anchor, start=0):
+    """Character offset of `anchor` at or after `start`, or None"""
+    pattern = anchor_pattern(anchor)
+    if pattern is None:
+        return None
+    match = pattern.search(full_text, start)
+    return match.start() if match else None
+
+
+def locate_outline(full_text, outline, start=0, end=None):
+    """Section boundaries for an outline of start anchors.
+
+    outline: [{"categories": [...], "start": "first words of the section"}, ...] in
+    document order. Anchors are searched in order from `start`, so a heading that
+    also appears in the table of contents cannot pull a section backwards; anchors
+    found at or beyond `end` are dropped.
+
+    Returns (located, missing): located is [(offset, categories), ...]; missing
+    lists the body categories of anchors that could not be found. Slicing around
+    such a gap would let the previous section absorb the missing one (Methods
+    swallowing Results), so callers should not trust the result then.
+    """
+    located = []
+    missing = []
+    position = start
+    for entry in outline:
+        categories = [c for c in entry.get("categories") or [] if c in BODY_SECTIONS]
+        offset = locate_anchor(full_text, entry.get("start", ""), position)
+        if offset is None or (end is not None and offset >= end):
+            missing.extend(categories)
+            continue
+        located.append((offset, categories))
+        position = offset + 1
+    return located, missing
+
+
+def merge_boundaries(*boundary_lists):
+    """Stitch boundaries found in overlapping windows: sorted by offset, duplicates dropped"""
+    merged = {}
+    for boundaries in boundary_lists:
+        for offset, categories in boundaries:
+            merged.setdefault(offset, categories)
+    return sorted(merged.items())
+
+
+def sections_from_boundaries(full_text, boundaries):
+    """Each section runs from its boundary to the next one; entries with no categories
+    (references, acknowledgements, ...) only mark where the previous section ends.
+    Returns a dict with every body section key ("" if absent).
+    """
+    sections = {key: "" for key in BODY_SECTIONS}
+    for i, (offset, categories) in enumerate(boundaries):
+        end = boundaries[i + 1][0] if i + 1 < len(boundaries) else len(full_text)
+        text = full_text[offset:end].strip()
+        for category in categories:
+            # Split sections (e.g. "Methods" + "Statistical Analysis") are joined
+            sections[category] = f"{sections[category]}\n\n{text}" if sections[category] else text
+    return sections
+
+
+def slice_sections(full_text, outline):
+    """Cut sections out of `full_text` using an outline of start anchors.
+
+    Returns (sections, matched, total, missing) with missing as in locate_outline().
+    """
+    located, missing = locate_outline(full_text, outline)
+    return sections_from_boundaries(full_text, located), len(located), len(outline), missing
+
+
+# --- Heuristic heading detection (no LLM) ---
+
+# Checked in order, so combined headings come before their parts
+HEADING_KEYWORDS = [
+    (r"results? and discussions?", ["results", "discussion"]),
+    (r"discussions? and conclusions?", ["discussion", "conclusion"]),
+    (r"abstract", ["abstract"]),
+    (r"introduction|background", ["introduction"]),
+    (r"(?:materials?|patients|subjects|data) and methods|methods?|methodology|experimental (?:design|setup|procedures?)"
+     r"|study design", ["methods"]),
+    (r"results?|findings|experimental results|experiments", ["results"]),
+    (r"discussions?", ["discussion"]),
+    (r"conclusions?|concluding remarks|summary and conclusions?", ["conclusion"]),
+    # Back matter only ends the previous section
+    (r"references|bibliography|literature cited|acknowledge?ments?|appendi(?:x|ces)|funding"
+     r"|conflicts? of interests?|declarations?|author contributions|supplementary (?:material|information)"
+     r"|data availability(?: statement)?|abbreviations|keywords|key words", []),
+]
+HEADING_PATTERN = re.compile(
+    r"^(?:(?:\d+(?:\.\d+)*|[IVX]+|[A-H])[.)]?\s+)?(" + "|".join(f"(?:{k})" for k, _ in HEADING_KEYWORDS) + r")\s*[:.]?$",
+    re.IGNORECASE
+)
+_KEYWORD_PATTERNS = [(re.compile(f"^(?:{k})$", re.IGNORECASE), c) for k, c in HEADING_KEYWORDS]
+
+# IMRaD slots a conventionally structured paper is expected to have
+EXPECTED_SLOTS = [("abstract",), ("introduction",), ("methods",), ("results",), ("discussion", "conclusion")]
+MIN_SECTION_CHARS = {"abstract": 100}
+DEFAULT_MIN_SECTION_CHARS = 200
+
+
+def _is_bold(span):
+    return bool(span.get("flags", 0) & 16) or "bold" in span.get("font", "").lower()
+
+
+def _heading_categories(text):
+    """Categories for a heading line, or None if the line isn't a known section heading"""
+    match = HEADING_PATTERN.match(" ".join(text.split()))
+    if not match:
+        return None
+    keyword = match.group(1)
+    for pattern, categories in _KEYWORD_PATTERNS:
+        if pattern.match(keyword):
+            return categories
+    return None
+
+
+def detect_sections(document):
+    """Split a PaperDocument into sections from heading typography and keywords.
+
+    A line is a heading when it consists only of a (numbered) section keyword and is
+    set bolder, larger or in capitals compared to the body text; "Abstract" may also
+    start a paragraph. Structured-abstract labels ("Methods: We ...") share a line
+    with text and are therefore not taken as headings.
+
+    Returns (sections, paper_type, confidence); confidence in [0, 1] rates how well
+    the result matches a conventional IMRaD layout. paper_type is only a keyword
+    guess (meta-analysis, review without Methods, else original research); the
+    workflow asks the LLM and keeps the guess as fallback.
+    """
+    lines = [spans for page in range(document.page_count) for spans in document.page_lines(page)]
+    if not lines:
+        return {key: "" for key in SECTION_KEYS}, "original_research", 0.0
+
+    # Body font size = size carrying the most characters
+    size_chars = {}
+    for spans in lines:
+        for span in spans:
+            size = round(span["size"], 1)
+            size_chars[size] = size_chars.get(size, 0) + len(span["text"].strip())
+    body_size = max(size_chars, key=size_chars.get)
+
+    title = _detect_title(document, body_size)
+
+    parts = {key: [] for key in BODY_SECTIONS}
+    order = []
+    current = []
+    for spans in lines:
+        text = "".join(span["text"] for span in spans).strip()
+        if not text:
+            continue
+        first = spans[0]
+        styled = (first["size"] >= body_size * 1.1 or _is_bold(first)
+                  or (first["text"].strip().isupper() and len(first["text"].strip()) > 3))
+
+        categories = _heading_categories(text) if styled and len(text) <= 60 else None
+        remainder = ""
+        if categories is None and styled:
+            # "Abstract" set as a run-in heading: "Abstract  We study ..."
+            label = first["text"].strip()
+            if _heading_categories(label) == ["abstract"] and "abstract" not in order:
+                categories = ["abstract"]
+                remainder = text[len(first["text"]):].strip()
+
+        if categories is not None:
+            current = []
+            for category in categories:
+                parts[category].append(current)
+            order.append(categories[0] if categories else "")
+            if remainder:
+                current.append(remainder)
+            continue
+        current.append(text)
+
+    sections = {key: "\n\n".join("\n".join(chunk) for chunk in chunks).strip() for key, chunks in parts.items()}
+    sections["title"] = title
+
+    paper_type = _guess_paper_type(title, sections)
+    confidence = _confidence(sections, order, title)
+    return sections, paper_type, confidence
+
+
+def _detect_title(document, body_size):
+    """Largest text on the first page, joined across consecutive lines of that size"""
+    if not document.page_count:
+        return ""
+    lines = document.page_lines(0)
+    sizes = [max(span["size"] for span in spans) for spans in lines]
+    if not sizes or max(sizes) <= body_size * 1.2:
+        return ""
+    title_size = max(sizes)
+    title_lines = []
+    for spans, size in zip(lines, sizes):
+        if abs(size - title_size) < 0.5:
+            title_lines.append("".join(span["text"] for span in spans).strip())
+        elif title_lines:
+            break
+    return " ".join(line for line in title_lines if line)
+
+
+def _guess_paper_type(title, sections):
+    """Keyword fallback; never yields case_study/other and misses systematic reviews"""
+    head = f"{title} {sections.get('abstract', '')[:1500]}".lower()
+    if "meta-analysis" in head or "meta analysis" in head:
+        return "meta_analysis"
+    if not sections.get("methods") and re.search(r"\b(review|survey)\b", title.lower()):
+        return "review"
+    return "original_research"
+
+
+def _confidence(sections, order, title):
+    present = [any(sections[key] for key in slot) for slot in EXPECTED_SLOTS]
+    score = sum(present) / len(EXPECTED_SLOTS)
+
+    # Headings should come in IMRaD order
+    ranks = {key: i for i, slot in enumerate(EXPECTED_SLOTS) for key in slot}
+    seen = [ranks[key] for key in order if key in ranks]
+    if seen != sorted(seen):
+        score *= 0.6
+
+    # A heading with almost nothing under it usually means a false positive (e.g. a TOC line)
+    for key in BODY_SECTIONS:
+        if sections[key] and len(sections[key]) < MIN_SECTION_CHARS.get(key, DEFAULT_MIN_SECTION_CHARS):
+            score *= 0.8
+
+    if not title:
+        score *= 0.9
+    return round(score, 2)
@@ -0,0 +1,209 @@
+"""Pooled, cached Semantic Scholar Graph API client for the Citation Hunter.
+
+Searches are cached on disk keyed by query + fields + limit, paper details per
+paper ID + fields, so re-analyzing a paper does not hit the API again. Details
+for several papers (the Citation Hunter's reranked top papers) are fetched with
+one POST /paper/batch. Requests share one keep-alive session and a
+requests-per-second budget (SEMANTIC_SCHOLAR_RPS, default 1/s). The default
+suits both the shared unauthenticated pool and a newly issued API key, which is
+also limited to 1 request/s; raise it only when the key has been granted more.
+At 1/s concurrent searches are serialized by the budget. 429s back off with
+jitter or the server's Retry-After; connection errors and timeouts are retried
+by the calling thread with the same backoff.
+"""
+
+from dotenv import load_dotenv
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from core.disk_cache import SQLiteCache, CACHE_DIR
+from core.rate_limiter import TokenBucket, retry_after_from_headers
+
+load_dotenv()
+
+SEMANTIC_SCHOLAR_API = "https://api.semanticscholar.org/graph/v1"
+SEARCH_FIELDS = "title,abstract,year,citationCount,authors"
+# Extra details fetched for the reranked top papers only
+DETAIL_FIELDS = "title,abstract,year,citationCount,venue,tldr"
+# POST /paper/batch accepts at most 500 IDs per call
+BATCH_MAX = 500
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 30.0
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def make_cache_key(kind, **parts):
+    payload = json.dumps({"kind": kind, **parts}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SemanticScholarClient:
+    """search() and get_papers() over one pooled session, in front of a SQLite cache"""
+
+    def __init__(self, cache=None, enabled=None, rps=None, api_key=None, timeout=10):
+        self.cache = cache if cache is not None else SQLiteCache(
+            os.getenv("SEMANTIC_SCHOLAR_CACHE_PATH") or os.path.join(CACHE_DIR, "semantic_scholar_cache.sqlite"),
+            max_entries=int(os.getenv("SEMANTIC_SCHOLAR_CACHE_MAX_ENTRIES", "10000")),
+            ttl_seconds=float(os.getenv("SEMANTIC_SCHOLAR_CACHE_TTL_HOURS", "168")) * 3600
+        )
+        if enabled is None:
+            enabled = os.getenv("SEMANTIC_SCHOLAR_CACHE_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+        self.enabled = enabled
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
+        api_key = os.getenv("SEMANTIC_SCHOLAR_API_KEY", "") if api_key is None else api_key
+        if api_key:
+            self.session.headers["x-api-key"] = api_key
+
+        rps = float(rps if rps is not None else os.getenv("SEMANTIC_SCHOLAR_RPS", "1"))
+        self._bucket = TokenBucket(rps, 1.0) if rps > 0 else None
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+
+        self._counters = {"hits": 0, "misses": 0, "requests": 0, "rate_limited_responses": 0,
+                          "network_errors": 0}
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _admit(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = max(0.0, self._blocked_until - now)
+                if self._bucket:
+                    wait = max(wait, self._bucket.wait_time(1, now))
+                if wait <= 0:
+                    if self._bucket:
+                        self._bucket.consume(1, now)
+                    self._counters["requests"] += 1
+                    return
+            time.sleep(wait)
+
+    @staticmethod
+    def _backoff_delay(attempt):
+        """Jittered exponential backoff: uniform in [ceiling / 2, ceiling]"""
+        ceiling = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _request(self, method, path, params=None, json_body=None):
+        """Send one API call with shared pacing, 429 and network-error backoff; returns parsed JSON or None"""
+        for attempt in range(MAX_RETRIES):
+            self._admit()
+            start = time.monotonic()
+            try:
+                response = self.session.request(method, f"{SEMANTIC_SCHOLAR_API}{path}", params=params,
+                                                json=json_body, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                # Transient: only this caller waits, the others may still get through
+                self._count("network_errors")
+                if attempt + 1 == MAX_RETRIES:
+                    print(f"⚠️  Semantic Scholar API error after {MAX_RETRIES} attempts: {e}")
+                    return None
+                delay = self._backoff_delay(attempt)
+                print(f"⚠️  Semantic Scholar network error ({type(e).__name__}), retrying in {delay:.1f}s... "
+                      f"({attempt + 1}/{MAX_RETRIES})")
+                time.sleep(delay)
+                continue
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️  Semantic Scholar API error: {e}")
+                return None
+            latency = time.monotonic() - start
+            with self._lock:
+                self._total_latency += latency
+                self._max_latency = max(self._max_latency, latency)
+
+            if response.status_code == 429:
+                delay = retry_after_from_headers(response.headers)
+                if delay is None:
+                    delay = self._backoff_delay(attempt)
+                with self._lock:
+                    self._counters["rate_limited_responses"] += 1
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+                print(f"⚠️  Rate limited by Semantic Scholar, retrying in {delay:.1f}s... ({attempt + 1}/{MAX_RETRIES})")
+                continue
+
+            if response.status_code != 200:
+                print(f"⚠️  Semantic Scholar API error: HTTP {response.status_code} for {path}")
+                return None
+            return response.json()
+
+        print("⚠️  Semantic Scholar API: rate limit exceeded after retries")
+        return None
+
+    def _cache_get(self, key):
+        value = self.cache.get(key) if self.enabled else None
+        self._count("hits" if value is not None else "misses")
+        return json.loads(value) if value is not None else None
+
+    def _cache_set(self, key, value):
+        if self.enabled:
+            self.cache.set(key, json.dumps(value, ensure_ascii=False))
+
+    def search(self, query, limit=10, fields=SEARCH_FIELDS):
+        """GET /paper/search; list of papers (empty on failure, failures are not cached)"""
+        key = make_cache_key("search", query=query, fields=fields, limit=limit)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+
+        data = self._request("GET", "/paper/search", params={"query": query, "limit": limit, "fields": fields})
+        if data is None:
+            return []
+        papers = data.get("data", [])
+        self._cache_set(key, papers)
+        return papers
+
+    def get_papers(self, paper_ids, fields=SEARCH_FIELDS):
+        """Details for many papers via POST /paper/batch; {paper_id: paper} for the IDs found"""
+        found = {}
+        missing = []
+        for paper_id in dict.fromkeys(paper_ids):
+            cached = self._cache_get(make_cache_key("paper", paper_id=paper_id, fields=fields))
+            if cached is not None:
+                found[paper_id] = cached
+            else:
+                missing.append(paper_id)
+
+        for start in range(0, len(missing), BATCH_MAX):
+            batch = missing[start:start + BATCH_MAX]
+            data = self._request("POST", "/paper/batch", params={"fields": fields}, json_body={"ids": batch})
+            if not data:
+                continue
+            # One entry per requested ID, in order; null for IDs Semantic Scholar doesn't know
+            for paper_id, paper in zip(batch, data):
+                if paper:
+                    found[paper_id] = paper
+                    self._cache_set(make_cache_key("paper", paper_id=paper_id, fields=fields), paper)
+        return found
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["avg_latency_seconds"] = round(self._total_latency / stats["requests"], 3) if stats["requests"] else 0.0
+            stats["max_latency_seconds"] = round(self._max_latency, 3)
+        return stats
+
+
+def get_semantic_scholar_client():
+    """Return the process-wide Semantic Scholar client (created on first use)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SemanticScholarClient()
+        return _client
@@ -0,0 +1,13 @@
+"""English function words skipped by the Writing Coach and the Citation Hunter."""
+
+STOPWORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'from', 'is', 'are', 'was', 'were', 'be', 'been',
+    'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
+    'could', 'should', 'may', 'might', 'can', 'shall', 'that', 'this',
+    'these', 'those', 'it', 'its', 'as', 'not', 'no', 'if', 'than',
+    'which', 'who', 'whom', 'what', 'when', 'where', 'how', 'all',
+    'each', 'both', 'more', 'most', 'other', 'some', 'such', 'only',
+    'also', 'into', 'over', 'after', 'before', 'between', 'through',
+    'during', 'about', 'their', 'our', 'we', 'they', 'them', 'there'
+})
@@ -0,0 +1,37 @@
+def _break_before(text, end, floor):
+    """End offset moved back to the last paragraph, line or sentence break in [floor, end)"""
+    for separator in ("\n\n", "\n", ". "):
+        cut = text.rfind(separator, floor, end)
+        if cut != -1:
+            return cut + len(separator)
+    return end
+
+
+def truncate_text(text, limit):
+    """First `limit` characters of text, cut at a break in the last fifth when possible"""
+    if len(text) <= limit:
+        return text
+    return text[:_break_before(text, limit, limit * 4 // 5)].rstrip()
+
+
+def split_windows(text, size, overlap=0):
+    """Split text into overlapping windows of at most `size` characters.
+
+    Returns [(start_offset, window_text), ...] covering the whole text. Window ends
+    are moved back to the nearest paragraph, line or sentence break in the last
+    fifth of the window, so cuts rarely fall mid-sentence.
+    """
+    if len(text) <= size:
+        return [(0, text)]
+
+    windows = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            end = _break_before(text, end, start + size * 4 // 5)
+        windows.append((start, text[start:end]))
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return windows
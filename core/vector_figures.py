@@ -0,0 +1,169 @@
+"""Find charts drawn as vector paths (matplotlib/ggplot PDFs in LaTeX papers) and rasterise them.
+
+get_images() only sees embedded bitmaps. Here the page's drawing commands
+(page.get_drawings()) are clustered into regions; a region counts as a figure
+when a "Figure N"/"Fig. N" caption sits right above or below it, or when it is
+dense enough to be a plot on its own. Only those clips are rendered, at a DPI
+bounded so the longer side stays within the vision input size, one at a time
+as the caller consumes them. Pages are scanned in worker processes for longer
+PDFs.
+"""
+
+from dotenv import load_dotenv
+import os
+import re
+
+import fitz  # PyMuPDF
+
+from core.pdf_extraction import default_workers, page_ranges, process_pool
+
+load_dotenv()
+
+RENDER_DPI = int(os.getenv("DATAVIZ_VECTOR_DPI", "150"))
+PARALLEL_MIN_PAGES = int(os.getenv("DATAVIZ_VECTOR_PARALLEL_MIN_PAGES", "16"))
+
+# Drawing boxes closer than this (points) belong to the same figure
+CLUSTER_GAP = 12
+# Margin around a cluster so tick labels and axis titles (text, not paths) are included
+LABEL_MARGIN = 18
+MIN_REGION_WIDTH = 100
+MIN_REGION_HEIGHT = 60
+# Paths a region needs when no caption is nearby (a bare rule or box is not a chart)
+MIN_PATHS_WITH_CAPTION = 5
+MIN_PATHS_WITHOUT_CAPTION = 40
+CAPTION_DISTANCE = 60
+
+CAPTION_PATTERN = re.compile(r"^\s*(fig\.?|figure)\s*\d+", re.IGNORECASE)
+
+
+def _merge_boxes(boxes, gap):
+    """Union boxes (x0, y0, x1, y1, count) that overlap after growing them by gap"""
+    boxes = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        result = []
+        for box in boxes:
+            for i, other in enumerate(result):
+                if (box[0] - gap <= other[2] and other[0] - gap <= box[2]
+                        and box[1] - gap <= other[3] and other[1] - gap <= box[3]):
+                    result[i] = (min(box[0], other[0]), min(box[1], other[1]),
+                                 max(box[2], other[2]), max(box[3], other[3]), box[4] + other[4])
+                    merged = True
+                    break
+            else:
+                result.append(box)
+        boxes = result
+    return boxes
+
+
+def detect_regions(page):
+    """Figure regions on a PyMuPDF page as fitz.Rect, from drawing clusters + caption positions"""
+    page_rect = page.rect
+    boxes = []
+    for drawing in page.get_drawings():
+        rect = drawing["rect"]
+        # Page frames and full-width rules (headers, footers, table lines) are layout, not data
+        if rect.width > 0.9 * page_rect.width and (rect.height > 0.9 * page_rect.height or rect.height < 2):
+            continue
+        if rect.width == 0 and rect.height == 0:
+            continue
+        boxes.append((rect.x0, rect.y0, rect.x1, rect.y1, 1))
+    if not boxes:
+        return []
+
+    captions = [fitz.Rect(block[:4]) for block in page.get_text("blocks")
+                if block[6] == 0 and CAPTION_PATTERN.match(block[4])]
+    rasters = [fitz.Rect(info["bbox"]) for info in page.get_image_info()]
+
+    regions = []
+    for x0, y0, x1, y1, count in _merge_boxes(boxes, CLUSTER_GAP):
+        region = fitz.Rect(x0, y0, x1, y1)
+        if region.width < MIN_REGION_WIDTH or region.height < MIN_REGION_HEIGHT:
+            continue
+        # Bitmaps are already picked up by get_images(); skip frames drawn around them
+        if any(abs(raster & region) > 0.5 * abs(region) for raster in rasters):
+            continue
+        has_caption = any(
+            caption.x0 < region.x1 and region.x0 < caption.x1
+            and (0 <= caption.y0 - region.y1 <= CAPTION_DISTANCE or 0 <= region.y0 - caption.y1 <= CAPTION_DISTANCE)
+            for caption in captions
+        )
+        if count < (MIN_PATHS_WITH_CAPTION if has_caption else MIN_PATHS_WITHOUT_CAPTION):
+            continue
+        region = fitz.Rect(region.x0 - LABEL_MARGIN, region.y0 - LABEL_MARGIN,
+                           region.x1 + LABEL_MARGIN, region.y1 + LABEL_MARGIN) & page_rect
+        regions.append(region)
+    return regions
+
+
+def render_region(page, region, max_dimension, dpi=RENDER_DPI):
+    """PNG bytes of one clip; DPI lowered so the longer side is at most max_dimension pixels"""
+    longest_inches = max(region.width, region.height) / 72
+    dpi = max(36, min(dpi, int(max_dimension / longest_inches)))
+    pixmap = page.get_pixmap(clip=region, dpi=dpi)
+    return pixmap.tobytes("png"), pixmap.width, pixmap.height
+
+
+def page_regions(page, page_index):
+    """detect_regions() as (page_index, region tuple) pairs; a page that fails is skipped with a warning"""
+    try:
+        return [(page_index, tuple(region)) for region in detect_regions(page)]
+    except Exception as e:
+        print(f"   ⚠️  Vector figure detection failed on page {page_index + 1}: {e}")
+        return []
+
+
+def detect_page_range(pdf_path, start, stop):
+    """[(page_index, region as tuple)] for pages [start, stop); opens its own handle, so it can run in a worker process"""
+    found = []
+    with fitz.open(pdf_path) as doc:
+        for page_index in range(start, stop):
+            found.extend(page_regions(doc[page_index], page_index))
+    return found
+
+
+def _detected_regions(document, workers):
+    """Yield (page_index, region) in page order.
+
+    Short PDFs (or one worker) are scanned page by page on the document's own
+    open handle; only the worker processes of the parallel path reopen the file.
+    """
+    page_count = document.page_count
+    if workers == 1 or page_count < PARALLEL_MIN_PAGES:
+        for page_index in range(page_count):
+            yield from document.vector_regions(page_index)
+        return
+
+    ranges = page_ranges(page_count, workers)
+    with process_pool(len(ranges)) as pool:
+        futures = [pool.submit(detect_page_range, document.path, start, stop) for start, stop in ranges]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # Consumer stopped early: don't wait for ranges it will never read
+            for future in futures:
+                future.cancel()
+
+
+def iter_vector_figures(document, max_dimension, dpi=RENDER_DPI, workers=None):
+    """Yield rendered vector figures of a PaperDocument in page order, one clip at a time.
+
+    Region detection (the expensive get_drawings() pass) runs page-parallel in
+    worker processes for longer PDFs, but only bounding boxes come back; each
+    clip is rendered from the document's handle when the consumer asks for it,
+    so at most one rendered image is alive and a consumer that stops early
+    renders nothing more.
+    """
+    workers = workers or default_workers()
+    for page_index, region in _detected_regions(document, workers):
+        image_bytes, width, height = document.render_clip(page_index, region, max_dimension, dpi)
+        yield {
+            "page": page_index + 1,
+            "bbox": region,
+            "image": image_bytes,
+            "ext": "png",
+            "width": width,
+            "height": height
+        }
@@ -417,8 +417,8 @@ Each figure is assessed on:
 """,
         "how_it_works": [
             ("Step 1", "PyMuPDF extracts images from PDF pages"),
-            ("Step 2", "Filter: min 50px, max 1024px, aspect ratio &lt; 10 (removes icons, separators)"),
-            ("Step 3", "Resize large images (LANCZOS), encode as base64"),
+            ("Step 2", "Filter on image metadata before extracting: min 50px, aspect ratio &lt; 10 (removes icons, separators)"),
+            ("Step 3", "Resize large images (JPEG draft decode + LANCZOS); base64 is built per request and freed after it"),
             ("Step 4", "GPT-4.1 Vision analyzes each figure individually"),
             ("Step 5", "Separate LLM call analyzes captions and references in the text"),
             ("Step 6", "Synthesis: average scores, common patterns, best practice violations"),
@@ -835,9 +835,9 @@ if selected_agent == AGENT_NAV[0]:
         <div class="arch-box">
             <h4>Analysis Pipeline</h4>
             <p>When you upload a PDF, the Paper Analyzer runs a multi-step pipeline:</p>
-            <div class="pipeline-step"><b>Step 1:</b> PDF text extraction (pypdf)</div>
-            <div class="pipeline-step"><b>Step 2:</b> Section detection &mdash; LLM identifies Abstract, Introduction, Methods, Results, Discussion, Conclusion</div>
-            <div class="pipeline-step"><b>Step 3:</b> Paper type classification &mdash; original research, review, meta-analysis, or case study</div>
+            <div class="pipeline-step"><b>Step 1:</b> PDF text extraction (PyMuPDF)</div>
+            <div class="pipeline-step"><b>Step 2:</b> Section detection &mdash; Abstract, Introduction, Methods, Results, Discussion, Conclusion are found from the paper&rsquo;s headings; when the headings don&rsquo;t match confidently, the LLM identifies them instead</div>
+            <div class="pipeline-step"><b>Step 3:</b> Paper type classification &mdash; original research, review, meta-analysis, or case study (a small LLM call on the heading path, part of the section call otherwise)</div>
             <div class="pipeline-step"><b>Step 4:</b> 8 specialized agents analyze the paper in parallel/sequence</div>
             <div class="pipeline-step"><b>Step 5:</b> Results aggregated into an interactive dashboard &amp; downloadable report</div>
         </div>
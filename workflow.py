@@ -1,13 +1,22 @@
-from openai import AzureOpenAI
+from core.llm_client import create_llm_client
+from core.rate_limiter import get_rate_limiter
+from core.openalex_cache import get_openalex_cache
+from core.openalex_client import get_openalex_client
+from core.semantic_scholar import get_semantic_scholar_client
 from agents.methodology import MethodologyCritic
 from agents.results import ResultsSynthesizer
 from agents.citations import CitationHunter
 from agents.plagiarism import PlagiarismDetector
 from agents.journals import JournalRecommender
 from agents.funding import FundingAdvisor
+from agents.similar_works import SimilarWorksFinder
 from agents.visualization import DataVisualizationCritic
 from agents.writing import WritingQualityCoach
-from pypdf import PdfReader
+from core.scheduler import AgentNode, AgentScheduler
+from core.document import PaperDocument
+from core.sections import PAPER_TYPES, SECTION_KEYS, detect_sections, locate_outline, merge_boundaries, sections_from_boundaries
+from core.text_windows import split_windows
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import os
 import json
@@ -19,57 +28,119 @@ load_dotenv()
 class PaperAnalyzerWorkflow:
     """Orchestrates all 8 agents to analyze research papers"""
 
-    def __init__(self):
-        self.client = AzureOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION")
-        )
-        self.methodology_critic = MethodologyCritic()
-        self.results_synthesizer = ResultsSynthesizer()
-        self.citation_hunter = CitationHunter()
-        self.plagiarism_detector = PlagiarismDetector()
-        self.journal_recommender = JournalRecommender()
-        self.funding_advisor = FundingAdvisor()
-        self.visualization_critic = DataVisualizationCritic()
-        self.writing_coach = WritingQualityCoach()
+    # "anchors": the LLM returns only where sections start and the text is sliced
+    # locally; "full": the LLM re-emits every section (slow, but needs no matching)
+    SECTION_EXTRACTION_MODE = os.getenv("SECTION_EXTRACTION_MODE", "anchors").lower()
+    # Share of outline anchors that must be found in the text to trust the slicing
+    SECTION_ANCHOR_MIN_MATCH = float(os.getenv("SECTION_ANCHOR_MIN_MATCH", "0.6"))
+    # Papers longer than one window are outlined window by window (map-reduce)
+    SECTION_WINDOW_CHARS = int(os.getenv("SECTION_WINDOW_CHARS", "60000"))
+    SECTION_WINDOW_OVERLAP = int(os.getenv("SECTION_WINDOW_OVERLAP", "3000"))
+    SECTION_MAX_CONCURRENT_WINDOWS = int(os.getenv("SECTION_MAX_CONCURRENT_WINDOWS", "4"))
+    # Heading detection from PDF typography; the LLM only runs below this confidence
+    SECTION_HEURISTIC_ENABLED = os.getenv("SECTION_HEURISTIC_ENABLED", "1").lower() not in ("0", "false", "no", "off")
+    SECTION_HEURISTIC_MIN_CONFIDENCE = float(os.getenv("SECTION_HEURISTIC_MIN_CONFIDENCE", "0.8"))
+
+    def __init__(self, use_cache=None):
+        """use_cache: reuse cached LLM responses for this run (None = LLM_CACHE_ENABLED setting)"""
+        # One client for the whole analysis: shared connection pool, one cache switch
+        self.client = create_llm_client(use_cache)
+        # Which section extraction path the last extract_sections call took
+        self.section_extraction = {"method": None, "confidence": None}
+        self.methodology_critic = MethodologyCritic(self.client)
+        self.results_synthesizer = ResultsSynthesizer(self.client)
+        self.citation_hunter = CitationHunter(self.client)
+        self.plagiarism_detector = PlagiarismDetector(self.client)
+        self.journal_recommender = JournalRecommender(self.client)
+        self.funding_advisor = FundingAdvisor(self.client)
+        self.similar_works_finder = SimilarWorksFinder(self.client)
+        self.visualization_critic = DataVisualizationCritic(self.client)
+        self.writing_coach = WritingQualityCoach(self.client)
         self.model = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
+
+    def cache_stats(self):
+        """LLM cache hits/misses for this run"""
+        return self.client.cache_stats()
+
+    def rate_limit_stats(self):
+        """Process-wide LLM rate limiter metrics (queue depth, wait times, 429s)"""
+        return get_rate_limiter().metrics()
+
+    def openalex_cache_stats(self):
+        """Process-wide OpenAlex counters: cache (hits, misses, revalidated, stale_served, entries)
+        and HTTP client (requests, rate_limited_responses, avg_wait_seconds)"""
+        stats = get_openalex_cache().stats()
+        stats.update(get_openalex_client().stats())
+        return stats
     
-    def extract_text_from_pdf(self, pdf_path):
-        """Extract text from PDF"""
-        print(f"📄 Extracting text from: {pdf_path}\n")
-        
-        reader = PdfReader(pdf_path)
-        full_text = ""
+    def semantic_scholar_stats(self):
+        """Process-wide Semantic Scholar counters (cache hits/misses, requests, 429s, latency)"""
+        return get_semantic_scholar_client().stats()
+    
+    def extract_text_from_pdf(self, document):
+        """Extract text from an opened PaperDocument"""
+        print(f"📄 Extracting text from: {document.path}\n")
         
-        for page in reader.pages:
-            full_text += page.extract_text()
+        full_text = document.extract_text()
         
-        print(f"✅ Extracted {len(full_text)} characters from {len(reader.pages)} pages\n")
+        print(f"✅ Extracted {len(full_text)} characters from {document.page_count} pages\n")
         return full_text
     
-    def extract_sections(self, full_text):
-        """Extract paper sections and paper type using LLM"""
+    def extract_sections(self, full_text, document=None):
+        """Extract paper sections and paper type.
+
+        Conventionally structured papers are split locally from their headings (needs
+        the PaperDocument); otherwise, or when the heuristic isn't confident, the LLM
+        is asked. self.section_extraction records which path was taken.
+        """
+        if document is not None and self.SECTION_HEURISTIC_ENABLED:
+            try:
+                sections, paper_type, confidence = detect_sections(document)
+            except Exception as e:
+                print(f"⚠️  Heading detection failed: {e}")
+                confidence = 0.0
+            if confidence >= self.SECTION_HEURISTIC_MIN_CONFIDENCE:
+                print(f"✂️  Sections detected from headings (confidence {confidence:.2f}), "
+                      "classifying paper type from the abstract\n")
+                self.section_extraction = {"method": "heuristic", "confidence": confidence}
+                paper_type = self._classify_paper_type(sections, full_text, fallback=paper_type)
+                return self._finish_sections(sections, paper_type)
+            print(f"ℹ️  Heading detection confidence {confidence:.2f} < {self.SECTION_HEURISTIC_MIN_CONFIDENCE}, using LLM")
+            self.section_extraction = {"method": None, "confidence": confidence}
+        else:
+            self.section_extraction = {"method": None, "confidence": None}
+
         print("✂️  Extracting paper sections via LLM...\n")
 
         try:
-            result = self._extract_sections_llm(full_text)
+            result = None
+            if self.SECTION_EXTRACTION_MODE == "anchors":
+                result = self._extract_sections_anchors(full_text)
+                self.section_extraction["method"] = "llm_anchors"
+            if result is None:
+                result = self._extract_sections_llm(full_text)
+                self.section_extraction["method"] = "llm_full"
         except Exception as e:
             print(f"❌ LLM section extraction failed: {e}")
             print("⚠️  Returning empty sections\n")
             result = {}
+            self.section_extraction["method"] = "failed"
 
         # Extract paper_type separately
         paper_type = result.pop("paper_type", "original_research")
+        return self._finish_sections(result, paper_type)
+
+    def _finish_sections(self, result, paper_type):
+        """Fill missing sections and print the summary"""
 
         # Fill missing sections with empty strings
-        for section in ['title', 'abstract', 'introduction', 'methods', 'results', 'discussion', 'conclusion']:
+        for section in SECTION_KEYS:
             if section not in result:
                 result[section] = ""
 
         print(f"📋 Paper type: {paper_type.upper().replace('_', ' ')}")
         print("✅ Sections extracted:")
-        for section in ['title', 'abstract', 'introduction', 'methods', 'results', 'discussion', 'conclusion']:
+        for section in SECTION_KEYS:
             length = len(result.get(section, ''))
             status = "✅" if length > 100 else ("⚠️ " if length == 0 else "✅")
             print(f"   {status} {section.title()}: {length} chars")
@@ -77,6 +148,150 @@ class PaperAnalyzerWorkflow:
 
         return result, paper_type
 
+    def _classify_paper_type(self, sections, full_text, fallback="original_research"):
+        """Paper type from title + abstract in one small LLM call.
+
+        Headings alone can't tell a systematic review (which has Methods) from
+        original research, or spot case studies; the keyword guess is only used
+        if the call fails.
+        """
+        excerpt = f"Title: {sections.get('title', '')}\n\n{sections.get('abstract') or full_text[:3000]}"
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": """Classify the research paper from its title and abstract as one of:
+- "original_research" (has own methodology, experiments, data collection)
+- "review" (literature review, systematic review, survey, synthesis of existing research)
+- "meta_analysis" (statistical synthesis of multiple studies)
+- "case_study" (detailed analysis of a specific case)
+- "other"
+
+Return JSON only: {"paper_type": "..."}"""},
+                    {"role": "user", "content": excerpt[:4000]}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.0,
+                max_tokens=20
+            )
+            paper_type = json.loads(response.choices[0].message.content).get("paper_type")
+        except Exception as e:
+            print(f"⚠️  Paper type classification failed ({e}), guessing from keywords")
+            return fallback
+        if paper_type not in PAPER_TYPES:
+            return fallback
+        return paper_type
+
+    def _extract_sections_anchors(self, full_text):
+        """Locate sections via an LLM outline of start anchors and slice them from full_text.
+
+        Returns None when the outline can't be matched well enough, so the caller
+        falls back to full-text extraction.
+        """
+
+        system_prompt = """You are an expert at parsing scientific research papers.
+
+Given the raw text extracted from a PDF, do TWO things:
+
+1. Classify the paper type as one of:
+   - "original_research" (has own methodology, experiments, data collection)
+   - "review" (literature review, survey, synthesis of existing research)
+   - "meta_analysis" (statistical synthesis of multiple studies)
+   - "case_study" (detailed analysis of a specific case)
+   - "other"
+
+2. Outline the paper: list EVERY top-level section in document order, including ones
+   that are not part of the categories below (keywords, references, acknowledgements,
+   appendix, ...). For each, give:
+   - "start": the first 6-10 words of the section copied EXACTLY as they appear in the
+     text, starting with the heading if there is one (e.g. "2. Materials and Methods 2.1 Study design")
+   - "categories": the standard categories this section belongs to, chosen from
+     abstract, introduction, methods, results, discussion, conclusion.
+     A combined "Results and Discussion" section gets ["results", "discussion"];
+     sections outside these categories get [].
+
+Do NOT return section text, only the anchors. Start anchors must be unique enough to
+find the section start; never paraphrase or fix typos.
+
+Return JSON only:
+{
+  "paper_type": "original_research|review|meta_analysis|case_study|other",
+  "title": "...",
+  "outline": [
+    {"start": "Abstract Background: Chronic kidney disease affects", "categories": ["abstract"]},
+    {"start": "1. Introduction Machine learning has been", "categories": ["introduction"]}
+  ]
+}"""
+
+        # Long papers are outlined in overlapping windows concurrently; boundaries
+        # from all windows are stitched and the sections sliced from full_text
+        windows = split_windows(full_text, self.SECTION_WINDOW_CHARS, self.SECTION_WINDOW_OVERLAP)
+        if len(windows) > 1:
+            print(f"   Long paper: outlining {len(windows)} overlapping windows "
+                  f"(up to {self.SECTION_MAX_CONCURRENT_WINDOWS} at a time)")
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(len(windows), self.SECTION_MAX_CONCURRENT_WINDOWS)) as executor:
+                outlines = list(executor.map(
+                    lambda args: self._outline_window(system_prompt, args[1][1], args[0], len(windows)),
+                    enumerate(windows)
+                ))
+        except Exception as e:
+            print(f"⚠️  Section outline failed ({e}), falling back to full-text extraction\n")
+            return None
+
+        boundary_lists = []
+        missing = []
+        matched = total = 0
+        for (start, window), data in zip(windows, outlines):
+            outline = [entry for entry in data.get("outline") or [] if isinstance(entry, dict)]
+            located, window_missing = locate_outline(full_text, outline, start=start, end=start + len(window))
+            boundary_lists.append(located)
+            missing.extend(window_missing)
+            matched += len(located)
+            total += len(outline)
+        sections = sections_from_boundaries(full_text, merge_boundaries(*boundary_lists))
+        data = outlines[0]
+
+        if missing:
+            # The section before an unmatched body anchor would run on through it
+            print(f"⚠️  Section anchors not found for {', '.join(sorted(set(missing)))}, "
+                  "falling back to full-text extraction\n")
+            return None
+        if not total or matched / total < self.SECTION_ANCHOR_MIN_MATCH or not any(
+                sections[key] for key in ('introduction', 'methods', 'results', 'discussion')):
+            print(f"⚠️  Only {matched}/{total} section anchors matched, falling back to full-text extraction\n")
+            return None
+
+        print(f"   Sections sliced locally ({matched}/{total} anchors matched)")
+        sections["title"] = data.get("title", "")
+        sections["paper_type"] = data.get("paper_type", "original_research")
+        return sections
+
+    def _outline_window(self, system_prompt, window, index, count):
+        """One outline call; parts after the first are told they may start mid-section"""
+        if count == 1:
+            user_content = f"Outline this paper:\n\n{window}"
+        else:
+            user_content = (
+                f"This is part {index + 1} of {count} of a long paper. Only list sections whose START "
+                "(heading) appears in this part; text at the beginning that continues a section from "
+                "the previous part is not a new section."
+                + (" Classify the paper type and give the title from this first part." if index == 0 else "")
+                + f"\n\nOutline this part:\n\n{window}"
+            )
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_content}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.1,
+            max_tokens=2000
+        )
+        return json.loads(response.choices[0].message.content)
+
     def _extract_sections_llm(self, full_text):
         """Extract sections and paper type using GPT-4o"""
 
@@ -118,6 +333,8 @@ Return JSON only:
 
         # Send up to 60k chars (enough for ~25 page papers, within GPT-4o's 128k context)
         text_to_analyze = full_text[:60000]
+        if len(full_text) > len(text_to_analyze):
+            print(f"⚠️  Full-text section extraction only sees the first 60000 of {len(full_text)} chars\n")
 
         response = self.client.chat.completions.create(
             model=self.model,
@@ -131,19 +348,112 @@ Return JSON only:
 
         return json.loads(response.choices[0].message.content)
     
-    def run(self, pdf_path):
-        """Run complete analysis workflow"""
-        
-        print("="*60)
-        print("🔬 RESEARCH PAPER ANALYZER")
-        print("="*60)
-        print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        
-        # Step 1: Extract text
-        full_text = self.extract_text_from_pdf(pdf_path)
-        
-        # Step 2: Extract sections + paper type
-        sections, paper_type = self.extract_sections(full_text)
+    def build_agent_graph(self, document, full_text, sections, paper_type,
+                          selected_agents=None, on_skip=None, on_error=None):
+        """Declare the agent graph: nodes are agents, edges are data dependencies.
+
+        Every agent only needs the extracted text, except the journal ranking step,
+        which waits on methodology + results. The similar-works search (query
+        extraction, OpenAlex works searches) has no dependencies and starts
+        immediately; journal candidate gathering and the Funding Advisor both read
+        its result, so the searches run once per paper.
+
+        selected_agents: agent keys to run (None = all); unselected agents return on_skip(key).
+        on_error: on_error(key, exception) -> fallback result; None lets failures propagate.
+        """
+        is_review = paper_type in ("review", "meta_analysis")
+        title = sections.get('title', 'Unknown Title')
+        abstract = sections.get('abstract', '')
+
+        def methodology():
+            if is_review:
+                print("ℹ️  Skipping Agent 1 (paper is a review/meta-analysis - no own methodology expected)\n")
+                return self._review_methods_analysis()
+            if sections.get('methods'):
+                return self.methodology_critic.analyze(
+                    sections['methods'],
+                    abstract=abstract,
+                    results_text=sections.get('results', '')
+                )
+            print("⚠️  Skipping Agent 1 (no Methods section found)\n")
+            return self._empty_methods_analysis()
+
+        def results():
+            if sections.get('results'):
+                return self.results_synthesizer.analyze(sections['results'])
+            if sections.get('discussion'):
+                print("ℹ️  No separate Results section - using Discussion for synthesis\n")
+                return self.results_synthesizer.analyze(sections['discussion'])
+            print("⚠️  Skipping Agent 2 (no Results section found)\n")
+            return self._empty_results_analysis()
+
+        def visualization():
+            return self.visualization_critic.analyze(document, full_text, sections.get('results', ''))
+
+        def writing():
+            return self.writing_coach.analyze(sections, paper_type)
+
+        def citations():
+            return self.citation_hunter.analyze(title, abstract)
+
+        def plagiarism():
+            return self.plagiarism_detector.analyze(full_text, paper_type, title=title, source=document.path)
+
+        def similar_works():
+            return self.similar_works_finder.search(title, abstract)
+
+        def funding(similar_works):
+            return self.funding_advisor.analyze(title, abstract, paper_type=paper_type,
+                                                similar_works=similar_works)
+
+        def journal_candidates(similar_works):
+            return self.journal_recommender.gather_candidates(title, abstract, similar_works=similar_works)
+
+        def journals(journal_candidates, methodology, results):
+            methods_quality_score = methodology.get('overall_quality')
+            evidence_strength_val = results.get('strength_of_evidence', '')
+            return self.journal_recommender.recommend(
+                journal_candidates, title, abstract,
+                paper_type=paper_type,
+                methods_quality=methods_quality_score if methods_quality_score != "N/A" else None,
+                evidence_strength=evidence_strength_val if evidence_strength_val != "unknown" else None
+            )
+
+        agents = [
+            ("methodology", methodology, ()),
+            ("results", results, ()),
+            ("visualization", visualization, ()),
+            ("writing", writing, ()),
+            ("citations", citations, ()),
+            ("plagiarism", plagiarism, ()),
+            ("funding", funding, ("similar_works",)),
+            ("journals", journals, ("journal_candidates", "methodology", "results")),
+        ]
+
+        nodes = []
+        for key, fn, depends_on in agents:
+            if selected_agents is not None and key not in selected_agents:
+                fn, depends_on = (lambda key=key, **_: on_skip(key) if on_skip else None), ()
+            fallback = (lambda e, key=key: on_error(key, e)) if on_error else None
+            nodes.append(AgentNode(key, fn, depends_on=depends_on, fallback=fallback))
+
+        if selected_agents is None or {"journals", "funding"} & set(selected_agents):
+            # A failed search leaves both consumers with no OpenAlex evidence rather than failing them
+            nodes.append(AgentNode("similar_works", similar_works,
+                                   fallback=lambda e: SimilarWorksFinder.empty_result()))
+
+        if selected_agents is None or "journals" in selected_agents:
+            # A failed candidate search still lets journals fall back to LLM-only ranking
+            nodes.append(AgentNode("journal_candidates", journal_candidates,
+                                   depends_on=("similar_works",), fallback=lambda e: None))
+
+        return nodes
+
+    def analyze_text(self, document, full_text):
+        """Sections, agent graph and report for an opened PaperDocument and its text; returns all results"""
+
+        # Extract sections + paper type
+        sections, paper_type = self.extract_sections(full_text, document)
         is_review = paper_type in ("review", "meta_analysis")
 
         # Check if we have enough sections (skip for reviews)
@@ -154,90 +464,65 @@ Return JSON only:
                 print(f"⚠️  WARNING: Missing sections: {', '.join(missing)}")
                 print("⚠️  Analysis will continue but may be incomplete\n")
 
-        # Step 3: Agent 1 - Methodology Analysis
-        print("-"*60)
-        if is_review:
-            print("ℹ️  Skipping Agent 1 (paper is a review/meta-analysis - no own methodology expected)\n")
-            methods_analysis = self._review_methods_analysis()
-        elif sections.get('methods'):
-            methods_analysis = self.methodology_critic.analyze(
-                sections['methods'],
-                abstract=sections.get('abstract', ''),
-                results_text=sections.get('results', '')
-            )
-        else:
-            print("⚠️  Skipping Agent 1 (no Methods section found)\n")
-            methods_analysis = self._empty_methods_analysis()
-
-        # Step 4: Agent 2 - Results Synthesis
-        print("-"*60)
-        if sections.get('results'):
-            results_analysis = self.results_synthesizer.analyze(sections['results'])
-        elif sections.get('discussion'):
-            print("ℹ️  No separate Results section - using Discussion for synthesis\n")
-            results_analysis = self.results_synthesizer.analyze(sections['discussion'])
-        else:
-            print("⚠️  Skipping Agent 2 (no Results section found)\n")
-            results_analysis = self._empty_results_analysis()
-
-        # Step 5: Agent 7 - Data Visualization Analysis
+        # Run all agents concurrently (journal ranking waits on methodology + results)
         print("-"*60)
-        visualization_analysis = self.visualization_critic.analyze(
-            pdf_path, full_text, sections.get('results', '')
-        )
+        print("⚡ Running agents...\n")
+        scheduler = AgentScheduler(self.build_agent_graph(document, full_text, sections, paper_type))
+        agent_results = scheduler.run()
 
-        # Step 6: Agent 8 - Writing Quality
         print("-"*60)
-        writing_analysis = self.writing_coach.analyze(sections, paper_type)
-
-        # Step 7: Agent 3 - Citation Analysis
-        print("-"*60)
-        citation_analysis = self.citation_hunter.analyze(
-            sections.get('title', 'Unknown Title'),
-            sections.get('abstract', '')
-        )
-
-        # Step 8: Agent 4 - Plagiarism Check
-        print("-"*60)
-        plagiarism_analysis = self.plagiarism_detector.analyze(full_text, paper_type)
-
-        # Step 9: Agent 5 - Journal Recommendations
-        print("-"*60)
-        methods_quality_score = methods_analysis.get('overall_quality')
-        evidence_strength_val = results_analysis.get('strength_of_evidence', '')
-
-        journal_recommendations = self.journal_recommender.analyze(
-            sections.get('title', 'Unknown Title'),
-            sections.get('abstract', ''),
-            paper_type=paper_type,
-            methods_quality=methods_quality_score if methods_quality_score != "N/A" else None,
-            evidence_strength=evidence_strength_val if evidence_strength_val != "unknown" else None
-        )
-
-        # Step 10: Agent 6 - Funding Recommendations
-        print("-"*60)
-        funding_recommendations = self.funding_advisor.analyze(
-            sections.get('title', 'Unknown Title'),
-            sections.get('abstract', ''),
-            paper_type=paper_type
-        )
+        for name, seconds in sorted(scheduler.timings.items(), key=lambda x: x[1], reverse=True):
+            print(f"   ⏱️  {name}: {seconds:.1f}s")
+        print()
 
-        # Step 11: Generate Report
+        # Generate report
         print("-"*60)
         print("📝 Generating final report...\n")
 
         report = self.generate_report(
             sections,
-            methods_analysis,
-            results_analysis,
-            visualization_analysis,
-            writing_analysis,
-            citation_analysis,
-            plagiarism_analysis,
-            journal_recommendations,
-            funding_recommendations,
+            agent_results["methodology"],
+            agent_results["results"],
+            agent_results["visualization"],
+            agent_results["writing"],
+            agent_results["citations"],
+            agent_results["plagiarism"],
+            agent_results["journals"],
+            agent_results["funding"],
             paper_type
         )
+
+        return {
+            "report": report,
+            "sections": sections,
+            "paper_type": paper_type,
+            "methods": agent_results["methodology"],
+            "results": agent_results["results"],
+            "visualization": agent_results["visualization"],
+            "writing": agent_results["writing"],
+            "citations": agent_results["citations"],
+            "plagiarism": agent_results["plagiarism"],
+            "journals": agent_results["journals"],
+            "funding": agent_results["funding"],
+            "agent_timings": scheduler.timings,
+            "section_extraction": self.section_extraction
+        }
+
+    def run(self, pdf_path):
+        """Run complete analysis workflow"""
+        
+        print("="*60)
+        print("🔬 RESEARCH PAPER ANALYZER")
+        print("="*60)
+        print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        
+        # The PDF is opened once; text and figure extraction share it
+        with PaperDocument(pdf_path) as document:
+            # Step 1: Extract text
+            full_text = self.extract_text_from_pdf(document)
+
+            # Step 2-4: Sections, agents, report
+            report = self.analyze_text(document, full_text)["report"]
         
         # Save report
         output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "output")
@@ -247,6 +532,21 @@ Return JSON only:
             f.write(report)
 
         print(f"✅ Report saved: {report_filename}")
+        stats = self.cache_stats()
+        if stats["enabled"]:
+            print(f"💾 LLM cache: {stats['hits']} hits, {stats['misses']} misses")
+        limits = self.rate_limit_stats()
+        print(f"⏳ LLM rate limiter: {limits['requests_admitted']} requests, "
+              f"avg wait {limits['avg_wait_seconds']}s, max wait {limits['max_wait_seconds']}s, "
+              f"max queue {limits['max_queue_depth']}, {limits['rate_limited_responses']}x 429")
+        openalex = self.openalex_cache_stats()
+        print(f"💾 OpenAlex cache: {openalex['hits']} hits, {openalex['revalidated']} revalidated, "
+              f"{openalex['misses']} misses; {openalex['requests']} requests, "
+              f"{openalex['rate_limited_responses']}x 429")
+        scholar = self.semantic_scholar_stats()
+        print(f"💾 Semantic Scholar: {scholar['hits']} cache hits, {scholar['misses']} misses; "
+              f"{scholar['requests']} requests (avg {scholar['avg_latency_seconds']}s), "
+              f"{scholar['rate_limited_responses']}x 429")
         print("\n" + "="*60)
         print("✅ ANALYSIS COMPLETE!")
         print("="*60)
@@ -495,7 +795,7 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 ## 📈 DATA VISUALIZATION ASSESSMENT (Agent 7)
 
-**Figures Analyzed:** {visualization['figures_analyzed']}
+**Figures Analyzed:** {visualization['figures_analyzed']}{f" ({visualization['figure_dedup']['duplicates_collapsed']} duplicates collapsed, {visualization['figure_dedup'].get('non_charts_skipped', 0)} non-charts skipped, {visualization['figure_dedup']['cache_hits']} cached verdicts)" if visualization.get('figure_dedup') else ''}
 **Overall Quality:** {visualization['overall_quality']}/5
 
 ### Overall Assessment
@@ -580,6 +880,12 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 - **Recommendation:** {s['recommendation']}
 ''' for i, s in enumerate(plagiarism['suspicious_sections'])) if plagiarism['suspicious_sections'] else '✅ None identified'}
 
+### Local Corpus Matches ({len(plagiarism.get('corpus_matches', []))})
+{chr(10).join(f'''
+**{i+1}.** "{m['matched_text'][:200]}"
+- **Matches:** {m.get('title') or m.get('source') or 'indexed document'} ({m['coverage']:.0%} of the sentence)
+''' for i, m in enumerate(plagiarism.get('corpus_matches', []))) if plagiarism.get('corpus_matches') else '✅ No overlap with the local fingerprint index'}
+
 ### Overall Assessment
 {plagiarism['overall_assessment']}
 
@@ -656,15 +962,31 @@ if __name__ == "__main__":
     import sys
     
     if len(sys.argv) < 2:
-        print("Usage: python workflow.py <path_to_pdf>")
+        print("Usage: python workflow.py <path_to_pdf> [--no-cache]")
+        print("       python workflow.py batch <directory|manifest> [options]  (see --help)")
+        print("       python workflow.py warm-openalex [--sources N] [--funders N]")
+        print("       python workflow.py index-corpus <directory> [--recursive]")
         print("\nExample: python workflow.py sample_paper.pdf")
         sys.exit(1)
+
+    if sys.argv[1] == "batch":
+        from batch import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+
+    if sys.argv[1] == "warm-openalex":
+        from core.openalex_cache import main as warm_main
+        sys.exit(warm_main(sys.argv[2:]))
+
+    if sys.argv[1] == "index-corpus":
+        from core.fingerprint_index import main as index_main
+        sys.exit(index_main(sys.argv[2:]))
     
     pdf_path = sys.argv[1]
+    use_cache = False if "--no-cache" in sys.argv[2:] else None
     
     if not os.path.exists(pdf_path):
         print(f"❌ Error: File not found: {pdf_path}")
         sys.exit(1)
     
-    workflow = PaperAnalyzerWorkflow()
+    workflow = PaperAnalyzerWorkflow(use_cache=use_cache)
     report = workflow.run(pdf_path)
\ No newline at end of file